@@ -1,42 +1,96 @@
+import re
 import json
-import gzip
+import zlib
 import base64
-import boto3
 import os
-import logging
-from datetime import datetime
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
 
-logger = logging.getLogger()
-logger.setLevel(logging.INFO)
+from banking_common import (
+    MultipartUploader,
+    get_logger,
+    instrumented,
+    is_warmup,
+    lazy_client,
+    prime,
+    register_snapshot_priming,
+    start_invocation,
+    warm_up,
+)
 
-s3 = boto3.client('s3')
+from log_stream import LogPayloadReader, iter_decoded, iter_inflated
+from partitions import NDJSONArchiveWriter, ObjectIndex, new_object_key, partition_prefix, write_index
+
+logger = get_logger()
+
+s3 = lazy_client('s3')
+register_snapshot_priming(s3)
 bucket_name = os.environ.get('ARCHIVE_BUCKET', 'forwardedbankinglogsfinal')
 
+# ndjson-gzip: one log event per line, gzip-compressed
+# raw:         the subscription payload's gzip bytes, stored untouched
+# json:        the decoded payload, pretty-printed (the original format)
+ARCHIVE_FORMAT = os.environ.get('ARCHIVE_FORMAT', 'ndjson-gzip')
+COMPRESSION_LEVEL = int(os.environ.get('ARCHIVE_COMPRESSION_LEVEL', '6'))
+
+# Encoded output is handed to the uploader in blocks of about this size
+WRITE_BLOCK_BYTES = 256 * 1024
+
+# CloudWatch Logs puts logGroup/logStream and the first event near the start
+# of the payload, so raw mode only inflates this much of it to place the object
+HEADER_PEEK_BYTES = 4096
+HEADER_FIELD_RE = {
+    field: re.compile(rf'"{field}"\s*:\s*"((?:[^"\\]|\\.)*)"')
+    for field in ('logGroup', 'logStream')
+}
+FIRST_TIMESTAMP_RE = re.compile(r'"logEvents"\s*:\s*\[\s*\{[^{}]*?"timestamp"\s*:\s*(\d+)')
+
+# Batch mode (event['Records'], e.g. from a Kinesis stream): records are
+# decoded on a thread pool, at most BATCH_DECODE_WORKERS * 2 at a time
+BATCH_DECODE_WORKERS = int(os.environ.get('BATCH_DECODE_WORKERS', '4'))
+
+
+@instrumented
 def lambda_handler(event, context):
+    start_invocation(context)
+    # The role may only put objects, so warming builds the client without calling S3
+    if is_warmup(event):
+        return warm_up(client=lambda: prime(s3))
+
+    if 'Records' in event:
+        return _handle_batch(event['Records'])
+
     try:
-        logger.info("Received log event")
-
-        # Decode the base64-encoded and gzipped log data
-        compressed_payload = base64.b64decode(event['awslogs']['data'])
-        uncompressed_payload = gzip.decompress(compressed_payload).decode('utf-8')
-        log_data = json.loads(uncompressed_payload)
-
-        # Generate S3 object key
-        timestamp = datetime.utcnow().strftime('%Y/%m/%d/%H-%M-%S')
-        log_group = log_data.get('logGroup', 'unknown-loggroup').replace('/', '_')
-        log_stream = log_data.get('logStream', 'unknown-logstream').replace('/', '_')
-        key = f"{log_group}/{log_stream}/{timestamp}.json"
-
-        # Upload to S3
-        s3.put_object(
-            Bucket=bucket_name,
-            Key=key,
-            Body=json.dumps(log_data, indent=2),
-            ContentType='application/json'
-        )
-
-        logger.info(f"Successfully wrote log to s3://{bucket_name}/{key}")
-        return {"statusCode": 200, "body": "Success"}
+        logger.debug("Received log event")
+
+        # The payload is base64 text around gzipped JSON; it is decoded,
+        # inflated and parsed a chunk at a time rather than all at once
+        encoded_payload = event['awslogs']['data']
+
+        if ARCHIVE_FORMAT == 'raw':
+            entries, uncompressed_size = _archive_raw(encoded_payload)
+        elif ARCHIVE_FORMAT == 'json':
+            entries, uncompressed_size = _archive_json(encoded_payload)
+        else:
+            entries, uncompressed_size = _archive_ndjson(encoded_payload)
+
+        bytes_written = sum(entry['bytes'] for entry in entries)
+        ratio = round(uncompressed_size / bytes_written, 2) if bytes_written else None
+        keys = [entry['key'] for entry in entries]
+        logger.info("Wrote %d objects to s3://%s", len(keys), bucket_name, extra={
+            "keys": keys, "format": ARCHIVE_FORMAT, "bytes_written": bytes_written,
+            "uncompressed_bytes": uncompressed_size, "compression_ratio": ratio
+        })
+        return {
+            "statusCode": 200,
+            "body": json.dumps({
+                "keys": keys,
+                "format": ARCHIVE_FORMAT,
+                "bytes_written": bytes_written,
+                "uncompressed_bytes": uncompressed_size,
+                "compression_ratio": ratio
+            })
+        }
 
     except Exception as e:
         logger.exception("Failed to process logs")
@@ -44,3 +98,241 @@ def lambda_handler(event, context):
             "statusCode": 500,
             "body": json.dumps({"error": str(e)})
         }
+
+
+def _archive_raw(encoded_payload):
+    """
+    Copy the gzip bytes to S3 as they are decoded. The partition comes from
+    the first event's timestamp, read along with the log group and stream
+    from the head of the payload; the rest is never inflated, so the sidecar
+    only knows where the object starts. Returns (index entries, uncompressed size).
+    """
+    chunks = iter_decoded(encoded_payload)
+    first = next(chunks, b'')
+    log_group, log_stream, first_timestamp = _peek_payload_head(first)
+    key = new_object_key(partition_prefix(log_group, first_timestamp), 'json.gz')
+
+    trailer = first[-4:]
+    with MultipartUploader(s3, bucket_name, key, 'application/json',
+                           extra_args={'ContentEncoding': 'gzip'}) as out:
+        out.write(first)
+        for chunk in chunks:
+            out.write(chunk)
+            trailer = (trailer + chunk)[-4:]
+
+    index = ObjectIndex(log_group)
+    if log_stream:
+        index.log_streams.add(log_stream)
+    index.min_timestamp = first_timestamp
+    entry = index.as_dict(key, 'raw', out.bytes_written)
+    entry.update({"maxTimestamp": None, "eventCount": None, "idsTruncated": True})
+    write_index(s3, bucket_name, entry)
+
+    # gzip's trailer holds the uncompressed size (mod 2**32)
+    return [entry], int.from_bytes(trailer, 'little')
+
+
+def _archive_ndjson(encoded_payload):
+    """Stream log events into one NDJSON+gzip object per hour partition. Returns (index entries, uncompressed size)."""
+    reader = LogPayloadReader(iter_inflated(iter_decoded(encoded_payload)))
+    writer = NDJSONArchiveWriter(s3, bucket_name, COMPRESSION_LEVEL, WRITE_BLOCK_BYTES)
+    try:
+        for log_event in reader.events():
+            writer.add(reader.fields.get('logGroup'), reader.fields.get('logStream'), log_event)
+        entries = writer.close()
+    except Exception:
+        writer.abort()
+        raise
+    return entries, reader.bytes_read
+
+
+def _archive_json(encoded_payload):
+    """
+    Stream the payload back out as indented JSON, partitioned by its first
+    event's timestamp. Returns (index entries, uncompressed size).
+    """
+    reader = LogPayloadReader(iter_inflated(iter_decoded(encoded_payload)))
+    events = reader.events()
+    # Top-level fields precede logEvents, so they are known once the first event is read
+    first = next(events, None)
+    log_group = reader.fields.get('logGroup')
+    log_stream = reader.fields.get('logStream')
+    key = new_object_key(partition_prefix(log_group, first.get('timestamp') if first else None), 'json')
+
+    index = ObjectIndex(log_group)
+
+    def observed(log_events):
+        for log_event in log_events:
+            index.observe(log_stream, log_event)
+            yield log_event
+
+    with MultipartUploader(s3, bucket_name, key, 'application/json') as out:
+        block = []
+        block_size = 0
+        for piece in _indented_json(reader, observed(_chain(first, events))):
+            block.append(piece)
+            block_size += len(piece)
+            if block_size >= WRITE_BLOCK_BYTES:
+                out.write(''.join(block).encode('utf-8'))
+                block, block_size = [], 0
+        out.write(''.join(block).encode('utf-8'))
+
+    entry = index.as_dict(key, 'json', out.bytes_written)
+    write_index(s3, bucket_name, entry)
+    return [entry], reader.bytes_read
+
+
+def _indented_json(reader, log_events):
+    """
+    The payload as json.dumps(payload, indent=2) would print it, produced
+    event by event. Fields that follow logEvents, which CloudWatch Logs does
+    not send, are written after it.
+    """
+    def member(name, value):
+        text = json.dumps(value, indent=2).replace('\n', '\n  ')
+        return f'  {json.dumps(name)}: {text}'
+
+    written = set(reader.fields)
+    members = [member(name, value) for name, value in reader.fields.items()]
+    yield '{\n' + ',\n'.join(members)
+
+    yield (',\n' if members else '') + '  "logEvents": ['
+    separator = '\n'
+    for log_event in log_events:
+        yield separator + '    ' + json.dumps(log_event, indent=2).replace('\n', '\n    ')
+        separator = ',\n'
+    # json.dumps prints an empty list as []
+    yield ']' if separator == '\n' else '\n  ]'
+
+    for name, value in reader.fields.items():
+        if name not in written:
+            yield ',\n' + member(name, value)
+    yield '\n}'
+
+
+def _chain(first, events):
+    if first is not None:
+        yield first
+    yield from events
+
+
+def _peek_payload_head(compressed_head):
+    """
+    Read logGroup, logStream and the first event's timestamp from the first
+    few KB of the payload without decoding the rest.
+    """
+    head = zlib.decompressobj(wbits=31).decompress(compressed_head, HEADER_PEEK_BYTES)
+    text = head.decode('utf-8', 'replace')
+    values = []
+    for field in ('logGroup', 'logStream'):
+        match = HEADER_FIELD_RE[field].search(text)
+        values.append(json.loads(f'"{match.group(1)}"') if match else None)
+    match = FIRST_TIMESTAMP_RE.search(text)
+    values.append(int(match.group(1)) if match else None)
+    return values
+
+
+def _handle_batch(records):
+    """
+    Archive a batch of subscription payloads as one NDJSON+gzip object per
+    partition, whatever ARCHIVE_FORMAT says, and report the records that
+    could not be archived in batchItemFailures so only those are retried.
+
+    Only write failures are reported. A record that cannot be decoded (bad
+    base64, gzip or JSON) would fail the same way on every retry and hold up
+    the shard behind it, so it is logged with its identifier and dropped. If
+    a write fails, the objects already completed are deleted and every
+    record not dropped is reported; if one of those has no identifier to
+    report, the whole batch is failed instead.
+
+    Accepts Kinesis records (record['kinesis']['data']) and records that
+    carry the direct-invocation shape (record['awslogs']['data']).
+    """
+    logger.info("Received batch of %d records", len(records))
+    writer = NDJSONArchiveWriter(s3, bucket_name, COMPRESSION_LEVEL, WRITE_BLOCK_BYTES)
+    failures = []
+    written = []
+    dropped = 0
+    uncompressed_size = 0
+
+    consumed = 0
+
+    try:
+        for identifier, payload, size, error in _decode_records(records):
+            consumed += 1
+            if error is not None:
+                logger.error("Dropping undecodable record %s: %s", identifier, error,
+                             extra={"error_type": type(error).__name__})
+                dropped += 1
+                continue
+            uncompressed_size += size
+            # CloudWatch Logs sends a CONTROL_MESSAGE to check a new subscription
+            if payload.get('messageType') == 'CONTROL_MESSAGE':
+                continue
+            written.append(identifier)
+            for log_event in payload.get('logEvents', []):
+                writer.add(payload.get('logGroup'), payload.get('logStream'), log_event)
+        entries = writer.close()
+    except Exception:
+        # abort() removes any partition already completed, so every record
+        # that fed the writer is retried, along with those not yet read
+        logger.exception("Failed to write batch archive")
+        writer.abort()
+        failures.extend(written)
+        failures.extend(_record_identifier(record) for record in records[consumed:])
+        if None in failures:
+            raise
+        entries = []
+
+    bytes_written = sum(entry['bytes'] for entry in entries)
+    ratio = round(uncompressed_size / bytes_written, 2) if bytes_written else None
+    archived = len(records) - len(failures) - dropped
+    logger.info("Archived %d of %d records into %d objects", archived, len(records), len(entries),
+                extra={"dropped_records": dropped, "bytes_written": bytes_written,
+                       "uncompressed_bytes": uncompressed_size, "compression_ratio": ratio})
+    return {"batchItemFailures": [{"itemIdentifier": identifier} for identifier in failures]}
+
+
+def _record_identifier(record):
+    """The itemIdentifier the event source expects back, or None if the record has none."""
+    if not isinstance(record, dict):
+        return None
+    if 'kinesis' in record:
+        return record['kinesis'].get('sequenceNumber')
+    return record.get('messageId') or record.get('eventID')
+
+
+def _record_data(record):
+    if 'kinesis' in record:
+        return record['kinesis']['data']
+    return record['awslogs']['data']
+
+
+def _decode_record(record):
+    """Return (identifier, payload, uncompressed size, error); never raises."""
+    identifier = _record_identifier(record)
+    try:
+        raw = zlib.decompress(base64.b64decode(_record_data(record)), wbits=31)
+        payload = json.loads(raw)
+        if not isinstance(payload, dict) or not isinstance(payload.get('logEvents', []), list):
+            raise ValueError("payload is not a subscription message object")
+        return identifier, payload, len(raw), None
+    except Exception as e:
+        return identifier, None, 0, e
+
+
+def _decode_records(records):
+    """
+    Decode records on a thread pool and yield their results in order. At most
+    BATCH_DECODE_WORKERS * 2 records are in flight, so only a few decoded
+    payloads are held at once.
+    """
+    window = BATCH_DECODE_WORKERS * 2
+    with ThreadPoolExecutor(max_workers=BATCH_DECODE_WORKERS) as pool:
+        pending = deque()
+        for record in records:
+            pending.append(pool.submit(_decode_record, record))
+            if len(pending) >= window:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
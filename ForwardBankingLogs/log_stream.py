@@ -0,0 +1,157 @@
+"""
+Incremental decoding of CloudWatch Logs subscription payloads.
+
+The payload arrives as base64 text wrapping a gzip stream wrapping one JSON
+document whose `logEvents` array holds the log lines. LogPayloadReader walks
+that chain a chunk at a time: base64 is decoded in fixed-size slices, gzip is
+inflated with a bounded output size, and the JSON is scanned so that each log
+event is yielded as soon as its closing brace has been read. Only one chunk of
+text and the event being parsed are held at once, however large the payload.
+"""
+import json
+import zlib
+import base64
+import codecs
+
+BASE64_CHUNK = 64 * 1024   # multiple of 4, so every slice decodes on its own
+INFLATE_CHUNK = 256 * 1024
+
+_decoder = json.JSONDecoder()
+_WHITESPACE = ' \t\r\n'
+
+
+def iter_decoded(data, chunk_size=BASE64_CHUNK):
+    """Yield the bytes of base64 text `data` a slice at a time."""
+    for offset in range(0, len(data), chunk_size):
+        yield base64.b64decode(data[offset:offset + chunk_size])
+
+
+def iter_inflated(chunks, max_output=INFLATE_CHUNK):
+    """Yield gzip-decompressed bytes from an iterable of compressed chunks."""
+    inflater = zlib.decompressobj(wbits=31)
+    for chunk in chunks:
+        data = chunk
+        while data:
+            out = inflater.decompress(data, max_output)
+            if out:
+                yield out
+            data = inflater.unconsumed_tail
+    tail = inflater.flush()
+    if tail:
+        yield tail
+    if not inflater.eof:
+        raise ValueError("Truncated gzip stream")
+
+
+class PayloadFormatError(ValueError):
+    pass
+
+
+class LogPayloadReader:
+    """
+    Stream the events of one subscription payload.
+
+        reader = LogPayloadReader(iter_inflated(iter_decoded(data)))
+        for log_event in reader.events():
+            ...
+        reader.fields  # logGroup, logStream, owner, ...
+
+    Top-level fields are collected into `fields` as they are passed. In the
+    payloads CloudWatch Logs sends they all precede `logEvents`, so they are
+    complete by the time the first event is yielded.
+    """
+
+    def __init__(self, byte_chunks):
+        self._chunks = iter(byte_chunks)
+        self._text = ''
+        self._pos = 0
+        self._exhausted = False
+        self.fields = {}
+        self.bytes_read = 0
+        # Incremental UTF-8 decoding so multi-byte characters may span chunks
+        self._utf8 = codecs.getincrementaldecoder('utf-8')()
+
+    def _fill(self):
+        """Append the next chunk of text; False at end of input."""
+        if self._exhausted:
+            return False
+        try:
+            chunk = next(self._chunks)
+        except StopIteration:
+            self._exhausted = True
+            tail = self._utf8.decode(b'', final=True)
+            if tail:
+                self._text = self._text[self._pos:] + tail
+                self._pos = 0
+                return True
+            return False
+        self.bytes_read += len(chunk)
+        self._text = self._text[self._pos:] + self._utf8.decode(chunk)
+        self._pos = 0
+        return True
+
+    def _peek(self):
+        """Next non-whitespace character, reading more input as needed."""
+        while True:
+            while self._pos < len(self._text) and self._text[self._pos] in _WHITESPACE:
+                self._pos += 1
+            if self._pos < len(self._text):
+                return self._text[self._pos]
+            if not self._fill():
+                return ''
+
+    def _expect(self, char):
+        if self._peek() != char:
+            raise PayloadFormatError(f"Expected {char!r} in log payload")
+        self._pos += 1
+
+    def _value(self):
+        """Decode one complete JSON value starting at the cursor."""
+        self._peek()
+        while True:
+            try:
+                value, end = _decoder.raw_decode(self._text, self._pos)
+            except json.JSONDecodeError:
+                if not self._fill():
+                    raise PayloadFormatError("Malformed or truncated log payload")
+                continue
+            # A number at the end of the buffer may continue in the next chunk
+            if end == len(self._text) and isinstance(value, (int, float)) and self._fill():
+                continue
+            self._pos = end
+            return value
+
+    def events(self):
+        """Yield each dict in `logEvents`, in order."""
+        self._expect('{')
+        if self._peek() == '}':
+            return
+        while True:
+            key = self._value()
+            if not isinstance(key, str):
+                raise PayloadFormatError("Expected an object key in log payload")
+            self._expect(':')
+            if key == 'logEvents':
+                yield from self._array()
+            else:
+                self.fields[key] = self._value()
+            separator = self._peek()
+            self._pos += 1
+            if separator == '}':
+                return
+            if separator != ',':
+                raise PayloadFormatError("Malformed log payload")
+
+    def _array(self):
+        self._expect('[')
+        if self._peek() == ']':
+            self._pos += 1
+            return
+        while True:
+            yield self._value()
+            separator = self._peek()
+            self._pos += 1
+            if separator == ']':
+                return
+            if separator != ',':
+                raise PayloadFormatError("Malformed logEvents array")
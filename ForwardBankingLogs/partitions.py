@@ -0,0 +1,206 @@
+"""
+Hive-style archive layout for forwarded logs.
+
+Objects are partitioned by log group and by the event time (UTC) of the log
+lines they hold, and named with a random UUID so concurrent invocations never
+overwrite each other:
+
+    log_group=_aws_lambda_ProcessTransferLambda/dt=2025-03-01/hour=14/<uuid>.ndjson.gz
+
+Next to every object a small sidecar is written under the partition's
+`_index/` prefix, recording the object's time range, event count, log
+streams and the request and user IDs seen in its messages. tools/query_logs.py
+reads those sidecars to decide which objects to fetch.
+"""
+import re
+import json
+import uuid
+import zlib
+import logging
+from datetime import datetime, timezone
+
+from banking_common import MultipartUploader
+
+logger = logging.getLogger()
+
+INDEX_DIR = '_index'
+
+# IDs kept per sidecar; beyond this the sidecar is marked truncated and
+# queries fall back to reading the object
+MAX_INDEX_IDS = 1000
+
+# Lambda prefixes every line with the invocation's request ID, and the
+# handlers log Cognito subs, both as UUIDs
+UUID_RE = re.compile(r'\b[0-9a-fA-F]{8}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{12}\b')
+# e.g. "Authenticated user_id: alice", "user_id=alice", '"user_id": "alice"'
+USER_ID_RE = re.compile(r'user_?id"?\s*[:=]\s*"?([A-Za-z0-9._@+-]+)', re.IGNORECASE)
+
+
+def partition_value(value):
+    return (value or 'unknown').replace('/', '_')
+
+
+def partition_prefix(log_group, timestamp_ms):
+    """Partition for one log event; events without a timestamp go to the current hour."""
+    if timestamp_ms is None:
+        moment = datetime.now(timezone.utc)
+    else:
+        moment = datetime.fromtimestamp(timestamp_ms / 1000, timezone.utc)
+    return f"log_group={partition_value(log_group)}/dt={moment:%Y-%m-%d}/hour={moment:%H}"
+
+
+def new_object_key(prefix, extension):
+    return f"{prefix}/{uuid.uuid4().hex}.{extension}"
+
+
+def index_key(object_key):
+    prefix, name = object_key.rsplit('/', 1)
+    return f"{prefix}/{INDEX_DIR}/{name.split('.', 1)[0]}.json"
+
+
+class ObjectIndex:
+    """Summary of the log events written to one archive object."""
+
+    def __init__(self, log_group):
+        self.log_group = log_group
+        self.log_streams = set()
+        self.min_timestamp = None
+        self.max_timestamp = None
+        self.event_count = 0
+        self.request_ids = set()
+        self.user_ids = set()
+        self.truncated = False
+
+    def observe(self, log_stream, log_event):
+        self.event_count += 1
+        if log_stream:
+            self.log_streams.add(log_stream)
+        timestamp = log_event.get('timestamp')
+        if timestamp is not None:
+            if self.min_timestamp is None or timestamp < self.min_timestamp:
+                self.min_timestamp = timestamp
+            if self.max_timestamp is None or timestamp > self.max_timestamp:
+                self.max_timestamp = timestamp
+        message = log_event.get('message') or ''
+        self._add(self.request_ids, UUID_RE.findall(message))
+        self._add(self.user_ids, USER_ID_RE.findall(message))
+
+    def _add(self, target, values):
+        for value in values:
+            if len(target) >= MAX_INDEX_IDS:
+                self.truncated = True
+                return
+            target.add(value)
+
+    def as_dict(self, object_key, archive_format, size):
+        return {
+            "key": object_key,
+            "format": archive_format,
+            "bytes": size,
+            "logGroup": self.log_group,
+            "logStreams": sorted(self.log_streams),
+            "minTimestamp": self.min_timestamp,
+            "maxTimestamp": self.max_timestamp,
+            "eventCount": self.event_count,
+            "requestIds": sorted(self.request_ids),
+            "userIds": sorted(self.user_ids),
+            "idsTruncated": self.truncated
+        }
+
+
+def write_index(s3, bucket, entry):
+    s3.put_object(
+        Bucket=bucket,
+        Key=index_key(entry['key']),
+        Body=json.dumps(entry, separators=(',', ':')).encode('utf-8'),
+        ContentType='application/json'
+    )
+
+
+class _PartitionObject:
+    def __init__(self, s3, bucket, key, log_group, compression_level):
+        self.key = key
+        self.index = ObjectIndex(log_group)
+        self.uploader = MultipartUploader(s3, bucket, key, 'application/x-ndjson',
+                                          extra_args={'ContentEncoding': 'gzip'})
+        self.compressor = zlib.compressobj(compression_level, zlib.DEFLATED, 31)
+        self.block = []
+        self.block_size = 0
+
+    def flush(self):
+        if self.block:
+            self.uploader.write(self.compressor.compress(''.join(self.block).encode('utf-8')))
+            self.block, self.block_size = [], 0
+
+
+class NDJSONArchiveWriter:
+    """
+    Route log events into one gzipped NDJSON object per partition.
+
+    Each partition's object streams through its own MultipartUploader, so
+    memory is bounded by the number of partitions touched (usually one or
+    two hours of one log group), not by the number of events.
+
+    close() finishes the partitions one at a time. If it fails part way,
+    abort() deletes the objects and sidecars it had already completed as
+    well as aborting the open uploads, so a retry does not archive those
+    events twice.
+    """
+
+    def __init__(self, s3, bucket, compression_level=6, block_bytes=256 * 1024):
+        self.s3 = s3
+        self.bucket = bucket
+        self.compression_level = compression_level
+        self.block_bytes = block_bytes
+        self._objects = {}
+        self._completed = []
+
+    def add(self, log_group, log_stream, log_event):
+        prefix = partition_prefix(log_group, log_event.get('timestamp'))
+        target = self._objects.get(prefix)
+        if target is None:
+            target = _PartitionObject(self.s3, self.bucket, new_object_key(prefix, 'ndjson.gz'),
+                                      log_group, self.compression_level)
+            self._objects[prefix] = target
+
+        line = json.dumps({
+            "logGroup": log_group,
+            "logStream": log_stream,
+            "id": log_event.get('id'),
+            "timestamp": log_event.get('timestamp'),
+            "message": log_event.get('message')
+        }, separators=(',', ':')) + '\n'
+        target.index.observe(log_stream, log_event)
+        target.block.append(line)
+        target.block_size += len(line)
+        if target.block_size >= self.block_bytes:
+            target.flush()
+
+    def close(self):
+        """Finish every object, write its sidecar and return the index entries."""
+        entries = []
+        while self._objects:
+            prefix, target = next(iter(self._objects.items()))
+            target.flush()
+            target.uploader.write(target.compressor.flush())
+            target.uploader.close()
+            del self._objects[prefix]
+            self._completed.append(target.key)
+            entry = target.index.as_dict(target.key, 'ndjson-gzip', target.uploader.bytes_written)
+            write_index(self.s3, self.bucket, entry)
+            self._completed.append(index_key(target.key))
+            entries.append(entry)
+        self._completed = []
+        return entries
+
+    def abort(self):
+        for target in self._objects.values():
+            target.uploader.abort()
+        self._objects = {}
+        if self._completed:
+            response = self.s3.delete_objects(Bucket=self.bucket, Delete={
+                'Objects': [{'Key': key} for key in self._completed], 'Quiet': True})
+            for error in response.get('Errors', []):
+                logger.error("Could not delete s3://%s/%s: %s", self.bucket, error.get('Key'),
+                             error.get('Message'))
+            self._completed = []
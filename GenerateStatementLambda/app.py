@@ -0,0 +1,230 @@
+import os
+import io
+import csv
+import json
+from datetime import date, datetime
+
+from banking_common import (
+    MultipartUploader,
+    get_logger,
+    instrumented,
+    is_warmup,
+    json_response,
+    lazy_client,
+    register_snapshot_priming,
+    start_invocation,
+    warm_up,
+)
+from ledger import TransactionRow, decode_columns, execute, ping, query
+from ledger.sql import STATEMENT_OPENING_BALANCE_SQL, statement_page_sql
+
+from pdf_writer import StreamingPDFWriter
+
+# Setup logging
+logger = get_logger()
+
+s3 = lazy_client('s3', signature_version='s3v4')
+register_snapshot_priming(s3)
+
+BUCKET_NAME = os.environ.get('BUCKET_NAME', 'securestoragebankingdocumentsfinal')
+
+URL_EXPIRY_SECONDS = 300
+PAGE_SIZE = int(os.environ.get('STATEMENT_PAGE_SIZE', '1000'))
+
+CONTENT_TYPES = {
+    'csv': 'text/csv',
+    'pdf': 'application/pdf'
+}
+
+CSV_COLUMNS = ['date', 'transaction_id', 'type', 'description', 'amount', 'balance']
+
+
+def _warm_bucket():
+    # MaxKeys=0 lists nothing; the call only opens the connection
+    s3.list_objects_v2(Bucket=BUCKET_NAME, Prefix='statements/', MaxKeys=0)
+
+
+@instrumented
+def lambda_handler(event, context):
+    start_invocation(context)
+    if is_warmup(event):
+        return warm_up(database=ping, bucket=_warm_bucket)
+
+    try:
+        logger.debug("START: Lambda handler invoked")
+
+        # ✅ Extract identity
+        claims = event.get("requestContext", {}).get("authorizer", {}).get("claims", {})
+        email = claims.get("email")
+        if not email or '@' not in email or '/' in email:
+            return _response(403, {"error": "Unauthorized - email not found or invalid"})
+
+        user_id = email.split('@')[0]
+        logger.info("Authenticated", extra={"user_id": user_id})
+
+        # ✅ Validate the requested month and format
+        try:
+            data = json.loads(event.get('body') or '{}')
+        except json.JSONDecodeError:
+            return _response(400, {"error": "Invalid JSON body"})
+        try:
+            month, fmt = _parse_request(data if isinstance(data, dict) else {})
+        except ValueError as e:
+            return _response(400, {"error": str(e)})
+
+        object_key = f"statements/{email}/{month:%Y-%m}/statement.{fmt}"
+
+        # ✅ Reuse a statement generated earlier; closed months never change
+        generated = False
+        row_count = None
+        if not _object_exists(object_key):
+            row_count = _generate(user_id, email, month, fmt, object_key)
+            generated = True
+            logger.info("Generated %s with %d transactions", object_key, row_count)
+        else:
+            logger.info("Reusing existing %s", object_key)
+
+        presigned_url = s3.generate_presigned_url(
+            'get_object',
+            Params={'Bucket': BUCKET_NAME, 'Key': object_key},
+            ExpiresIn=URL_EXPIRY_SECONDS
+        )
+
+        return json_response(event, 200, {
+            "url": presigned_url,
+            "expiresIn": URL_EXPIRY_SECONDS,
+            "key": object_key.split('/', 2)[2],
+            "generated": generated,
+            "transactions": row_count
+        }, _headers())
+
+    except Exception as e:
+        logger.exception("Error occurred")
+        return _response(500, {"error": "Internal error", "details": str(e)})
+
+
+def _parse_request(data):
+    """Return (first day of the month, format). Only months that have ended can be generated."""
+    try:
+        month = datetime.strptime(str(data.get('month', '')), '%Y-%m').date()
+    except ValueError:
+        raise ValueError("month must be in YYYY-MM format")
+    if month >= datetime.utcnow().date().replace(day=1):
+        raise ValueError("Statements are available once the month has ended")
+
+    fmt = str(data.get('format', 'pdf')).lower()
+    if fmt not in CONTENT_TYPES:
+        raise ValueError(f"format must be one of: {', '.join(CONTENT_TYPES)}")
+    return month, fmt
+
+
+def _next_month(month):
+    return date(month.year + month.month // 12, month.month % 12 + 1, 1)
+
+
+def _object_exists(object_key):
+    # A one-key listing rather than head_object: it works under the prefix-scoped
+    # ListBucket grant, where a HEAD on a missing key would come back 403
+    response = s3.list_objects_v2(Bucket=BUCKET_NAME, Prefix=object_key, MaxKeys=1)
+    return any(obj['Key'] == object_key for obj in response.get('Contents', []))
+
+
+def _statement_rows(user_id, month):
+    """
+    Yield (row, balance after it) for the month, oldest first, one keyset page
+    of PAGE_SIZE rows at a time so memory does not grow with the month.
+    """
+    since = datetime.combine(month, datetime.min.time())
+    until = datetime.combine(_next_month(month), datetime.min.time())
+
+    columns = decode_columns(
+        execute(STATEMENT_OPENING_BALANCE_SQL, {'uid': user_id, 'since': since}),
+        exact_numeric=True
+    )
+    balance = columns['opening_balance'][0]
+    yield None, balance
+
+    params = {'uid': user_id, 'since': since, 'until': until, 'limit': PAGE_SIZE}
+    sql = statement_page_sql()
+    while True:
+        rows = query(sql, TransactionRow, params, exact_numeric=True)
+        for row in rows:
+            balance += row.amount
+            yield row, balance
+        if len(rows) < PAGE_SIZE:
+            return
+        params['cursor_ts'] = datetime.fromisoformat(rows[-1].timestamp)
+        params['cursor_id'] = rows[-1].transaction_id
+        sql = statement_page_sql(after_cursor=True)
+
+
+def _generate(user_id, email, month, fmt, object_key):
+    """Render the statement straight into a multipart upload. Returns the transaction count."""
+    rows = _statement_rows(user_id, month)
+    _, opening_balance = next(rows)
+
+    with MultipartUploader(s3, BUCKET_NAME, object_key, CONTENT_TYPES[fmt]) as out:
+        if fmt == 'csv':
+            return _render_csv(out, rows)
+        return _render_pdf(out, rows, email, month, opening_balance)
+
+
+def _render_csv(out, rows):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(CSV_COLUMNS)
+    count = 0
+    for row, balance in rows:
+        writer.writerow([
+            row.timestamp, row.transaction_id, row.type, row.description,
+            f"{row.amount:.2f}", f"{balance:.2f}"
+        ])
+        count += 1
+        if buffer.tell() >= 64 * 1024:
+            out.write(buffer.getvalue())
+            buffer.seek(0)
+            buffer.truncate()
+    out.write(buffer.getvalue())
+    return count
+
+
+def _render_pdf(out, rows, email, month, opening_balance):
+    columns = f"{'Date (UTC)':<19}  {'Type':<10}  {'Description':<32}  {'Amount':>12}  {'Balance':>12}"
+    pdf = StreamingPDFWriter(out, title=f"Statement {month:%Y-%m}", page_header=columns)
+    pdf.heading(f"Account statement for {email}")
+    pdf.heading(f"{month:%B %Y}")
+    pdf.heading(f"Opening balance: {opening_balance:,.2f}")
+    pdf.line("")
+
+    count = 0
+    balance = opening_balance
+    for row, balance in rows:
+        pdf.line(
+            f"{row.timestamp[:19]:<19}  {row.type:<10}  {(row.description or '')[:32]:<32}  "
+            f"{row.amount:>12,.2f}  {balance:>12,.2f}"
+        )
+        count += 1
+
+    pdf.line("")
+    pdf.heading(f"Closing balance: {balance:,.2f}")
+    pdf.heading(f"{count} transactions")
+    pdf.close()
+    return count
+
+
+def _headers():
+    return {
+        "Content-Type": "application/json",
+        "Access-Control-Allow-Origin": "*",
+        "Access-Control-Allow-Headers": "Content-Type,Authorization",
+        "Access-Control-Allow-Methods": "OPTIONS,POST",
+        "Access-Control-Allow-Credentials": "true"
+    }
+
+
+def _response(status_code, body):
+    return {
+        "statusCode": status_code,
+        "body": json.dumps(body),
+        "headers": _headers()
+    }
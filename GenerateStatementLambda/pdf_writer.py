@@ -0,0 +1,123 @@
+"""
+Minimal streaming PDF writer for tabular statements.
+
+Each page is written to the output as soon as it is full; only the byte
+offset of every object is kept so the cross-reference table can be written
+at the end. The page tree object is given its number up front and written
+last, once all the page objects are known. Text uses the standard Helvetica
+and Courier fonts, so nothing is embedded.
+"""
+
+PAGE_WIDTH = 612   # US Letter, in points
+PAGE_HEIGHT = 792
+MARGIN = 50
+FONT_SIZE = 9
+LEADING = 12
+
+
+def _escape(text):
+    raw = str(text).encode('latin-1', 'replace').decode('latin-1')
+    return raw.replace('\\', '\\\\').replace('(', '\\(').replace(')', '\\)')
+
+
+class StreamingPDFWriter:
+    """
+    Write lines of text into a PDF on `out` (any object with write(bytes)).
+
+        pdf = StreamingPDFWriter(out, title="Statement")
+        pdf.heading("March 2025")
+        pdf.line("2025-03-01  deposit  100.00")
+        pdf.close()
+    """
+
+    CATALOG, PAGES, FONT, MONO_FONT = 1, 2, 3, 4
+
+    def __init__(self, out, title='', page_header=None):
+        self.out = out
+        self.title = title
+        self.page_header = page_header
+        self._position = 0
+        self._offsets = {}
+        self._next_object = 5
+        self._page_objects = []
+        self._lines = []
+        self._lines_per_page = (PAGE_HEIGHT - 2 * MARGIN) // LEADING
+
+        self._write(b"%PDF-1.4\n%\xe2\xe3\xcf\xd3\n")
+        self._object(self.CATALOG, f"<< /Type /Catalog /Pages {self.PAGES} 0 R >>")
+        self._object(self.FONT, "<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica "
+                                "/Encoding /WinAnsiEncoding >>")
+        self._object(self.MONO_FONT, "<< /Type /Font /Subtype /Type1 /BaseFont /Courier "
+                                     "/Encoding /WinAnsiEncoding >>")
+        self._start_page()
+
+    def _write(self, data):
+        self.out.write(data)
+        self._position += len(data)
+
+    def _object(self, number, body):
+        self._offsets[number] = self._position
+        if isinstance(body, str):
+            body = body.encode('latin-1')
+        self._write(f"{number} 0 obj\n".encode() + body + b"\nendobj\n")
+
+    def _allocate(self):
+        number = self._next_object
+        self._next_object += 1
+        return number
+
+    def _start_page(self):
+        self._lines = []
+        if self.page_header:
+            self._lines.append(('F2', self.page_header))
+            self._lines.append(('F2', ''))
+
+    def heading(self, text):
+        self._add('F1', text)
+
+    def line(self, text):
+        self._add('F2', text)
+
+    def _add(self, font, text):
+        if len(self._lines) >= self._lines_per_page:
+            self._flush_page()
+        self._lines.append((font, text))
+
+    def _flush_page(self):
+        commands = [f"BT\n{LEADING} TL\n{MARGIN} {PAGE_HEIGHT - MARGIN} Td"]
+        current_font = None
+        for font, text in self._lines:
+            if font != current_font:
+                commands.append(f"/{font} {FONT_SIZE} Tf")
+                current_font = font
+            commands.append(f"({_escape(text)}) '")
+        commands.append("ET")
+        stream = "\n".join(commands).encode('latin-1')
+
+        content = self._allocate()
+        self._object(content, f"<< /Length {len(stream)} >>\nstream\n".encode() + stream + b"\nendstream")
+        page = self._allocate()
+        self._object(page, (
+            f"<< /Type /Page /Parent {self.PAGES} 0 R /MediaBox [0 0 {PAGE_WIDTH} {PAGE_HEIGHT}] "
+            f"/Resources << /Font << /F1 {self.FONT} 0 R /F2 {self.MONO_FONT} 0 R >> >> "
+            f"/Contents {content} 0 R >>"
+        ))
+        self._page_objects.append(page)
+        self._start_page()
+
+    def close(self):
+        """Write the last page, the page tree, the xref table and the trailer."""
+        self._flush_page()
+        kids = " ".join(f"{page} 0 R" for page in self._page_objects)
+        self._object(self.PAGES, f"<< /Type /Pages /Kids [{kids}] /Count {len(self._page_objects)} >>")
+
+        info = self._allocate()
+        self._object(info, f"<< /Title ({_escape(self.title)}) /Producer (SecureBanking) >>")
+
+        xref_offset = self._position
+        lines = [f"xref\n0 {self._next_object}\n", "0000000000 65535 f \n"]
+        for number in range(1, self._next_object):
+            lines.append(f"{self._offsets[number]:010d} 00000 n \n")
+        lines.append(f"trailer\n<< /Size {self._next_object} /Root {self.CATALOG} 0 R /Info {info} 0 R >>\n")
+        lines.append(f"startxref\n{xref_offset}\n%%EOF\n")
+        self._write("".join(lines).encode('latin-1'))
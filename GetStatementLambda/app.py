@@ -1,18 +1,52 @@
 import os
 import json
-import boto3
-import logging
-from botocore.client import Config
+import time
+from datetime import datetime
 from botocore.exceptions import ClientError
 
+from banking_common import (
+    TTLCache,
+    emit_counts,
+    get_logger,
+    instrumented,
+    is_warmup,
+    json_response,
+    lazy_client,
+    register_snapshot_priming,
+    shared_session,
+    start_invocation,
+    warm_up,
+)
+
 # Setup logging
-logger = logging.getLogger()
-logger.setLevel(logging.INFO)
+logger = get_logger()
 
-s3 = boto3.client('s3', config=Config(signature_version='s3v4'))
+s3 = lazy_client('s3', signature_version='s3v4')
+register_snapshot_priming(s3)
 
 BUCKET_NAME = os.environ.get('BUCKET_NAME', 'securestoragebankingdocumentsfinal')
 
+URL_EXPIRY_SECONDS = 300
+MAX_LIST_KEYS = 1000  # list_objects_v2 page limit
+
+# Warm-container caches. A pre-signed URL is handed out again until it, or
+# the credentials that signed it, has less than PRESIGNED_URL_MIN_REMAINING
+# seconds left; existence checks are kept briefly, misses for less time than
+# hits.
+PRESIGNED_URL_MIN_REMAINING = int(os.environ.get('PRESIGNED_URL_MIN_REMAINING', '60'))
+# Assumed lifetime of session credentials that do not report an expiry, such
+# as the role credentials Lambda passes in environment variables
+SIGNING_TOKEN_LIFETIME = int(os.environ.get('SIGNING_TOKEN_LIFETIME', '3600'))
+PRESIGNED_URL_CACHE_SIZE = int(os.environ.get('PRESIGNED_URL_CACHE_SIZE', '2048'))
+HEAD_CACHE_TTL = int(os.environ.get('HEAD_CACHE_TTL', '60'))
+HEAD_NEGATIVE_CACHE_TTL = int(os.environ.get('HEAD_NEGATIVE_CACHE_TTL', '10'))
+HEAD_CACHE_SIZE = int(os.environ.get('HEAD_CACHE_SIZE', '1024'))
+
+url_cache = TTLCache(PRESIGNED_URL_CACHE_SIZE, max(URL_EXPIRY_SECONDS - PRESIGNED_URL_MIN_REMAINING, 0))
+head_cache = TTLCache(HEAD_CACHE_SIZE, HEAD_CACHE_TTL)
+signing_identity = None
+signing_identity_since = None
+
 # Common CORS headers
 CORS_HEADERS = {
     "Content-Type": "application/json",
@@ -20,12 +54,22 @@ CORS_HEADERS = {
     "Access-Control-Allow-Credentials": "true"
 }
 
+def _warm_bucket():
+    # MaxKeys=0 lists nothing; the call only opens the connection
+    s3.list_objects_v2(Bucket=BUCKET_NAME, Prefix='statements/', MaxKeys=0)
+
+
+@instrumented
 def lambda_handler(event, context):
+    start_invocation(context)
+    if is_warmup(event):
+        return warm_up(bucket=_warm_bucket)
+
     try:
-        logger.info(f"FULL EVENT: {json.dumps(event)}")
+        # Only sampled invocations log DEBUG; claims and emails are redacted
+        logger.debug("Request received", extra={"event": event})
 
         claims = event.get('requestContext', {}).get('authorizer', {}).get('claims', {})
-        logger.info(f"Extracted claims: {json.dumps(claims)}")
 
         user_email = claims.get('email')
         if not user_email:
@@ -36,36 +80,31 @@ def lambda_handler(event, context):
                 "headers": CORS_HEADERS
             }
 
+        if _path(event).rstrip('/').endswith('/statements'):
+            return _list_statements(event, user_email)
+
         object_key = f"statements/{user_email}/535-FinalExampleBankStatement.pdf"
-        logger.info(f"Constructed object key: {object_key}")
+        logger.debug("Constructed object key %s", object_key)
 
-        try:
-            s3.head_object(Bucket=BUCKET_NAME, Key=object_key)
-            logger.info("Confirmed object exists in S3.")
-        except ClientError as e:
-            if e.response['Error']['Code'] == '404':
-                logger.warning("Object not found.")
-                return {
-                    "statusCode": 404,
-                    "body": json.dumps({"error": "Requested file does not exist."}),
-                    "headers": CORS_HEADERS
-                }
-            else:
-                logger.error("Error checking object", exc_info=True)
-                raise
-
-        presigned_url = s3.generate_presigned_url(
-            'get_object',
-            Params={'Bucket': BUCKET_NAME, 'Key': object_key},
-            ExpiresIn=300
-        )
-        logger.info("Generated pre-signed URL.")
+        if not _object_exists(object_key):
+            logger.warning("Object not found.")
+            return {
+                "statusCode": 404,
+                "body": json.dumps({"error": "Requested file does not exist."}),
+                "headers": CORS_HEADERS
+            }
+
+        presigned_url, expires_in, cache_hit = _presigned_url(object_key)
+        logger.info("Pre-signed URL valid for another %ds", expires_in, extra={"cached": cache_hit})
+        emit_counts({"PresignedUrlCacheHit": int(cache_hit), "PresignedUrlCacheMiss": int(not cache_hit)})
 
         return {
             "statusCode": 200,
             "body": json.dumps({
                 "url": presigned_url,
-                "instructions": "Paste this URL into a browser or curl to download the file. It will expire in 5 minutes."
+                "expiresIn": expires_in,
+                "instructions": "Paste this URL into a browser or curl to download the file. "
+                                f"It will expire in {_duration(expires_in)}."
             }),
             "headers": CORS_HEADERS
         }
@@ -77,3 +116,180 @@ def lambda_handler(event, context):
             "body": json.dumps({"error": str(e)}),
             "headers": CORS_HEADERS
         }
+
+
+def _path(event):
+    # HTTP API (payload v2) sends rawPath, REST-style events send path
+    return event.get('rawPath') or event.get('path') or ''
+
+
+def _duration(seconds):
+    if seconds >= 120:
+        return f"{seconds // 60} minutes"
+    return f"{seconds} second{'' if seconds == 1 else 's'}"
+
+
+def _signing_credentials():
+    """
+    Return (access key, expiry as epoch seconds or None) for the credentials
+    the client signs with. A URL stops working when they expire, whatever
+    its own ExpiresIn says.
+
+    Refreshable credentials (assumed roles, container or instance metadata)
+    report their expiry. Session credentials that do not, like the role
+    credentials Lambda puts in the environment, are given
+    SIGNING_TOKEN_LIFETIME from when this container first signed with them.
+    Long-term keys never expire.
+    """
+    global signing_identity, signing_identity_since
+    credentials = shared_session().get_credentials()
+    if credentials is None:
+        return None, None
+    # Refreshes the credentials first if they are close to expiring
+    frozen = credentials.get_frozen_credentials()
+    if frozen.access_key != signing_identity:
+        if signing_identity is not None:
+            logger.info("Signing credentials rotated; dropping cached URLs")
+        url_cache.clear()
+        signing_identity = frozen.access_key
+        signing_identity_since = time.time()
+
+    expiry = getattr(credentials, '_expiry_time', None)
+    if expiry is not None:
+        return frozen.access_key, expiry.timestamp()
+    if frozen.token:
+        return frozen.access_key, signing_identity_since + SIGNING_TOKEN_LIFETIME
+    return frozen.access_key, None
+
+
+def _presigned_url(object_key):
+    """
+    Return (url, seconds until it expires, cache hit), reusing a cached URL
+    while it has at least PRESIGNED_URL_MIN_REMAINING seconds left. A URL
+    lasts until URL_EXPIRY_SECONDS after signing or until the signing
+    credentials expire, whichever comes first, and is cached for no longer.
+    """
+    identity, credentials_expire_at = _signing_credentials()
+
+    cache_key = (BUCKET_NAME, object_key, identity)
+    cached = url_cache.get(cache_key)
+    if cached is not None:
+        url, expires_at = cached
+        return url, int(expires_at - time.time()), True
+
+    signed_at = time.time()
+    url = s3.generate_presigned_url(
+        'get_object',
+        Params={'Bucket': BUCKET_NAME, 'Key': object_key},
+        ExpiresIn=URL_EXPIRY_SECONDS
+    )
+    expires_at = signed_at + URL_EXPIRY_SECONDS
+    if credentials_expire_at is not None and credentials_expire_at <= signed_at:
+        # Past the assumed lifetime: the real expiry is unknown, so sign every time
+        return url, URL_EXPIRY_SECONDS, False
+    if credentials_expire_at is not None:
+        expires_at = min(expires_at, credentials_expire_at)
+    ttl = expires_at - signed_at - PRESIGNED_URL_MIN_REMAINING
+    if ttl > 0:
+        url_cache.put(cache_key, (url, expires_at), ttl)
+    return url, int(expires_at - signed_at), False
+
+
+def _object_exists(object_key):
+    """One-key existence check with short-lived positive and negative caching."""
+    cache_key = (BUCKET_NAME, object_key)
+    exists = head_cache.get(cache_key)
+    if exists is not None:
+        return exists
+
+    # A one-key listing rather than head_object: it works under the prefix-scoped
+    # ListBucket grant, where a HEAD on a missing key would come back 403
+    response = s3.list_objects_v2(Bucket=BUCKET_NAME, Prefix=object_key, MaxKeys=1)
+    exists = any(obj['Key'] == object_key for obj in response.get('Contents', []))
+
+    head_cache.put(cache_key, exists, None if exists else HEAD_NEGATIVE_CACHE_TTL)
+    return exists
+
+
+def _list_statements(event, user_email):
+    """
+    GET /statements: one page of the caller's statements, each with a
+    pre-signed download URL.
+
+    Statements are stored as statements/{email}/{YYYY-MM}..., so `month`
+    narrows the listing with a key prefix. Size and last-modified come from
+    the listing and URLs are signed locally, so a page of up to 1000
+    statements costs a single S3 request.
+    """
+    if '/' in user_email:
+        return {
+            "statusCode": 400,
+            "body": json.dumps({"error": "Invalid email claim."}),
+            "headers": CORS_HEADERS
+        }
+
+    params = event.get('queryStringParameters') or {}
+    prefix = f"statements/{user_email}/"
+
+    month = params.get('month')
+    if month:
+        try:
+            datetime.strptime(month, '%Y-%m')
+        except ValueError:
+            return {
+                "statusCode": 400,
+                "body": json.dumps({"error": "month must be in YYYY-MM format"}),
+                "headers": CORS_HEADERS
+            }
+        prefix += month
+
+    try:
+        limit = int(params.get('limit') or MAX_LIST_KEYS)
+    except ValueError:
+        limit = 0
+    if not 1 <= limit <= MAX_LIST_KEYS:
+        return {
+            "statusCode": 400,
+            "body": json.dumps({"error": f"limit must be between 1 and {MAX_LIST_KEYS}"}),
+            "headers": CORS_HEADERS
+        }
+
+    list_args = {'Bucket': BUCKET_NAME, 'Prefix': prefix, 'MaxKeys': limit}
+    if params.get('cursor'):
+        list_args['ContinuationToken'] = params['cursor']
+
+    try:
+        page = s3.list_objects_v2(**list_args)
+    except ClientError as e:
+        if e.response['Error']['Code'] == 'InvalidArgument' and 'ContinuationToken' in list_args:
+            return {
+                "statusCode": 400,
+                "body": json.dumps({"error": "Invalid cursor"}),
+                "headers": CORS_HEADERS
+            }
+        raise
+
+    base = f"statements/{user_email}/"
+    statements = []
+    hits = 0
+    for obj in page.get('Contents', []):
+        key = obj['Key']
+        if key.endswith('/'):
+            continue
+        url, expires_in, cache_hit = _presigned_url(key)
+        hits += cache_hit
+        statements.append({
+            "key": key[len(base):],
+            "size": obj['Size'],
+            "lastModified": obj['LastModified'].isoformat(),
+            "url": url,
+            "expiresIn": expires_in
+        })
+
+    logger.info("Listed %d statements, %d URLs from cache", len(statements), hits)
+    emit_counts({"PresignedUrlCacheHit": hits, "PresignedUrlCacheMiss": len(statements) - hits})
+
+    return json_response(event, 200, {
+        "statements": statements,
+        "next_cursor": page.get('NextContinuationToken') if page.get('IsTruncated') else None
+    }, CORS_HEADERS)
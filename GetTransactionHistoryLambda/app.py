@@ -1,26 +1,40 @@
 import os
 import json
-import boto3
-import logging
-from datetime import datetime
-from zoneinfo import ZoneInfo
+import zlib
+import base64
+from datetime import datetime, timedelta, timezone
+
+from banking_common import (
+    NDJSON_CONTENT_TYPE,
+    decimal_default,
+    get_logger,
+    header,
+    instrumented,
+    is_warmup,
+    json_response,
+    ndjson_response,
+    start_invocation,
+    warm_up,
+)
+from ledger import decode_columns, execute, ping, transaction_dicts
+from ledger.sql import ACCOUNT_VERSION_SQL, transaction_history_sql
+from ledger.timezones import get_zone, localize_timestamps
 
 # Setup logging
-logger = logging.getLogger()
-logger.setLevel(logging.INFO)
+logger = get_logger()
 
-DB_CLUSTER_ARN = os.environ['DB_CLUSTER_ARN']
-DB_SECRET_ARN = os.environ['DB_SECRET_ARN']
-DB_NAME = os.environ.get('DB_NAME', 'SecureBankingCoreLedgerFinal')
-
-rds_client = boto3.client('rds-data')
-
-def get_value(cell):
-    return next(iter(cell.values()), None)
+DEFAULT_PAGE_SIZE = int(os.environ.get('DEFAULT_PAGE_SIZE', '50'))
+MAX_PAGE_SIZE = int(os.environ.get('MAX_PAGE_SIZE', '500'))
+DEFAULT_DISPLAY_TZ = os.environ.get('DEFAULT_DISPLAY_TZ', 'America/Los_Angeles')
 
+@instrumented
 def lambda_handler(event, context):
+    start_invocation(context)
+    if is_warmup(event):
+        return warm_up(database=ping)
+
     try:
-        logger.info("START: Lambda handler invoked")
+        logger.debug("START: Lambda handler invoked")
 
         # ✅ Extract identity
         claims = event.get("requestContext", {}).get("authorizer", {}).get("claims", {})
@@ -29,70 +43,207 @@ def lambda_handler(event, context):
             return _response(403, {"error": "Unauthorized - email not found or invalid"})
 
         user_id = email.split('@')[0]
-        logger.info(f"Authenticated user_id: {user_id}")
-
-        # ✅ Fetch all transactions
-        sql = """
-            SELECT transaction_id, amount, type, timestamp, description
-            FROM transactions
-            WHERE user_id = :uid
-            ORDER BY timestamp DESC
-        """
-        response = rds_client.execute_statement(
-            secretArn=DB_SECRET_ARN,
-            resourceArn=DB_CLUSTER_ARN,
-            database=DB_NAME,
-            sql=sql,
-            parameters=[
-                {'name': 'uid', 'value': {'stringValue': user_id}}
-            ]
+        logger.info("Authenticated", extra={"user_id": user_id})
+
+        # ✅ Parse paging, date-range and display-zone parameters
+        query_params = event.get('queryStringParameters') or {}
+        try:
+            limit, cursor, since, until = _parse_page_request(query_params)
+            running_balance = _flag(query_params.get('running_balance'))
+            zone = _display_zone(query_params, claims)
+        except ValueError as e:
+            return _response(400, {"error": str(e)})
+
+        # ✅ Answer conditional requests from the account version alone
+        ndjson = NDJSON_CONTENT_TYPE in (header(event, 'Accept') or '')
+        request_key = _request_key(query_params, zone, ndjson)
+        if_none_match = header(event, 'If-None-Match')
+        if if_none_match:
+            version = _account_version(user_id)
+            etag = _etag(version, request_key)
+            if _etag_matches(if_none_match, etag):
+                logger.info("History unchanged, returning 304")
+                return _not_modified(etag)
+
+        # ✅ Fetch one page (plus one row to detect a following page)
+        params = {'uid': user_id, 'limit': limit + 1}
+        if cursor:
+            params['cursor_ts'], params['cursor_id'] = cursor
+        if since:
+            params['since'] = since
+        if until:
+            params['until'] = until
+        sql = transaction_history_sql(
+            after_cursor=bool(cursor),
+            since=bool(since),
+            until=bool(until),
+            running_balance=running_balance
         )
+        # Amounts and balances stay Decimal until they are serialized
+        columns = decode_columns(execute(sql, params), exact_numeric=True)
+        rows = transaction_dicts(columns)
+        if rows:
+            version = columns['account_version'][0]
+        elif not if_none_match:
+            # Empty page: the version column had no row to ride on
+            version = _account_version(user_id)
+        etag = _etag(version, request_key)
+
+        balances = columns.get('running_balance') if running_balance else None
+
+        next_cursor = None
+        if len(rows) > limit:
+            rows = rows[:limit]
+            next_cursor = _encode_cursor(rows[-1])
+
+        # ✅ Convert every timestamp to the display zone in one pass
+        local_timestamps = localize_timestamps([row['timestamp'] for row in rows], zone)
+        items = _result_items(rows, local_timestamps, balances)
+
+        logger.info("Returning %d transactions", len(rows))
+
+        # The body stays a bare array, as before paging; the cursor rides in a header
+        extra = {"ETag": etag}
+        if next_cursor:
+            extra["X-Next-Cursor"] = next_cursor
 
-        records = response.get('records', [])
-        results = []
-
-        for row in records:
-            utc_timestamp = get_value(row[3])
-            la_timestamp = None
-            if utc_timestamp:
-                try:
-                    if isinstance(utc_timestamp, str):
-                        dt_utc = datetime.fromisoformat(utc_timestamp.replace("Z", "+00:00"))
-                    else:
-                        dt_utc = utc_timestamp
-                    dt_la = dt_utc.astimezone(ZoneInfo("America/Los_Angeles"))
-                    la_timestamp = dt_la.isoformat()
-                except Exception as e:
-                    logger.warning(f"Timestamp conversion failed: {e}")
-                    la_timestamp = str(utc_timestamp)
-
-            result_item = {
-                'transaction_id': get_value(row[0]),
-                'amount': float(get_value(row[1])),
-                'type': get_value(row[2]),
-                'timestamp': la_timestamp,
-                'description': get_value(row[4])
-            }
-            results.append(result_item)
-
-        logger.info(f"Returning {len(results)} transactions")
-
-        return _response(200, results)
+        if ndjson:
+            # One JSON object per line, encoded item by item
+            return ndjson_response(event, 200, items, _headers(extra), default=decimal_default)
+
+        return json_response(event, 200, list(items), _headers(extra), default=decimal_default)
 
     except Exception as e:
         logger.exception("Error occurred")
         return _response(500, {"error": "Internal error", "details": str(e)})
 
 
-def _response(status_code, body):
+def _result_items(rows, local_timestamps, balances=None):
+    for index, (item, local_timestamp) in enumerate(zip(rows, local_timestamps)):
+        item['timestamp'] = local_timestamp
+        if balances is not None:
+            item['running_balance'] = balances[index]
+        yield item
+
+
+def _flag(value):
+    return (value or '').lower() in ('1', 'true', 'yes')
+
+
+def _account_version(user_id):
+    versions = decode_columns(execute(ACCOUNT_VERSION_SQL, {'uid': user_id})).get('version')
+    return versions[0] if versions else 0
+
+
+def _request_key(params, zone, ndjson):
+    """Fingerprint of everything besides the data that shapes the response body."""
+    shape = [params.get(name) or '' for name in ('limit', 'cursor', 'from', 'to', 'running_balance')]
+    shape.append(zone.key)
+    shape.append('ndjson' if ndjson else 'json')
+    return zlib.crc32('|'.join(shape).encode())
+
+
+def _etag(version, request_key):
+    return f'W/"{version or 0}-{request_key:08x}"'
+
+
+def _etag_matches(if_none_match, etag):
+    if if_none_match.strip() == '*':
+        return True
+    opaque = etag[2:]
+    return any(tag.strip().removeprefix('W/') == opaque for tag in if_none_match.split(','))
+
+
+def _not_modified(etag):
+    response = _response(304, None, {"ETag": etag})
+    response["body"] = ""
+    return response
+
+
+def _parse_page_request(params):
+    """Return (limit, cursor, since, until) from the query string; raises ValueError."""
+    try:
+        limit = int(params.get('limit') or DEFAULT_PAGE_SIZE)
+    except ValueError:
+        raise ValueError("limit must be an integer")
+    if not 1 <= limit <= MAX_PAGE_SIZE:
+        raise ValueError(f"limit must be between 1 and {MAX_PAGE_SIZE}")
+
+    cursor = _decode_cursor(params['cursor']) if params.get('cursor') else None
+    since = _parse_bound(params.get('from'), 'from')
+    until = _parse_bound(params.get('to'), 'to')
+    return limit, cursor, since, until
+
+
+def _display_zone(params, claims):
+    """
+    Zone for displayed timestamps: the `tz` query parameter, then the user's
+    Cognito `zoneinfo` attribute, then DEFAULT_DISPLAY_TZ.
+    """
+    if params.get('tz'):
+        return get_zone(params['tz'])
+    preferred = claims.get('zoneinfo')
+    if preferred:
+        try:
+            return get_zone(preferred)
+        except ValueError:
+            logger.warning("Ignoring unknown zoneinfo claim: %s", preferred)
+    return get_zone(DEFAULT_DISPLAY_TZ)
+
+
+def _parse_bound(value, name):
+    """Parse a from/to bound as naive UTC. A bare `to` date includes that whole day."""
+    if not value:
+        return None
+    try:
+        bound = datetime.fromisoformat(value.replace("Z", "+00:00"))
+    except ValueError:
+        raise ValueError(f"{name} must be an ISO 8601 date or timestamp")
+    if bound.tzinfo is not None:
+        bound = bound.astimezone(timezone.utc).replace(tzinfo=None)
+    if name == 'to' and len(value) == 10:
+        bound += timedelta(days=1)
+    return bound
+
+
+def _encode_cursor(row):
+    position = [row['timestamp'], row['transaction_id']]
+    raw = json.dumps(position, separators=(',', ':'))
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip('=')
+
+
+def _decode_cursor(token):
+    """
+    Return (timestamp, transaction_id). Cursors issued before running
+    balances were computed server-side carry a third element, the balance
+    anchor; it is ignored rather than trusted.
+    """
+    try:
+        raw = base64.urlsafe_b64decode(token + '=' * (-len(token) % 4))
+        position = json.loads(raw)
+        return datetime.fromisoformat(position[0]), int(position[1])
+    except (ValueError, TypeError, IndexError, KeyError):
+        raise ValueError("Invalid cursor")
+
+
+def _headers(extra_headers=None):
+    headers = {
+        "Content-Type": "application/json",
+        "Cache-Control": "private, no-cache",
+        "Access-Control-Allow-Origin": "*",
+        "Access-Control-Allow-Headers": "Content-Type,Authorization,If-None-Match,Accept-Encoding",
+        "Access-Control-Allow-Methods": "OPTIONS,GET",
+        "Access-Control-Allow-Credentials": "true",
+        "Access-Control-Expose-Headers": "ETag,X-Next-Cursor"
+    }
+    if extra_headers:
+        headers.update(extra_headers)
+    return headers
+
+
+def _response(status_code, body, extra_headers=None):
     return {
         "statusCode": status_code,
         "body": json.dumps(body),
-        "headers": {
-            "Content-Type": "application/json",
-            "Access-Control-Allow-Origin": "*",
-            "Access-Control-Allow-Headers": "Content-Type,Authorization",
-            "Access-Control-Allow-Methods": "OPTIONS,GET",
-            "Access-Control-Allow-Credentials": "true"
-        }
+        "headers": _headers(extra_headers)
     }
@@ -0,0 +1,137 @@
+import os
+import json
+from datetime import date, datetime
+
+from banking_common import get_logger, instrumented, is_warmup, json_response, start_invocation, warm_up
+from ledger import MonthlySummaryRow, ping, query
+from ledger.sql import MONTHLY_ROLLUP_SUMMARY_SQL, MONTHLY_SUMMARY_SQL
+
+# Setup logging
+logger = get_logger()
+
+# 'transactions' aggregates the raw ledger; 'rollup' reads transaction_monthly_rollup
+SUMMARY_SOURCE = os.environ.get('SUMMARY_SOURCE', 'transactions')
+DEFAULT_MONTHS = 12
+MAX_MONTHS = 60
+
+TRANSACTION_TYPES = ('deposit', 'withdrawal', 'transfer')
+
+@instrumented
+def lambda_handler(event, context):
+    start_invocation(context)
+    if is_warmup(event):
+        return warm_up(database=ping)
+
+    try:
+        logger.debug("START: Lambda handler invoked")
+
+        # ✅ Extract identity
+        claims = event.get("requestContext", {}).get("authorizer", {}).get("claims", {})
+        email = claims.get("email")
+        if not email or '@' not in email:
+            return _response(403, {"error": "Unauthorized - email not found or invalid"})
+
+        user_id = email.split('@')[0]
+        logger.info("Authenticated", extra={"user_id": user_id})
+
+        # ✅ Resolve the month window (UTC calendar months)
+        try:
+            first_month, end_month = _month_window(event.get('queryStringParameters') or {})
+        except ValueError as e:
+            return _response(400, {"error": str(e)})
+
+        # ✅ Aggregate in the database
+        if SUMMARY_SOURCE == 'rollup':
+            params = {'uid': user_id, 'since': first_month, 'until': end_month}
+            rows = query(MONTHLY_ROLLUP_SUMMARY_SQL, MonthlySummaryRow, params)
+        else:
+            params = {
+                'uid': user_id,
+                'since': datetime.combine(first_month, datetime.min.time()),
+                'until': datetime.combine(end_month, datetime.min.time())
+            }
+            rows = query(MONTHLY_SUMMARY_SQL, MonthlySummaryRow, params)
+
+        months = {}
+        for row in rows:
+            month = months.setdefault(row.month, {
+                "month": row.month,
+                **{tx_type: {"total": 0.0, "count": 0} for tx_type in TRANSACTION_TYPES}
+            })
+            month[row.type] = {"total": row.total, "count": row.transaction_count}
+
+        logger.info("Returning %d months from %s", len(months), SUMMARY_SOURCE)
+
+        return json_response(event, 200, {
+            "from": first_month.strftime('%Y-%m'),
+            "to": _previous_month(end_month).strftime('%Y-%m'),
+            "months": list(months.values())
+        }, _headers())
+
+    except Exception as e:
+        logger.exception("Error occurred")
+        return _response(500, {"error": "Internal error", "details": str(e)})
+
+
+def _parse_month(value, name):
+    try:
+        return datetime.strptime(value, '%Y-%m').date()
+    except ValueError:
+        raise ValueError(f"{name} must be a month in YYYY-MM format")
+
+
+def _next_month(month):
+    return date(month.year + month.month // 12, month.month % 12 + 1, 1)
+
+
+def _previous_month(month):
+    return date(month.year - (month.month == 1), (month.month - 2) % 12 + 1, 1)
+
+
+def _month_window(params):
+    """
+    Return (first month, first day after the last month). Either `from`/`to`
+    (YYYY-MM, inclusive) or the last `months` months up to the current one.
+    """
+    if params.get('to'):
+        last_month = _parse_month(params['to'], 'to')
+    else:
+        last_month = datetime.utcnow().date().replace(day=1)
+    end_month = _next_month(last_month)
+
+    if params.get('from'):
+        first_month = _parse_month(params['from'], 'from')
+    else:
+        try:
+            count = int(params.get('months') or DEFAULT_MONTHS)
+        except ValueError:
+            raise ValueError("months must be an integer")
+        if not 1 <= count <= MAX_MONTHS:
+            raise ValueError(f"months must be between 1 and {MAX_MONTHS}")
+        first_month = last_month
+        for _ in range(count - 1):
+            first_month = _previous_month(first_month)
+
+    if first_month > last_month:
+        raise ValueError("from must not be after to")
+    if (end_month.year - first_month.year) * 12 + end_month.month - first_month.month > MAX_MONTHS:
+        raise ValueError(f"At most {MAX_MONTHS} months can be summarized at once")
+    return first_month, end_month
+
+
+def _headers():
+    return {
+        "Content-Type": "application/json",
+        "Access-Control-Allow-Origin": "*",
+        "Access-Control-Allow-Headers": "Content-Type,Authorization",
+        "Access-Control-Allow-Methods": "OPTIONS,GET",
+        "Access-Control-Allow-Credentials": "true"
+    }
+
+
+def _response(status_code, body):
+    return {
+        "statusCode": status_code,
+        "body": json.dumps(body),
+        "headers": _headers()
+    }
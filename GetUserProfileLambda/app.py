@@ -1,19 +1,61 @@
 import json
-import boto3
 import os
-import logging
+import time
+import random
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
 from botocore.exceptions import ClientError
 
+from banking_common import (
+    TTLCache,
+    decimal_default,
+    emit_counts,
+    get_logger,
+    instrumented,
+    is_back_office,
+    is_warmup,
+    json_response,
+    lazy_client,
+    lazy_table,
+    register_snapshot_priming,
+    start_invocation,
+    warm_up,
+)
+
 # Set up logging
-logger = logging.getLogger()
-logger.setLevel(logging.INFO)
+logger = get_logger()
 
 # Environment variable for DynamoDB table name
 TABLE_NAME = os.environ.get('PROFILE_TABLE_NAME', 'SecureBankingCustomerProfilesFinal')
 
-# Setup DynamoDB
-dynamodb = boto3.resource('dynamodb')
-table = dynamodb.Table(TABLE_NAME)
+# Setup DynamoDB; both are built on first use
+table = lazy_table(TABLE_NAME)
+
+# Low-level client for batch reads; unlike the resource it is safe to share across threads
+dynamodb_client = lazy_client('dynamodb')
+register_snapshot_priming(table, dynamodb_client)
+
+# POST /profiles/batch (back office only)
+MAX_BATCH_PROFILES = int(os.environ.get('MAX_BATCH_PROFILES', '500'))
+BATCH_GET_CHUNK_SIZE = 100  # BatchGetItem limit
+BATCH_GET_WORKERS = int(os.environ.get('BATCH_GET_WORKERS', '4'))
+BATCH_GET_MAX_ATTEMPTS = 5
+BATCH_GET_BACKOFF_BASE = 0.05
+
+# Incremented by UpdateUserProfileLambda on every write
+VERSION_ATTRIBUTE = 'profileVersion'
+
+# Warm-container profile cache, keyed by Cognito sub. Entries younger than
+# PROFILE_REVALIDATE_AFTER seconds are served as-is; older ones are checked
+# against the stored profileVersion before being reused.
+PROFILE_CACHE_SIZE = int(os.environ.get('PROFILE_CACHE_SIZE', '512'))
+PROFILE_CACHE_TTL = int(os.environ.get('PROFILE_CACHE_TTL', '300'))
+PROFILE_REVALIDATE_AFTER = float(os.environ.get('PROFILE_REVALIDATE_AFTER', '5'))
+
+profile_cache = TTLCache(PROFILE_CACHE_SIZE, PROFILE_CACHE_TTL)
+
+# Per-container totals, logged with every invocation
+cache_stats = {'hit': 0, 'revalidated': 0, 'miss': 0, 'consistent': 0}
 
 # Common CORS headers
 CORS_HEADERS = {
@@ -22,9 +64,15 @@ CORS_HEADERS = {
     "Access-Control-Allow-Credentials": "true"
 }
 
+@instrumented
 def lambda_handler(event, context):
+    start_invocation(context)
+    if is_warmup(event):
+        return warm_up(table=lambda: table.meta.client.describe_table(TableName=TABLE_NAME))
+
     try:
-        logger.info(f"FULL EVENT: {json.dumps(event)}")
+        # Only sampled invocations log DEBUG; claims and emails are redacted
+        logger.debug("Request received", extra={"event": event})
 
         # Extract Cognito user claims
         claims = event.get('requestContext', {}).get('authorizer', {}).get('claims', {})
@@ -38,16 +86,18 @@ def lambda_handler(event, context):
                 "headers": CORS_HEADERS
             }
 
-        logger.info(f"Fetching profile for user_id: {user_id}")
+        if _path(event).rstrip('/').endswith('/profiles/batch'):
+            return _batch_lookup(event, claims)
 
-        response = table.get_item(
-            Key={
-                'UserID': user_id,
-                'recordType': 'UserProfile'
-            }
-        )
+        # ?consistent=true skips the cache, e.g. for the page shown right after an update
+        params = event.get('queryStringParameters') or {}
+        consistent = str(params.get('consistent', '')).lower() == 'true'
+
+        logger.debug("Fetching profile", extra={"user_id": user_id, "consistent": consistent})
+
+        item, outcome = _load_profile(user_id, consistent)
+        _record_cache_outcome(user_id, outcome)
 
-        item = response.get('Item')
         if not item:
             logger.info("Profile not found.")
             return {
@@ -56,12 +106,8 @@ def lambda_handler(event, context):
                 "headers": CORS_HEADERS
             }
 
-        logger.info("Profile retrieved successfully.")
-        return {
-            "statusCode": 200,
-            "body": json.dumps(item),
-            "headers": CORS_HEADERS
-        }
+        logger.debug("Profile retrieved successfully.")
+        return json_response(event, 200, item, CORS_HEADERS, default=decimal_default)
 
     except ClientError as e:
         logger.exception("DynamoDB client error")
@@ -78,3 +124,149 @@ def lambda_handler(event, context):
             "body": json.dumps({"error": "Unexpected error", "details": str(e)}),
             "headers": CORS_HEADERS
         }
+
+
+def _load_profile(user_id, consistent):
+    """
+    Return (item, outcome) where outcome is 'hit', 'revalidated', 'miss' or
+    'consistent'. item is None when the profile does not exist.
+    """
+    key = {'UserID': user_id, 'recordType': 'UserProfile'}
+
+    cached = None if consistent else profile_cache.get(user_id)
+    if cached is not None:
+        item, checked_at = cached
+        if time.monotonic() - checked_at < PROFILE_REVALIDATE_AFTER:
+            return item, 'hit'
+
+        # Project only the key and version; the full item is re-read only if it changed
+        current = table.get_item(
+            Key=key,
+            ProjectionExpression='UserID, #version',
+            ExpressionAttributeNames={'#version': VERSION_ATTRIBUTE}
+        ).get('Item')
+        if current is not None and current.get(VERSION_ATTRIBUTE) == item.get(VERSION_ATTRIBUTE):
+            profile_cache.put(user_id, (item, time.monotonic()))
+            return item, 'revalidated'
+
+    item = table.get_item(Key=key, ConsistentRead=consistent).get('Item')
+    if item:
+        profile_cache.put(user_id, (item, time.monotonic()))
+    else:
+        profile_cache.pop(user_id)
+    return item, 'consistent' if consistent else 'miss'
+
+
+def _record_cache_outcome(user_id, outcome):
+    cache_stats[outcome] += 1
+    # The EMF counts below are the per-request record; the totals only go to sampled DEBUG logs
+    logger.debug("Profile cache %s", outcome, extra={
+        "user_id": user_id, "cache_totals": cache_stats, "cache_entries": len(profile_cache)
+    })
+    emit_counts({
+        "ProfileCacheHit": int(outcome == 'hit'),
+        "ProfileCacheRevalidated": int(outcome == 'revalidated'),
+        "ProfileCacheMiss": int(outcome in ('miss', 'consistent'))
+    })
+
+
+
+def _path(event):
+    # HTTP API (payload v2) sends rawPath, REST-style events send path
+    return event.get('rawPath') or event.get('path') or ''
+
+
+def _batch_lookup(event, claims):
+    """
+    Read many profiles at once for the support console.
+
+    Body: {"userIds": [...], "fields": [...]}; `fields` is optional and limits
+    the attributes returned. IDs are split into BatchGetItem calls of 100
+    keys, run concurrently; keys DynamoDB leaves unprocessed are retried with
+    exponential backoff and reported back if they still fail.
+    """
+    if not is_back_office(claims):
+        return {
+            "statusCode": 403,
+            "body": json.dumps({"error": "Batch profile lookup is restricted to bank staff."}),
+            "headers": CORS_HEADERS
+        }
+
+    try:
+        data = json.loads(event.get('body') or '')
+    except json.JSONDecodeError:
+        data = None
+    user_ids = data.get('userIds') if isinstance(data, dict) else None
+    fields = data.get('fields') if isinstance(data, dict) else None
+    if (not isinstance(user_ids, list) or not user_ids
+            or not all(isinstance(uid, str) and uid for uid in user_ids)):
+        return {
+            "statusCode": 400,
+            "body": json.dumps({"error": "userIds must be a non-empty list of user IDs."}),
+            "headers": CORS_HEADERS
+        }
+    if fields is not None and (not isinstance(fields, list) or not all(isinstance(f, str) and f for f in fields)):
+        return {
+            "statusCode": 400,
+            "body": json.dumps({"error": "fields must be a list of attribute names."}),
+            "headers": CORS_HEADERS
+        }
+
+    user_ids = list(dict.fromkeys(user_ids))
+    if len(user_ids) > MAX_BATCH_PROFILES:
+        return {
+            "statusCode": 400,
+            "body": json.dumps({"error": f"At most {MAX_BATCH_PROFILES} profiles can be requested at once."}),
+            "headers": CORS_HEADERS
+        }
+
+    request = {}
+    if fields:
+        # UserID is always projected so results can be matched to the request
+        names = {f"#f{i}": field for i, field in enumerate(dict.fromkeys(['UserID', *fields]))}
+        request['ProjectionExpression'] = ', '.join(names)
+        request['ExpressionAttributeNames'] = names
+
+    chunks = [user_ids[i:i + BATCH_GET_CHUNK_SIZE] for i in range(0, len(user_ids), BATCH_GET_CHUNK_SIZE)]
+    logger.info("Batch lookup of %d profiles in %d chunks", len(user_ids), len(chunks))
+
+    profiles = {}
+    unprocessed = []
+    with ThreadPoolExecutor(max_workers=min(BATCH_GET_WORKERS, len(chunks))) as pool:
+        for items, leftover in pool.map(lambda chunk: _batch_get_chunk(chunk, request), chunks):
+            for item in items:
+                profiles[item['UserID']] = item
+            unprocessed.extend(leftover)
+
+    missing = [uid for uid in user_ids if uid not in profiles and uid not in unprocessed]
+    logger.info("Batch lookup found %d, missing %d, unprocessed %d", len(profiles), len(missing), len(unprocessed))
+
+    return json_response(event, 207 if unprocessed else 200, {
+        "profiles": profiles,
+        "notFound": missing,
+        "unprocessed": unprocessed
+    }, CORS_HEADERS, default=decimal_default)
+
+
+@lru_cache(maxsize=None)
+def _deserializer():
+    # boto3 is only imported once a batch request needs it
+    from boto3.dynamodb.types import TypeDeserializer
+    return TypeDeserializer()
+
+
+def _batch_get_chunk(user_ids, request):
+    """BatchGetItem one chunk of up to 100 IDs. Returns (items, unprocessed user IDs)."""
+    keys = [{'UserID': {'S': uid}, 'recordType': {'S': 'UserProfile'}} for uid in user_ids]
+    items = []
+    for attempt in range(BATCH_GET_MAX_ATTEMPTS):
+        if attempt:
+            time.sleep(random.uniform(0, BATCH_GET_BACKOFF_BASE * 2 ** attempt))
+        response = dynamodb_client.batch_get_item(RequestItems={TABLE_NAME: {**request, 'Keys': keys}})
+        for raw in response.get('Responses', {}).get(TABLE_NAME, []):
+            items.append({name: _deserializer().deserialize(value) for name, value in raw.items()})
+        keys = response.get('UnprocessedKeys', {}).get(TABLE_NAME, {}).get('Keys', [])
+        if not keys:
+            break
+        logger.warning("%d keys unprocessed on attempt %d", len(keys), attempt + 1)
+    return items, [key['UserID']['S'] for key in keys]
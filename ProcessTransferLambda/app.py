@@ -1,34 +1,80 @@
 import os
 import json
-import boto3
-import logging
+import hashlib
+from decimal import Decimal, InvalidOperation
+
+from banking_common import (
+    TTLCache,
+    emit_counts,
+    get_logger,
+    header,
+    instrumented,
+    is_back_office,
+    is_warmup,
+    start_invocation,
+    warm_up,
+)
+from ledger import (
+    BalanceRow,
+    TransferRow,
+    batch_execute,
+    decode_columns,
+    execute,
+    ping,
+    query,
+    rows_from_columns,
+    transaction,
+)
+from ledger.sql import (
+    BATCH_BALANCE_SQL,
+    BATCH_INSERT_SQL,
+    BATCH_ROLLUP_SQL,
+    IDEMPOTENCY_LOOKUP_SQL,
+    LOCK_BALANCES_SQL,
+    transfer_sql,
+)
 
 # Setup logging
-logger = logging.getLogger()
-logger.setLevel(logging.INFO)
+logger = get_logger()
+
+MAX_BATCH_SIZE = int(os.environ.get('MAX_BATCH_SIZE', '1000'))
+
+# Keep transaction_monthly_rollup current for GetTransactionSummaryLambda
+MAINTAIN_MONTHLY_ROLLUP = os.environ.get('MAINTAIN_MONTHLY_ROLLUP', 'false').lower() == 'true'
+
+TRANSFER_SQL = transfer_sql(rollup=MAINTAIN_MONTHLY_ROLLUP)
+IDEMPOTENT_TRANSFER_SQL = transfer_sql(idempotent=True, rollup=MAINTAIN_MONTHLY_ROLLUP)
 
-# Environment variables
-DB_CLUSTER_ARN = os.environ['DB_CLUSTER_ARN']
-DB_SECRET_ARN = os.environ['DB_SECRET_ARN']
-DB_NAME = os.environ.get('DB_NAME', 'SecureBankingCoreLedgerFinal')
+VALID_TYPES = ('deposit', 'withdrawal', 'transfer')
 
-rds_client = boto3.client('rds-data')
+# transactions.amount is NUMERIC(14, 2)
+CENT = Decimal('0.01')
+MAX_AMOUNT = Decimal(10) ** 12
+
+# Warm-container front cache for Idempotency-Key replays
+IDEMPOTENCY_CACHE_TTL = int(os.environ.get('IDEMPOTENCY_CACHE_TTL', '900'))
+IDEMPOTENCY_CACHE_SIZE = int(os.environ.get('IDEMPOTENCY_CACHE_SIZE', '1024'))
+MAX_IDEMPOTENCY_KEY_LENGTH = 255
 
 # Static CORS headers to include in every return
 CORS_HEADERS = {
     "Content-Type": "application/json",
     "Access-Control-Allow-Origin": "*",
-    "Access-Control-Allow-Headers": "Content-Type,Authorization",
+    "Access-Control-Allow-Headers": "Content-Type,Authorization,Idempotency-Key",
     "Access-Control-Allow-Methods": "OPTIONS,POST",
     "Access-Control-Allow-Credentials": "true"
 }
 
-def get_value(cell):
-    return next(iter(cell.values()), None)
+idempotency_cache = TTLCache(IDEMPOTENCY_CACHE_SIZE, IDEMPOTENCY_CACHE_TTL)
 
+@instrumented
 def lambda_handler(event, context):
+    start_invocation(context)
+    if is_warmup(event):
+        return warm_up(database=ping)
+
     try:
-        logger.info("START: Lambda handler invoked")
+        logger.debug("START: Lambda handler invoked")
 
         claims = event.get("requestContext", {}).get("authorizer", {}).get("claims", {})
         email = claims.get("email")
@@ -40,7 +86,7 @@ def lambda_handler(event, context):
             }
 
         user_id = email.split('@')[0]
-        logger.info(f"Authenticated user_id: {user_id}")
+        logger.info("Authenticated", extra={"user_id": user_id})
 
         body = event.get('body')
         if not body:
@@ -51,42 +97,65 @@ def lambda_handler(event, context):
             }
 
         data = json.loads(body)
-        amount = data.get('amount')
-        description = data.get('description', 'Transfer')
-        tx_type = data.get('type', 'transfer').lower()
+        idempotency_key = header(event, 'Idempotency-Key')
+        if idempotency_key is not None:
+            idempotency_key = idempotency_key.strip()
+        if 'transfers' in data:
+            if idempotency_key is not None:
+                return {
+                    "statusCode": 400,
+                    "body": json.dumps({"error": "Idempotency-Key is not supported for batch transfers"}),
+                    "headers": CORS_HEADERS
+                }
+            return _process_batch(user_id, claims, data['transfers'])
 
-        if amount is None:
+        if idempotency_key is not None and (
+                not idempotency_key or len(idempotency_key) > MAX_IDEMPOTENCY_KEY_LENGTH):
             return {
                 "statusCode": 400,
-                "body": json.dumps({"error": "Missing amount"}),
+                "body": json.dumps({"error": "Invalid Idempotency-Key header"}),
                 "headers": CORS_HEADERS
             }
-        if tx_type not in ('deposit', 'withdrawal', 'transfer'):
+
+        signed_amount, tx_type, description, error = _parse_transfer(data)
+        if error:
             return {
                 "statusCode": 400,
-                "body": json.dumps({"error": "Invalid transaction type"}),
+                "body": json.dumps({"error": error}),
                 "headers": CORS_HEADERS
             }
 
-        signed_amount = float(amount)
-        if tx_type == 'withdrawal':
-            signed_amount *= -1
-
-        # Fetch current balance
-        balance_query = "SELECT balance FROM accounts WHERE user_id = :uid"
-        balance_response = rds_client.execute_statement(
-            secretArn=DB_SECRET_ARN,
-            resourceArn=DB_CLUSTER_ARN,
-            database=DB_NAME,
-            sql=balance_query,
-            parameters=[{'name': 'uid', 'value': {'stringValue': user_id}}]
-        )
-
-        balance_records = balance_response.get('records', [])
-        current_balance = float(get_value(balance_records[0][0])) if balance_records else 0.0
-        logger.info(f"Current balance for {user_id}: {current_balance}")
-
-        if signed_amount < 0 and current_balance + signed_amount < 0:
+        if idempotency_key is not None:
+            request_hash = _request_hash(signed_amount, tx_type, description)
+            replay = _replay(user_id, idempotency_key, request_hash)
+            if replay:
+                return replay
+
+        # Funds check, insert and balance update in a single round trip.
+        # The account row is locked for the duration of the statement, so
+        # concurrent transfers for the same user cannot both pass the check.
+        params = {'uid': user_id, 'amt': signed_amount, 'type': tx_type, 'desc': description}
+        if idempotency_key is not None:
+            params['idem_key'] = idempotency_key
+            params['req_hash'] = request_hash
+        try:
+            tx_rows = query(
+                TRANSFER_SQL if idempotency_key is None else IDEMPOTENT_TRANSFER_SQL,
+                TransferRow,
+                params
+            )
+        except Exception as e:
+            if idempotency_key is None or 'idempotency_keys_pkey' not in str(e):
+                raise
+            # Lost the race against a concurrent request with the same key
+            replay = _replay(user_id, idempotency_key, request_hash)
+            if not replay:
+                raise
+            return replay
+
+        if not tx_rows:
+            # The only way the statement produces no row is a failed funds check
+            logger.info("Insufficient funds", extra={"user_id": user_id})
             return {
                 "statusCode": 400,
                 "body": json.dumps({
@@ -95,101 +164,239 @@ def lambda_handler(event, context):
                 "headers": CORS_HEADERS
             }
 
-        # Insert transaction
-        insert_sql = """
-            INSERT INTO transactions (user_id, amount, type, description)
-            VALUES (:uid, :amt, :type, :desc)
-        """
-        rds_client.execute_statement(
-            secretArn=DB_SECRET_ARN,
-            resourceArn=DB_CLUSTER_ARN,
-            database=DB_NAME,
-            sql=insert_sql,
-            parameters=[
-                {'name': 'uid', 'value': {'stringValue': user_id}},
-                {'name': 'amt', 'value': {'doubleValue': signed_amount}},
-                {'name': 'type', 'value': {'stringValue': tx_type}},
-                {'name': 'desc', 'value': {'stringValue': description}}
-            ]
-        )
-
-        # Update balance
-        upsert_sql = """
-            INSERT INTO accounts (user_id, balance)
-            VALUES (:uid, :amt)
-            ON CONFLICT (user_id)
-            DO UPDATE SET balance = accounts.balance + EXCLUDED.balance
-        """
-        rds_client.execute_statement(
-            secretArn=DB_SECRET_ARN,
-            resourceArn=DB_CLUSTER_ARN,
-            database=DB_NAME,
-            sql=upsert_sql,
-            parameters=[
-                {'name': 'uid', 'value': {'stringValue': user_id}},
-                {'name': 'amt', 'value': {'doubleValue': signed_amount}}
-            ]
-        )
-
-        # Fetch latest transaction
-        tx_query = """
-            SELECT transaction_id, amount, type, timestamp, description
-            FROM transactions
-            WHERE user_id = :uid
-            ORDER BY timestamp DESC
-            LIMIT 1
-        """
-        tx_response = rds_client.execute_statement(
-            secretArn=DB_SECRET_ARN,
-            resourceArn=DB_CLUSTER_ARN,
-            database=DB_NAME,
-            sql=tx_query,
-            parameters=[{'name': 'uid', 'value': {'stringValue': user_id}}]
-        )
-
-        tx_records = tx_response.get('records', [])
-        if not tx_records:
-            return {
-                "statusCode": 500,
-                "body": json.dumps({"error": "Transaction not found after insert"}),
-                "headers": CORS_HEADERS
-            }
+        response = _transfer_response(tx_rows[0])
+        if idempotency_key is not None:
+            idempotency_cache.put((user_id, idempotency_key), (request_hash, response))
+        return response
 
-        tx_row = tx_records[0]
-        transaction = {
-            'transaction_id': get_value(tx_row[0]),
-            'amount': float(get_value(tx_row[1])),
-            'type': get_value(tx_row[2]),
-            'timestamp': get_value(tx_row[3]),
-            'description': get_value(tx_row[4])
+    except Exception as e:
+        logger.exception("Unexpected error")
+        return {
+            "statusCode": 500,
+            "body": json.dumps({"error": "Internal error", "details": str(e)}),
+            "headers": CORS_HEADERS
         }
 
-        # Fetch updated balance
-        updated_balance_response = rds_client.execute_statement(
-            secretArn=DB_SECRET_ARN,
-            resourceArn=DB_CLUSTER_ARN,
-            database=DB_NAME,
-            sql=balance_query,
-            parameters=[{'name': 'uid', 'value': {'stringValue': user_id}}]
-        )
-        updated_balance_records = updated_balance_response.get('records', [])
-        updated_balance = float(get_value(updated_balance_records[0][0])) if updated_balance_records else 0.0
-
-        # Final return with headers
+
+def _transfer_response(row):
+    """Build the success response from a TransferRow."""
+    return {
+        "statusCode": 200,
+        "body": json.dumps({
+            "message": "Transaction recorded and balance updated",
+            "transaction": row.as_dict(),
+            "balance": row.balance
+        }),
+        "headers": CORS_HEADERS
+    }
+
+
+def _request_hash(signed_amount, tx_type, description):
+    """Fingerprint of the transfer a key was first used for; "10" and "10.00" hash alike."""
+    canonical = json.dumps([str(signed_amount), tx_type, description], separators=(',', ':'), default=str)
+    return hashlib.sha256(canonical.encode('utf-8')).hexdigest()
+
+
+def _replay(user_id, idempotency_key, request_hash):
+    """
+    Return the stored response for a key, from the warm cache or the ledger DB,
+    or a 422 if the key was first used for a different transfer.
+    """
+    cache_key = (user_id, idempotency_key)
+    cached = idempotency_cache.get(cache_key)
+    if cached is not None:
+        _record_idempotency_outcome('cache_hit')
+        stored_hash, response = cached
+        return _as_replay(response, stored_hash, request_hash)
+
+    columns = decode_columns(execute(IDEMPOTENCY_LOOKUP_SQL, {'uid': user_id, 'idem_key': idempotency_key}))
+    rows = rows_from_columns(columns, TransferRow)
+    if not rows:
+        _record_idempotency_outcome('miss')
+        return None
+
+    _record_idempotency_outcome('store_hit')
+    stored_hash = columns['request_hash'][0]
+    response = _transfer_response(rows[0])
+    idempotency_cache.put(cache_key, (stored_hash, response))
+    return _as_replay(response, stored_hash, request_hash)
+
+
+def _as_replay(response, stored_hash, request_hash):
+    # Keys recorded before request hashes were stored have none to compare
+    if stored_hash is not None and stored_hash != request_hash:
+        logger.warning("Idempotency-Key reused with a different request")
         return {
-            "statusCode": 200,
-            "body": json.dumps({
-                "message": "Transaction recorded and balance updated",
-                "transaction": transaction,
-                "balance": updated_balance
-            }),
+            "statusCode": 422,
+            "body": json.dumps({"error": "Idempotency-Key was already used for a different transfer"}),
             "headers": CORS_HEADERS
         }
+    logger.info("Replaying stored response for Idempotency-Key")
+    return {**response, "headers": {**response["headers"], "Idempotent-Replayed": "true"}}
 
-    except Exception as e:
-        logger.exception("Unexpected error")
+
+def _record_idempotency_outcome(outcome):
+    """Emit an Embedded Metric Format record counting idempotency cache outcomes."""
+    emit_counts({
+        "IdempotencyCacheHit": int(outcome == 'cache_hit'),
+        "IdempotencyStoreHit": int(outcome == 'store_hit'),
+        "IdempotencyMiss": int(outcome == 'miss')
+    })
+
+
+def _parse_transfer(data):
+    """Validate one transfer payload. Returns (signed_amount, type, description, error)."""
+    if not isinstance(data, dict):
+        return None, None, None, "Transfer must be an object"
+
+    amount = data.get('amount')
+    description = data.get('description', 'Transfer')
+    tx_type = str(data.get('type', 'transfer')).lower()
+
+    if amount is None:
+        return None, None, None, "Missing amount"
+    if tx_type not in VALID_TYPES:
+        return None, None, None, "Invalid transaction type"
+    signed_amount = _parse_amount(amount)
+    if signed_amount is None:
+        return None, None, None, "Invalid amount"
+
+    if tx_type == 'withdrawal':
+        signed_amount = -signed_amount
+    return signed_amount, tx_type, description, None
+
+
+def _parse_amount(amount):
+    """
+    The amount as a Decimal that fits NUMERIC(14, 2), or None. NaN, infinities,
+    more than two decimal places and out-of-range values are rejected here
+    rather than failing (and rolling back) in the database.
+    """
+    if isinstance(amount, bool):
+        return None
+    try:
+        value = Decimal(str(amount))
+        if not value.is_finite():
+            return None
+        cents = value.quantize(CENT)
+    except (InvalidOperation, ValueError):
+        return None
+    if cents != value or abs(cents) >= MAX_AMOUNT:
+        return None
+    return cents
+
+
+def _process_batch(user_id, claims, transfers):
+    """
+    Apply a list of transfers in one database transaction.
+
+    Every item is validated up front and gets its own entry in `results`.
+    Invalid items, items targeting an account the caller may not post to and
+    withdrawals that would overdraw their account (evaluated in request order
+    per account) are rejected individually; all remaining items are committed
+    together. A database error rolls the whole batch back and returns 500.
+    Responds 200 when every item applied, 207 when some were rejected and 400
+    when none were applied.
+    """
+    if not isinstance(transfers, list) or not transfers:
         return {
-            "statusCode": 500,
-            "body": json.dumps({"error": "Internal error", "details": str(e)}),
+            "statusCode": 400,
+            "body": json.dumps({"error": "transfers must be a non-empty list"}),
             "headers": CORS_HEADERS
         }
+    if len(transfers) > MAX_BATCH_SIZE:
+        return {
+            "statusCode": 400,
+            "body": json.dumps({"error": f"Batch exceeds {MAX_BATCH_SIZE} transfers"}),
+            "headers": CORS_HEADERS
+        }
+
+    back_office = is_back_office(claims)
+    results = [None] * len(transfers)
+    grouped = {}
+
+    for index, item in enumerate(transfers):
+        signed_amount, tx_type, description, error = _parse_transfer(item)
+        account = item.get('account', user_id) if isinstance(item, dict) else user_id
+        if not error and account != user_id and not back_office:
+            error = "Not authorized to post to this account"
+        if error:
+            results[index] = {"index": index, "status": "rejected", "error": error}
+            continue
+        grouped.setdefault(account, []).append((index, signed_amount, tx_type, description))
+
+    balances = {}
+    if grouped:
+        accounts = sorted(grouped)
+        with transaction() as transaction_id:
+            placeholders = ", ".join(f":a{i}" for i in range(len(accounts)))
+            locked = query(
+                LOCK_BALANCES_SQL.format(placeholders=placeholders),
+                BalanceRow,
+                {f"a{i}": account for i, account in enumerate(accounts)},
+                transaction_id,
+                exact_numeric=True
+            )
+            current = {row.user_id: row.balance for row in locked}
+
+            insert_sets = []
+            balance_sets = []
+            rollup_totals = {}
+            for account in accounts:
+                opening = running = current.get(account, Decimal('0'))
+                applied_any = False
+                for index, amount, tx_type, description in grouped[account]:
+                    if amount < 0 and running + amount < 0:
+                        results[index] = {
+                            "index": index,
+                            "status": "rejected",
+                            "error": "Insufficient funds"
+                        }
+                        continue
+                    running += amount
+                    applied_any = True
+                    insert_sets.append({'uid': account, 'amt': amount, 'type': tx_type, 'desc': description})
+                    total, count = rollup_totals.get((account, tx_type), (Decimal('0'), 0))
+                    rollup_totals[(account, tx_type)] = (total + amount, count + 1)
+                    results[index] = {
+                        "index": index,
+                        "status": "applied",
+                        "account": account,
+                        "amount": float(amount),
+                        "type": tx_type
+                    }
+                if applied_any:
+                    balance_sets.append({'uid': account, 'amt': running - opening})
+                    balances[account] = float(running)
+
+            if insert_sets:
+                batch_execute(BATCH_INSERT_SQL, insert_sets, transaction_id)
+                batch_execute(BATCH_BALANCE_SQL, balance_sets, transaction_id)
+                if MAINTAIN_MONTHLY_ROLLUP:
+                    batch_execute(BATCH_ROLLUP_SQL, [
+                        {'uid': account, 'type': tx_type, 'amt': total, 'cnt': count}
+                        for (account, tx_type), (total, count) in rollup_totals.items()
+                    ], transaction_id)
+
+    applied = sum(1 for r in results if r["status"] == "applied")
+    rejected = len(results) - applied
+    logger.info("Batch: %d applied, %d rejected", applied, rejected, extra={"user_id": user_id})
+
+    if rejected == 0:
+        status_code = 200
+    elif applied:
+        status_code = 207
+    else:
+        status_code = 400
+
+    return {
+        "statusCode": status_code,
+        "body": json.dumps({
+            "message": f"{applied} of {len(results)} transfers applied",
+            "applied": applied,
+            "rejected": rejected,
+            "results": results,
+            "balances": balances
+        }),
+        "headers": CORS_HEADERS
+    }
@@ -1,15 +1,26 @@
 import json
-import boto3
 import os
-import logging
+from functools import lru_cache
 from botocore.exceptions import ClientError
 
-logger = logging.getLogger()
-logger.setLevel(logging.INFO)
+from banking_common import (
+    decimal_default,
+    get_logger,
+    header,
+    instrumented,
+    is_warmup,
+    json_response,
+    lazy_table,
+    register_snapshot_priming,
+    start_invocation,
+    warm_up,
+)
+
+logger = get_logger()
 
 TABLE_NAME = os.environ.get('PROFILE_TABLE_NAME', 'SecureBankingCustomerProfilesFinal')
-dynamodb = boto3.resource('dynamodb')
-table = dynamodb.Table(TABLE_NAME)
+table = lazy_table(TABLE_NAME)
+register_snapshot_priming(table)
 
 # ✅ Canonical field mapping from frontend (camelCase) to DynamoDB field names
 FIELD_MAP = {
@@ -19,7 +30,15 @@ FIELD_MAP = {
 
 ALLOWED_FIELDS = set(FIELD_MAP.values())  # {'Preferred Language', 'Paperless'}
 
+# Bumped on every write so GetUserProfileLambda can tell a cached profile is stale
+VERSION_ATTRIBUTE = 'profileVersion'
+
+@instrumented
 def lambda_handler(event, context):
+    start_invocation(context)
+    if is_warmup(event):
+        return warm_up(table=lambda: table.meta.client.describe_table(TableName=TABLE_NAME))
+
     try:
         claims = event.get("requestContext", {}).get("authorizer", {}).get("claims", {})
         user_id = claims.get("sub")
@@ -27,14 +46,14 @@ def lambda_handler(event, context):
             logger.warning("Missing Cognito user ID in JWT")
             return _response(403, {"error": "Unauthorized - missing user ID"})
 
-        logger.info(f"[START] PUT /profile for user_id: {user_id}")
+        logger.info("[START] PUT /profile", extra={"user_id": user_id})
 
         body = event.get("body")
         if not body:
             return _response(400, {"error": "Missing request body"})
 
         incoming = json.loads(body)
-        logger.info(f"[REQUEST BODY] {json.dumps(incoming)}")
+        logger.debug("[REQUEST BODY]", extra={"body": incoming})
 
         # Map incoming keys to canonical attribute names
         update_data = {}
@@ -46,49 +65,63 @@ def lambda_handler(event, context):
                 disallowed.append(key)
 
         if disallowed:
-            logger.warning(f"[REJECTED] Attempt to modify restricted fields: {disallowed}")
+            logger.warning("[REJECTED] Attempt to modify restricted fields: %s", disallowed)
             return _response(400, {"error": "Contact bank to update profile"})
 
         if not update_data:
             return _response(400, {"error": "No allowed fields provided to update."})
 
-        # Prepare update expressions
-        update_expr_parts = []
-        expr_attr_values = {}
-        expr_attr_names = {}
-
-        for field, value in update_data.items():
-            safe_key = field.replace(" ", "")
-            name_placeholder = f"#{safe_key}"
-            value_placeholder = f":{safe_key}"
-
-            update_expr_parts.append(f"{name_placeholder} = {value_placeholder}")
-            expr_attr_names[name_placeholder] = field
-            expr_attr_values[value_placeholder] = value
-
-        update_expr = "SET " + ", ".join(update_expr_parts)
-
-        table.update_item(
-            Key={
-                "UserID": user_id,
-                "recordType": "UserProfile"
-            },
-            UpdateExpression=update_expr,
-            ExpressionAttributeNames=expr_attr_names,
-            ExpressionAttributeValues=expr_attr_values
-        )
-
-        logger.info(f"[UPDATE SUCCESS] Profile updated for user_id: {user_id}")
-
-        response = table.get_item(
-            Key={
-                "UserID": user_id,
-                "recordType": "UserProfile"
-            }
-        )
-        item = response.get('Item', {})
-        if not item:
-            return _response(500, {"error": "Profile update succeeded, but updated data could not be retrieved."})
+        # Optional optimistic concurrency: If-Match carries the profileVersion the client last saw
+        expected_version = None
+        if_match = header(event, 'If-Match')
+        if if_match:
+            try:
+                expected_version = int(if_match.removeprefix('W/').strip('"'))
+            except ValueError:
+                return _response(400, {"error": "If-Match must be a profile version number"})
+
+        fields = tuple(sorted(update_data))
+        if expected_version is None:
+            condition = None
+        else:
+            condition = "matches" if expected_version else "unversioned"
+        update_expr, condition_expr, expr_attr_names, value_placeholders = _update_expression(fields, condition)
+
+        expr_attr_values = {value_placeholders[field]: update_data[field] for field in fields}
+        expr_attr_values[":one"] = 1
+
+        update_args = {}
+        if condition_expr:
+            update_args["ConditionExpression"] = condition_expr
+        if condition == "matches":
+            expr_attr_values[":expectedVersion"] = expected_version
+
+        try:
+            response = table.update_item(
+                Key={
+                    "UserID": user_id,
+                    "recordType": "UserProfile"
+                },
+                UpdateExpression=update_expr,
+                ExpressionAttributeNames=expr_attr_names,
+                ExpressionAttributeValues=expr_attr_values,
+                ReturnValues="ALL_NEW",
+                ReturnValuesOnConditionCheckFailure="ALL_OLD",
+                **update_args
+            )
+        except ClientError as e:
+            if e.response.get("Error", {}).get("Code") != "ConditionalCheckFailedException":
+                raise
+            current = e.response.get("Item") or {}
+            current_version = int(current.get(VERSION_ATTRIBUTE, {}).get("N", 0))
+            logger.warning("[CONFLICT] If-Match %s, stored version %s", expected_version, current_version)
+            return _response(412, {
+                "error": "Profile was changed by another request",
+                "currentVersion": current_version
+            })
+
+        item = response.get("Attributes", {})
+        logger.info("[UPDATE SUCCESS] Profile updated to version %s", item.get(VERSION_ATTRIBUTE), extra={"user_id": user_id})
 
         # Confirmation messages
         confirmations = []
@@ -97,10 +130,10 @@ def lambda_handler(event, context):
         if "Paperless" in update_data:
             confirmations.append("Paperless communications enabled" if update_data["Paperless"] else "Paperless communications disabled")
 
-        return _response(200, {
+        return json_response(event, 200, {
             "message": confirmations,
             "updatedProfile": item
-        })
+        }, {**_headers(), "ETag": f'"{item.get(VERSION_ATTRIBUTE, 0)}"'}, default=decimal_default)
 
     except ClientError as e:
         logger.exception("DynamoDB client error")
@@ -111,15 +144,54 @@ def lambda_handler(event, context):
         return _response(500, {"error": "Internal server error", "details": str(e)})
 
 
+@lru_cache(maxsize=None)
+def _update_expression(fields, condition):
+    """
+    Build the UpdateExpression for one combination of canonical field names.
+
+    Returns (update_expr, condition_expr, attribute_names, value_placeholders);
+    callers fill in ExpressionAttributeValues from value_placeholders. With a
+    small FIELD_MAP there are only a handful of combinations, so each is built
+    once per container. `condition` is None, "matches" (stored version must
+    equal :expectedVersion) or "unversioned" (If-Match "0": the profile has
+    not been written since versioning was introduced).
+    """
+    update_expr_parts = []
+    expr_attr_names = {"#profileVersion": VERSION_ATTRIBUTE}
+    value_placeholders = {}
+
+    for field in fields:
+        safe_key = field.replace(" ", "")
+        name_placeholder = f"#{safe_key}"
+        value_placeholder = f":{safe_key}"
+
+        update_expr_parts.append(f"{name_placeholder} = {value_placeholder}")
+        expr_attr_names[name_placeholder] = field
+        value_placeholders[field] = value_placeholder
+
+    update_expr = "SET " + ", ".join(update_expr_parts) + " ADD #profileVersion :one"
+    condition_expr = {
+        None: None,
+        "matches": "#profileVersion = :expectedVersion",
+        "unversioned": "attribute_not_exists(#profileVersion)"
+    }[condition]
+    return update_expr, condition_expr, expr_attr_names, value_placeholders
+
+
+def _headers():
+    return {
+        "Access-Control-Allow-Origin": "*",
+        "Access-Control-Allow-Headers": "Content-Type,Authorization,If-Match",
+        "Access-Control-Expose-Headers": "ETag",
+        "Access-Control-Allow-Methods": "OPTIONS,GET,PUT",
+        "Access-Control-Allow-Credentials": "true",
+        "Content-Type": "application/json"
+    }
+
+
 def _response(status_code, body):
     return {
         "statusCode": status_code,
         "body": json.dumps(body),
-        "headers": {
-            "Access-Control-Allow-Origin": "*",
-            "Access-Control-Allow-Headers": "Content-Type,Authorization",
-            "Access-Control-Allow-Methods": "OPTIONS,GET,PUT",
-            "Access-Control-Allow-Credentials": "true",
-            "Content-Type": "application/json"
-        }
+        "headers": _headers()
     }
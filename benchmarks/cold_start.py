@@ -0,0 +1,190 @@
+"""
+Cold-start cost of each handler: module import (the INIT phase), the first
+invocation and a warm invocation, each measured in a fresh interpreter.
+
+AWS endpoints are pointed at local HTTP servers that answer every request
+with an empty success, so the numbers cover client construction, service
+model loading, signing and parsing but no network. Handlers that expect
+real data may answer the fixture with a 4xx/5xx; the status is reported.
+
+    python benchmarks/cold_start.py --runs 5
+    python benchmarks/cold_start.py --prime          # SnapStart-style priming
+
+To compare against another revision, check it out next to this one and
+point --root at it:
+
+    git worktree add /tmp/before <ref>
+    python benchmarks/cold_start.py --root /tmp/before
+
+--prime builds every lazy client right after import, as the before-snapshot
+hook does, and reports that separately from INIT. Requires boto3.
+"""
+import os
+import sys
+import json
+import glob
+import time
+import argparse
+import threading
+import statistics
+import subprocess
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+HANDLERS = [
+    'GetUserProfileLambda',
+    'UpdateUserProfileLambda',
+    'GetStatementLambda',
+    'GenerateStatementLambda',
+    'GetTransactionHistoryLambda',
+    'GetTransactionSummaryLambda',
+    'ProcessTransferLambda',
+    'ForwardBankingLogs',
+]
+
+# Empty success bodies, enough for each protocol's parser
+SERVICE_RESPONSES = {
+    'S3': ('application/xml', b''),
+    'DYNAMODB': ('application/x-amz-json-1.0', b'{}'),
+    'RDS_DATA': ('application/json',
+                 b'{"records": [], "columnMetadata": [], "updateResults": [], "transactionId": "bench"}'),
+}
+
+ENVIRONMENT = {
+    'AWS_DEFAULT_REGION': 'us-east-1',
+    'AWS_ACCESS_KEY_ID': 'AKIABENCHMARK',
+    'AWS_SECRET_ACCESS_KEY': 'benchmark',
+    'AWS_LAMBDA_FUNCTION_NAME': 'cold-start-bench',
+    'DB_CLUSTER_ARN': 'arn:aws:rds:us-east-1:000000000000:cluster:bench',
+    'DB_SECRET_ARN': 'arn:aws:secretsmanager:us-east-1:000000000000:secret:bench',
+}
+
+
+def serve(content_type, body):
+    class Handler(BaseHTTPRequestHandler):
+        def _reply(self, send_body):
+            length = int(self.headers.get('Content-Length') or 0)
+            if length:
+                self.rfile.read(length)
+            self.send_response(200)
+            self.send_header('Content-Type', content_type)
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            if send_body:
+                self.wfile.write(body)
+
+        def do_HEAD(self):
+            self._reply(False)
+
+        def do_GET(self):
+            self._reply(True)
+
+        do_POST = do_PUT = do_DELETE = do_GET
+
+        def log_message(self, *_):
+            pass
+
+    server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return f"http://127.0.0.1:{server.server_address[1]}"
+
+
+def run_child(root, folder, prime):
+    """Runs inside the fresh interpreter; prints one JSON result."""
+    for service, (content_type, body) in SERVICE_RESPONSES.items():
+        os.environ[f"AWS_ENDPOINT_URL_{service}"] = serve(content_type, body)
+    os.environ.update(ENVIRONMENT)
+    sys.path[:0] = [os.path.join(root, folder),
+                    os.path.join(root, 'layers', 'common', 'python'),
+                    os.path.join(root, 'layers', 'ledger', 'python')]
+    fixtures = sorted(glob.glob(os.path.join(root, folder, 'events', '*.json')))
+    with open(fixtures[0]) as f:
+        event = json.load(f)
+
+    import importlib.util
+    spec = importlib.util.spec_from_file_location('app', os.path.join(root, folder, 'app.py'))
+    module = importlib.util.module_from_spec(spec)
+
+    start = time.perf_counter()
+    spec.loader.exec_module(module)
+    init_ms = (time.perf_counter() - start) * 1000
+
+    prime_ms = None
+    if prime:
+        import banking_common
+        lazy = [value for value in vars(module).values() if isinstance(value, banking_common.LazyClient)]
+        try:
+            import ledger
+            lazy.append(ledger.rds_client)
+        except ImportError:
+            pass
+        start = time.perf_counter()
+        banking_common.prime(*lazy)
+        prime_ms = (time.perf_counter() - start) * 1000
+
+    timings = []
+    status = None
+    for _ in range(2):
+        start = time.perf_counter()
+        try:
+            response = module.lambda_handler(json.loads(json.dumps(event)), None)
+            status = response.get('statusCode') if isinstance(response, dict) else None
+        except Exception as e:
+            status = type(e).__name__
+        timings.append((time.perf_counter() - start) * 1000)
+
+    print(json.dumps({
+        "init_ms": init_ms,
+        "prime_ms": prime_ms,
+        "first_invoke_ms": timings[0],
+        "warm_invoke_ms": timings[1],
+        "status": status,
+        "modules_loaded": len(sys.modules),
+    }))
+
+
+def measure(root, folder, runs, prime):
+    samples = []
+    for _ in range(runs):
+        command = [sys.executable, os.path.abspath(__file__), '--child', folder, '--root', root]
+        if prime:
+            command.append('--prime')
+        # The handlers log to stdout; the result is the last line
+        output = subprocess.run(command, check=True, capture_output=True, text=True).stdout
+        samples.append(json.loads(output.strip().splitlines()[-1]))
+
+    def median(name):
+        values = [sample[name] for sample in samples if sample[name] is not None]
+        return round(statistics.median(values), 1) if values else None
+
+    return {
+        "handler": folder,
+        "init_ms": median('init_ms'),
+        "prime_ms": median('prime_ms'),
+        "first_invoke_ms": median('first_invoke_ms'),
+        "warm_invoke_ms": median('warm_invoke_ms'),
+        "status": samples[-1]['status'],
+        "modules_loaded": samples[-1]['modules_loaded'],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--root', default=ROOT, help="repository checkout to measure")
+    parser.add_argument('--handlers', nargs='+', default=HANDLERS)
+    parser.add_argument('--runs', type=int, default=5)
+    parser.add_argument('--prime', action='store_true', help="build lazy clients after import, as SnapStart priming does")
+    parser.add_argument('--child', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        run_child(os.path.abspath(args.root), args.child, args.prime)
+        return
+
+    results = [measure(os.path.abspath(args.root), folder, args.runs, args.prime) for folder in args.handlers]
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == '__main__':
+    main()
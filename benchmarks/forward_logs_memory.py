@@ -0,0 +1,221 @@
+"""
+Peak memory of ForwardBankingLogs on large synthetic subscription payloads.
+
+For each payload size the streaming handler and the original
+decode-everything implementation are run against an in-memory S3 stand-in
+that only counts bytes. Every run is a fresh interpreter that reads the
+event, resets the kernel's peak-RSS mark (Linux: /proc/self/clear_refs) and
+invokes the handler once, so `peak_rss_mb` is ru_maxrss of the whole process
+(interpreter, event, zlib's native buffers and all) and `growth_mb` is what
+the invocation added on top of the loaded event. The streaming path should
+stay flat as the payload grows; the original grows with it.
+
+Every streaming format holds at most one multipart part of output
+(DEFAULT_PART_SIZE, 8 MB) plus the decoder's working set, so growth should
+stay under --max-growth-mb, one part plus 4 MB by default.
+
+    python benchmarks/forward_logs_memory.py --sizes-mb 4 16 64 --max-rss-mb 96
+
+Exits non-zero if any streaming run's peak RSS exceeds --max-rss-mb or its
+growth exceeds --max-growth-mb.
+"""
+import os
+import sys
+import gzip
+import json
+import base64
+import argparse
+import resource
+import tempfile
+import subprocess
+import importlib.util
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT, 'layers', 'common', 'python'))
+sys.path.insert(0, os.path.join(ROOT, 'ForwardBankingLogs'))
+
+from banking_common.s3_upload import DEFAULT_PART_SIZE
+
+# ru_maxrss is in KiB on Linux, bytes on macOS
+RSS_UNIT = 1 if sys.platform == 'darwin' else 1024
+
+
+class CountingS3:
+    """Accepts put_object and multipart calls, keeping only byte counts."""
+
+    def __init__(self):
+        self.bytes = 0
+
+    def put_object(self, Body, **_):
+        self.bytes += len(Body)
+
+    def create_multipart_upload(self, **_):
+        return {'UploadId': 'bench'}
+
+    def upload_part(self, Body, PartNumber, **_):
+        self.bytes += len(Body)
+        return {'ETag': f'"{PartNumber}"'}
+
+    def complete_multipart_upload(self, **_):
+        pass
+
+    def abort_multipart_upload(self, **_):
+        pass
+
+
+def load_handler(archive_format):
+    os.environ.setdefault('AWS_DEFAULT_REGION', 'us-east-1')
+    os.environ['ARCHIVE_FORMAT'] = archive_format
+    spec = importlib.util.spec_from_file_location(
+        f"forward_{archive_format}", os.path.join(ROOT, 'ForwardBankingLogs', 'app.py'))
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    module.s3 = CountingS3()
+    return module
+
+
+def legacy_handler(s3):
+    """The pre-streaming implementation: every stage materialized in full."""
+    def handler(event, context):
+        compressed_payload = base64.b64decode(event['awslogs']['data'])
+        uncompressed_payload = gzip.decompress(compressed_payload).decode('utf-8')
+        log_data = json.loads(uncompressed_payload)
+        s3.put_object(Bucket='bench', Key='bench.json', Body=json.dumps(log_data, indent=2))
+        return {"statusCode": 200}
+    return handler
+
+
+def make_event(size_mb):
+    """A DATA_MESSAGE of roughly size_mb MB of JSON, as CloudWatch Logs would deliver it."""
+    target = size_mb * 1024 * 1024
+    events = []
+    size = 0
+    i = 0
+    while size < target:
+        message = (f"2025-03-01T12:00:{i % 60:02d}Z INFO transfer processed request_id={i:012d} "
+                   f"user=user-{i % 977:06d} amount={(i * 37) % 100000 / 100:.2f} latency_ms={i % 250}")
+        events.append({"id": str(37000000000000000000 + i), "timestamp": 1740830400000 + i, "message": message})
+        size += len(message) + 80
+        i += 1
+    payload = json.dumps({
+        "messageType": "DATA_MESSAGE",
+        "owner": "000000000000",
+        "logGroup": "/aws/lambda/ProcessTransferLambda",
+        "logStream": "2025/03/01/[$LATEST]0123456789abcdef",
+        "subscriptionFilters": ["archive"],
+        "logEvents": events
+    }).encode('utf-8')
+    del events
+    data = base64.b64encode(gzip.compress(payload, compresslevel=6)).decode('ascii')
+    return {"awslogs": {"data": data}}, len(payload)
+
+
+def _peak_rss():
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * RSS_UNIT
+
+
+def _reset_peak_rss():
+    """Reset the peak-RSS mark to the current RSS where the kernel allows it; returns the new mark."""
+    try:
+        with open('/proc/self/clear_refs', 'w') as f:
+            f.write('5')
+    except OSError:
+        pass  # ru_maxrss keeps the loading peak, so growth is understated
+    return _peak_rss()
+
+
+def run_child(archive_format, event_file):
+    """Runs inside the fresh interpreter; prints one JSON result."""
+    if archive_format == 'legacy':
+        s3 = CountingS3()
+        handler = legacy_handler(s3)
+    else:
+        app = load_handler(archive_format)
+        s3 = app.s3
+        handler = app.lambda_handler
+    with open(event_file, 'rb') as f:
+        event = {"awslogs": {"data": f.read().decode('ascii')}}
+
+    before = _reset_peak_rss()
+    response = handler(event, None)
+    peak = _peak_rss()
+    if response['statusCode'] != 200:
+        raise SystemExit(f"handler failed: {response}")
+    print(json.dumps({
+        "peak_rss_mb": round(peak / (1024 * 1024), 1),
+        "growth_mb": round((peak - before) / (1024 * 1024), 1),
+        "written_mb": round(s3.bytes / (1024 * 1024), 2),
+    }))
+
+
+def write_event(size_mb, event_file):
+    """Runs in its own interpreter so the parent, whose peak RSS every child inherits, stays small."""
+    event, uncompressed = make_event(size_mb)
+    data = event['awslogs']['data']
+    with open(event_file, 'w') as f:
+        f.write(data)
+    print(json.dumps({
+        "payload_mb": round(uncompressed / (1024 * 1024), 1),
+        "encoded_mb": round(len(data) / (1024 * 1024), 2),
+    }))
+
+
+def measure(archive_format, event_file):
+    command = [sys.executable, os.path.abspath(__file__), '--child', archive_format, '--event-file', event_file]
+    output = subprocess.run(command, check=True, capture_output=True, text=True).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--sizes-mb', type=int, nargs='+', default=[4, 16, 64])
+    parser.add_argument('--formats', nargs='+', default=['ndjson-gzip', 'raw', 'json'])
+    parser.add_argument('--max-rss-mb', type=float, default=96.0,
+                        help="ceiling on any streaming run's peak RSS")
+    parser.add_argument('--max-growth-mb', type=float, default=DEFAULT_PART_SIZE / (1024 * 1024) + 4,
+                        help="ceiling on what any streaming run adds above the loaded event")
+    parser.add_argument('--skip-legacy', action='store_true')
+    parser.add_argument('--child', help=argparse.SUPPRESS)
+    parser.add_argument('--event-file', help=argparse.SUPPRESS)
+    parser.add_argument('--make-event', type=int, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.make_event:
+        write_event(args.make_event, args.event_file)
+        return
+    if args.child:
+        run_child(args.child, args.event_file)
+        return
+
+    results = []
+    over_budget = []
+    with tempfile.TemporaryDirectory() as scratch:
+        for size_mb in args.sizes_mb:
+            event_file = os.path.join(scratch, f"{size_mb}.b64")
+            command = [sys.executable, os.path.abspath(__file__), '--make-event', str(size_mb),
+                       '--event-file', event_file]
+            output = subprocess.run(command, check=True, capture_output=True, text=True).stdout
+            row = json.loads(output)
+            for archive_format in args.formats:
+                result = measure(archive_format, event_file)
+                row[f"{archive_format}_peak_rss_mb"] = result['peak_rss_mb']
+                row[f"{archive_format}_growth_mb"] = result['growth_mb']
+                row[f"{archive_format}_written_mb"] = result['written_mb']
+                if result['peak_rss_mb'] > args.max_rss_mb:
+                    over_budget.append(f"{archive_format} at {size_mb} MB: peak {result['peak_rss_mb']} MB")
+                if result['growth_mb'] > args.max_growth_mb:
+                    over_budget.append(f"{archive_format} at {size_mb} MB: growth {result['growth_mb']} MB")
+            if not args.skip_legacy:
+                result = measure('legacy', event_file)
+                row["legacy_peak_rss_mb"] = result['peak_rss_mb']
+                row["legacy_growth_mb"] = result['growth_mb']
+            results.append(row)
+
+    print(json.dumps(results, indent=2))
+    if over_budget:
+        raise SystemExit(f"over the memory budget ({args.max_rss_mb} MB peak, "
+                         f"{args.max_growth_mb} MB growth): {', '.join(over_budget)}")
+
+
+if __name__ == '__main__':
+    main()
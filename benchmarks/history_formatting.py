@@ -0,0 +1,95 @@
+"""
+Benchmark the per-row timestamp formatting in GetTransactionHistoryLambda.
+
+Compares the original loop (ZoneInfo lookup, fromisoformat and astimezone for
+every row inside a try/except) with ledger.timezones.localize_timestamps on
+synthetic histories spanning several DST transitions.
+
+    python benchmarks/history_formatting.py --rows 10000 --years 3
+    python benchmarks/history_formatting.py --rows 50 --years 10    # sparse page
+"""
+import os
+import sys
+import json
+import time
+import random
+import argparse
+from datetime import datetime, timedelta
+from zoneinfo import ZoneInfo
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT, 'layers', 'ledger', 'python'))
+sys.path.insert(0, os.path.join(ROOT, 'layers', 'common', 'python'))
+os.environ.setdefault('DB_CLUSTER_ARN', 'arn:aws:rds:local:000000000000:cluster:bench')
+os.environ.setdefault('DB_SECRET_ARN', 'arn:aws:secretsmanager:local:000000000000:secret:bench')
+os.environ.setdefault('AWS_DEFAULT_REGION', 'us-east-1')
+
+from ledger.timezones import get_zone, localize_timestamps  # noqa: E402
+
+
+def synthetic_timestamps(rows, years):
+    start = datetime(2022, 1, 1)
+    span = int(years * 365 * 86400)
+    rng = random.Random(42)
+    values = sorted(
+        (start + timedelta(seconds=rng.randrange(span), milliseconds=rng.randrange(1000)) for _ in range(rows)),
+        reverse=True
+    )
+    return [v.strftime('%Y-%m-%d %H:%M:%S.%f')[:-3] for v in values]
+
+
+def legacy_format(values):
+    results = []
+    for utc_timestamp in values:
+        la_timestamp = None
+        if utc_timestamp:
+            try:
+                dt_utc = datetime.fromisoformat(utc_timestamp.replace("Z", "+00:00"))
+                dt_la = dt_utc.astimezone(ZoneInfo("America/Los_Angeles"))
+                la_timestamp = dt_la.isoformat()
+            except Exception:
+                la_timestamp = str(utc_timestamp)
+        results.append(la_timestamp)
+    return results
+
+
+def batched_format(values):
+    return localize_timestamps(values, get_zone("America/Los_Angeles"))
+
+
+def best_of(fn, values, repeat):
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn(values)
+        best = min(best, time.perf_counter() - start)
+    return best * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rows', type=int, default=10000)
+    parser.add_argument('--years', type=float, default=3)
+    parser.add_argument('--repeat', type=int, default=10)
+    args = parser.parse_args()
+
+    values = synthetic_timestamps(args.rows, args.years)
+    # The Lambda runtime runs in UTC, which is what the legacy path relies on
+    # for naive timestamps.
+    os.environ['TZ'] = 'UTC'
+    time.tzset()
+    assert legacy_format(values) == batched_format(values)
+
+    legacy_ms = best_of(legacy_format, values, args.repeat)
+    batched_ms = best_of(batched_format, values, args.repeat)
+    print(json.dumps({
+        "rows": args.rows,
+        "years": args.years,
+        "legacy_per_row_ms": round(legacy_ms, 3),
+        "batched_ms": round(batched_ms, 3),
+        "speedup": round(legacy_ms / batched_ms, 2),
+    }, indent=2))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,460 @@
+"""
+Local load test: replay each handler's events/ fixtures concurrently and
+report latency percentiles, throughput and peak memory as JSON.
+
+Every worker is a separate interpreter standing in for one Lambda execution
+environment: it imports the handler once, warms it with one invocation and
+then runs its share of --iterations back to back, all workers starting
+together. S3 and DynamoDB are served in-process by moto, seeded with
+--users profiles and --statements statement objects per user; the ledger
+handlers talk to PostgreSQL through rds_data_shim.RDSDataShim, seeded with
+--history-rows transactions per user. Without psycopg2 or a reachable
+LEDGER_DSN those four handlers are reported as skipped. ForwardBankingLogs
+gets a synthetic subscription payload of --log-payload-mb per record.
+
+Fixtures are replayed round-robin with the caller's sub/email swapped for
+one of the seeded users, so caches see a realistic spread of keys. Latency
+includes moto's and the shim's in-process work, so compare numbers between
+commits on the same machine rather than against production.
+
+    pip install moto psycopg2-binary
+    LEDGER_DSN="dbname=ledger user=postgres host=localhost" \\
+        python benchmarks/load_test.py --concurrency 4 --iterations 400 --output before.json
+
+To compare against another revision, check it out next to this one and
+point --root at it, passing the earlier report as --compare:
+
+    git worktree add /tmp/before <ref>
+    python benchmarks/load_test.py --root /tmp/before --output before.json
+    python benchmarks/load_test.py --compare before.json --max-regression 20
+
+--max-regression exits non-zero if any handler's p95 latency or peak memory
+grew by more than that many percent over the --compare report.
+"""
+import os
+import sys
+import copy
+import glob
+import json
+import time
+import argparse
+import platform
+import tempfile
+import statistics
+import subprocess
+import importlib.util
+from datetime import datetime, timezone
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+BENCHMARKS = os.path.dirname(os.path.abspath(__file__))
+
+HANDLERS = [
+    'GetUserProfileLambda',
+    'UpdateUserProfileLambda',
+    'GetStatementLambda',
+    'GenerateStatementLambda',
+    'GetTransactionHistoryLambda',
+    'GetTransactionSummaryLambda',
+    'ProcessTransferLambda',
+    'ForwardBankingLogs',
+]
+
+LEDGER_HANDLERS = {
+    'GenerateStatementLambda',
+    'GetTransactionHistoryLambda',
+    'GetTransactionSummaryLambda',
+    'ProcessTransferLambda',
+}
+
+DOCUMENTS_BUCKET = 'securestoragebankingdocumentsfinal'
+ARCHIVE_BUCKET = 'forwardedbankinglogsfinal'
+PROFILE_TABLE = 'SecureBankingCustomerProfilesFinal'
+
+# Credentials and settings as template.yaml deploys them; the outer
+# environment wins for LOG_LEVEL and friends so other settings can be measured
+ENVIRONMENT = {
+    'AWS_DEFAULT_REGION': 'us-east-1',
+    'AWS_ACCESS_KEY_ID': 'AKIABENCHMARK',
+    'AWS_SECRET_ACCESS_KEY': 'benchmark',
+    'AWS_LAMBDA_FUNCTION_NAME': 'load-test',
+    'BUCKET_NAME': DOCUMENTS_BUCKET,
+    'ARCHIVE_BUCKET': ARCHIVE_BUCKET,
+    'PROFILE_TABLE_NAME': PROFILE_TABLE,
+    # Only passed through to RDSDataShim, which ignores them
+    'DB_CLUSTER_ARN': 'arn:aws:rds:us-east-1:000000000000:cluster:load-test',
+    'DB_SECRET_ARN': 'arn:aws:secretsmanager:us-east-1:000000000000:secret:load-test',
+}
+SETTINGS = {
+    'LOG_LEVEL': 'INFO',
+    'LOG_DEBUG_SAMPLE_RATE': '0.01',
+    'CALL_TIMING': 'emf',
+}
+
+# History spread evenly from 2025-01-01 to now, so the fixtures' date
+# ranges and "last N months" both find rows
+SEED_LEDGER_SQL = """
+INSERT INTO accounts (user_id, balance)
+SELECT 'load-' || lpad(u::text, 5, '0'), 100000
+FROM generate_series(0, :users - 1) AS u;
+
+INSERT INTO transactions (user_id, amount, type, timestamp, description)
+SELECT 'load-' || lpad(u::text, 5, '0'),
+       CASE WHEN r % 3 = 1 THEN -1 ELSE 1 END * ((r * 37) % 50000 / 100.0 + 1),
+       (ARRAY['deposit', 'withdrawal', 'transfer'])[r % 3 + 1],
+       TIMESTAMP '2025-01-01'
+           + (now() AT TIME ZONE 'UTC' - TIMESTAMP '2025-01-01') * (r::float / GREATEST(:rows, 1)),
+       'load test ' || r
+FROM generate_series(0, :users - 1) AS u, generate_series(0, :rows - 1) AS r;
+
+INSERT INTO transaction_monthly_rollup (user_id, month, type, total, transaction_count)
+SELECT user_id, date_trunc('month', timestamp)::date, type, SUM(amount), COUNT(*)
+FROM transactions
+GROUP BY 1, 2, 3;
+"""
+
+
+def user_sub(n):
+    return f"load-{n:05d}"
+
+
+def user_email(n):
+    return f"load-{n:05d}@example.com"
+
+
+class Context:
+    function_name = 'load-test'
+
+    def __init__(self, worker, i):
+        self.aws_request_id = f"00000000-0000-0000-{worker:04d}-{i:012d}"
+
+    def get_remaining_time_in_millis(self):
+        return 30000
+
+
+def seed_ledger(users, history_rows, latency_ms):
+    """Reset and seed the shared ledger DB; returns None or why the ledger handlers are skipped."""
+    try:
+        sys.path.insert(0, BENCHMARKS)
+        from rds_data_shim import RDSDataShim
+    except ImportError as e:
+        return f"rds_data_shim unavailable: {e}"
+    try:
+        shim = RDSDataShim(latency_ms=latency_ms)
+        shim.apply_schema()
+        shim.reset()
+        shim.execute_statement(sql=SEED_LEDGER_SQL, parameters=[
+            {'name': 'users', 'value': {'longValue': users}},
+            {'name': 'rows', 'value': {'longValue': history_rows}},
+        ])
+    except Exception as e:
+        return f"ledger database unavailable: {str(e).strip().splitlines()[0]}"
+    return None
+
+
+def seed_aws(users, statements):
+    """Buckets, statement objects and profiles in this worker's moto backend."""
+    import boto3
+    s3 = boto3.client('s3')
+    s3.create_bucket(Bucket=DOCUMENTS_BUCKET)
+    s3.create_bucket(Bucket=ARCHIVE_BUCKET)
+    body = b'%PDF-1.4\n% load test statement\n%%EOF\n'
+    for n in range(users):
+        s3.put_object(Bucket=DOCUMENTS_BUCKET, Body=body,
+                      Key=f"statements/{user_email(n)}/535-FinalExampleBankStatement.pdf")
+        for m in range(statements):
+            year, month = divmod(2025 * 12 + 2 - m, 12)
+            s3.put_object(Bucket=DOCUMENTS_BUCKET, Body=body,
+                          Key=f"statements/{user_email(n)}/{year:04d}-{month + 1:02d}/statement.pdf")
+
+    dynamodb = boto3.client('dynamodb')
+    dynamodb.create_table(
+        TableName=PROFILE_TABLE,
+        KeySchema=[{'AttributeName': 'UserID', 'KeyType': 'HASH'},
+                   {'AttributeName': 'recordType', 'KeyType': 'RANGE'}],
+        AttributeDefinitions=[{'AttributeName': 'UserID', 'AttributeType': 'S'},
+                              {'AttributeName': 'recordType', 'AttributeType': 'S'}],
+        BillingMode='PAY_PER_REQUEST')
+    table = boto3.resource('dynamodb').Table(PROFILE_TABLE)
+    with table.batch_writer() as batch:
+        for n in range(users):
+            batch.put_item(Item={
+                'UserID': user_sub(n), 'recordType': 'UserProfile', 'profileVersion': 1,
+                'Email': user_email(n), 'Preferred Language': 'en', 'Paperless': n % 2 == 0,
+            })
+
+
+def load_fixtures(root, folder, log_payload_mb):
+    fixtures = []
+    for path in sorted(glob.glob(os.path.join(root, folder, 'events', '*.json'))):
+        with open(path) as f:
+            fixtures.append(json.load(f))
+    if not fixtures:
+        raise SystemExit(f"{folder} has no events/*.json fixtures")
+    if folder == 'ForwardBankingLogs':
+        from forward_logs_memory import make_event
+        data = make_event(log_payload_mb)[0]['awslogs']['data']
+        for fixture in fixtures:
+            for record in fixture.get('Records', [fixture]):
+                if 'awslogs' in record:
+                    record['awslogs']['data'] = data
+    return fixtures
+
+
+def personalize(event, n):
+    """Swap the fixture caller for seeded user n, keeping whichever claims it had."""
+    claims = event.get('requestContext', {}).get('authorizer', {}).get('claims')
+    if claims is not None:
+        if 'sub' in claims:
+            claims['sub'] = user_sub(n)
+        if 'email' in claims:
+            claims['email'] = user_email(n)
+    return event
+
+
+def status_of(response):
+    if not isinstance(response, dict):
+        return 'none'
+    if 'statusCode' in response:
+        return str(response['statusCode'])
+    if 'batchItemFailures' in response:
+        return 'partial' if response['batchItemFailures'] else '200'
+    return 'none'
+
+
+def invoke(module, event, context):
+    try:
+        return status_of(module.lambda_handler(event, context))
+    except Exception as e:
+        return type(e).__name__
+
+
+def run_child(root, folder, args):
+    """One execution environment; prints "ready", waits for "go", then one JSON result."""
+    os.environ.update(ENVIRONMENT)
+    for name, value in SETTINGS.items():
+        os.environ.setdefault(name, value)
+    sys.path.insert(0, BENCHMARKS)
+    fixtures = load_fixtures(root, folder, args.log_payload_mb)
+    sys.path[:0] = [os.path.join(root, folder),
+                    os.path.join(root, 'layers', 'common', 'python'),
+                    os.path.join(root, 'layers', 'ledger', 'python')]
+
+    from moto import mock_aws
+    mock_aws().start()
+    seed_aws(args.users, args.statements)
+
+    spec = importlib.util.spec_from_file_location('app', os.path.join(root, folder, 'app.py'))
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    if folder in LEDGER_HANDLERS:
+        from rds_data_shim import RDSDataShim
+        import ledger.data_api
+        ledger.data_api.rds_client = RDSDataShim(latency_ms=args.latency_ms)
+
+    worker = args.worker
+    indexes = range(worker, args.iterations, args.concurrency)
+    events = [personalize(copy.deepcopy(fixtures[i % len(fixtures)]), i % args.users) for i in indexes]
+
+    # EMF records go to stdout; keep it for the protocol lines
+    protocol = sys.stdout
+    sys.stdout = open(os.devnull, 'w')
+    invoke(module, personalize(copy.deepcopy(fixtures[0]), worker % args.users), Context(worker, 0))
+    print('ready', file=protocol, flush=True)
+    sys.stdin.readline()
+
+    latencies = []
+    statuses = {}
+    started = time.time()
+    for i, event in zip(indexes, events):
+        start = time.perf_counter()
+        status = invoke(module, event, Context(worker, i + 1))
+        latencies.append(round((time.perf_counter() - start) * 1000, 3))
+        statuses[status] = statuses.get(status, 0) + 1
+    finished = time.time()
+
+    # Peak memory is traced separately so tracing overhead stays out of the latencies
+    peak = 0
+    if worker == 0:
+        import tracemalloc
+        tracemalloc.start()
+        for n, fixture in enumerate(fixtures):
+            event = personalize(copy.deepcopy(fixture), n % args.users)
+            tracemalloc.reset_peak()
+            before, _ = tracemalloc.get_traced_memory()
+            invoke(module, event, Context(worker, args.iterations + n + 1))
+            peak = max(peak, tracemalloc.get_traced_memory()[1] - before)
+        tracemalloc.stop()
+
+    import resource
+    print(json.dumps({
+        "latencies_ms": latencies,
+        "statuses": statuses,
+        "started": started,
+        "finished": finished,
+        "peak_bytes": peak,
+        "max_rss_kb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+    }), file=protocol)
+
+
+def percentile(samples, p):
+    return samples[min(len(samples) - 1, int(p * len(samples)))]
+
+
+def child_command(root, folder, worker, args):
+    command = [sys.executable, os.path.abspath(__file__), '--child', folder, '--root', root,
+               '--worker', str(worker)]
+    for name in ('concurrency', 'iterations', 'users', 'statements', 'log_payload_mb', 'latency_ms'):
+        command += ['--' + name.replace('_', '-'), str(getattr(args, name))]
+    return command
+
+
+def measure(root, folder, args):
+    workers = []
+    for worker in range(min(args.concurrency, args.iterations)):
+        log = tempfile.TemporaryFile(mode='w+')
+        process = subprocess.Popen(child_command(root, folder, worker, args), stdin=subprocess.PIPE,
+                                   stdout=subprocess.PIPE, stderr=log, text=True)
+        workers.append((process, log))
+
+    def fail(process, log):
+        for other, _ in workers:
+            other.kill()
+        log.seek(0)
+        tail = log.read()[-2000:]
+        raise SystemExit(f"{folder} worker exited with {process.wait()}:\n{tail}")
+
+    for process, log in workers:
+        while process.stdout.readline().strip() != 'ready':
+            if process.poll() is not None:
+                fail(process, log)
+    for process, _ in workers:
+        process.stdin.write('go\n')
+        process.stdin.flush()
+
+    samples = []
+    for process, log in workers:
+        output, _ = process.communicate()
+        if process.returncode != 0:
+            fail(process, log)
+        samples.append(json.loads(output.strip().splitlines()[-1]))
+        log.close()
+
+    latencies = sorted(ms for sample in samples for ms in sample['latencies_ms'])
+    statuses = {}
+    for sample in samples:
+        for status, count in sample['statuses'].items():
+            statuses[status] = statuses.get(status, 0) + count
+    elapsed = max(s['finished'] for s in samples) - min(s['started'] for s in samples)
+    return {
+        "handler": folder,
+        "workers": len(samples),
+        "invocations": len(latencies),
+        "statuses": dict(sorted(statuses.items())),
+        "mean_ms": round(statistics.mean(latencies), 3),
+        "p50_ms": round(percentile(latencies, 0.50), 3),
+        "p95_ms": round(percentile(latencies, 0.95), 3),
+        "p99_ms": round(percentile(latencies, 0.99), 3),
+        "max_ms": latencies[-1],
+        "throughput_rps": round(len(latencies) / elapsed, 1) if elapsed > 0 else None,
+        "peak_memory_mb": round(max(s['peak_bytes'] for s in samples) / (1024 * 1024), 2),
+        "max_rss_mb": round(max(s['max_rss_kb'] for s in samples) / 1024, 1),
+    }
+
+
+def revision(root):
+    try:
+        commit = subprocess.run(['git', '-C', root, 'rev-parse', 'HEAD'],
+                                check=True, capture_output=True, text=True).stdout.strip()
+        dirty = subprocess.run(['git', '-C', root, 'status', '--porcelain', '--untracked-files=no'],
+                               check=True, capture_output=True, text=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+    return commit + ('-dirty' if dirty else '')
+
+
+def compare(report, baseline, max_regression):
+    """Annotate results with ratios to the baseline report; returns the regressions found."""
+    previous = {row['handler']: row for row in baseline['results'] if 'skipped' not in row}
+    regressions = []
+    for row in report['results']:
+        before = previous.get(row['handler'])
+        if 'skipped' in row or before is None:
+            continue
+        ratios = {}
+        for name in ('p50_ms', 'p95_ms', 'p99_ms', 'throughput_rps', 'peak_memory_mb'):
+            if before.get(name) and row.get(name) is not None:
+                ratios[name] = round(row[name] / before[name], 3)
+        row['vs_baseline'] = ratios
+        if max_regression is not None:
+            limit = 1 + max_regression / 100
+            for name in ('p95_ms', 'peak_memory_mb'):
+                if ratios.get(name, 0) > limit:
+                    regressions.append(f"{row['handler']} {name} x{ratios[name]}")
+    report['baseline'] = {"revision": baseline.get('revision'),
+                          "same_config": baseline.get('config') == report['config']}
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--root', default=ROOT, help="repository checkout to measure")
+    parser.add_argument('--handlers', nargs='+', default=HANDLERS)
+    parser.add_argument('--concurrency', type=int, default=4, help="worker processes per handler")
+    parser.add_argument('--iterations', type=int, default=200, help="timed invocations per handler")
+    parser.add_argument('--users', type=int, default=50, help="seeded users the fixtures are spread over")
+    parser.add_argument('--statements', type=int, default=24, help="monthly statement objects per user")
+    parser.add_argument('--history-rows', type=int, default=500, help="ledger transactions per user")
+    parser.add_argument('--log-payload-mb', type=float, default=0.25,
+                        help="uncompressed size of each ForwardBankingLogs record")
+    parser.add_argument('--latency-ms', type=float, default=0.0, help="simulated Data API round trip")
+    parser.add_argument('--output', help="also write the report to this file")
+    parser.add_argument('--compare', help="earlier report to compare against")
+    parser.add_argument('--max-regression', type=float,
+                        help="with --compare, fail if p95 or peak memory grew by more than this percent")
+    parser.add_argument('--child', help=argparse.SUPPRESS)
+    parser.add_argument('--worker', type=int, default=0, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    root = os.path.abspath(args.root)
+
+    if args.child:
+        run_child(root, args.child, args)
+        return
+
+    try:
+        import moto  # noqa: F401
+    except ImportError:
+        raise SystemExit("moto is required: pip install moto")
+
+    report = {
+        "revision": revision(root),
+        "generated_at": datetime.now(timezone.utc).isoformat(timespec='seconds'),
+        "python": platform.python_version(),
+        "config": {name: getattr(args, name) for name in (
+            'concurrency', 'iterations', 'users', 'statements', 'history_rows', 'log_payload_mb', 'latency_ms')},
+        "results": [],
+    }
+    for folder in args.handlers:
+        if folder in LEDGER_HANDLERS:
+            # Reseeded per handler so ProcessTransfer's writes don't leak into the next run
+            skipped = seed_ledger(args.users, args.history_rows, args.latency_ms)
+            if skipped:
+                report['results'].append({"handler": folder, "skipped": skipped})
+                continue
+        report['results'].append(measure(root, folder, args))
+
+    regressions = []
+    if args.compare:
+        with open(args.compare) as f:
+            regressions = compare(report, json.load(f), args.max_regression)
+
+    text = json.dumps(report, indent=2)
+    print(text)
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(text + '\n')
+    if regressions:
+        raise SystemExit("Regressions over {}%: {}".format(args.max_regression, ', '.join(regressions)))
+
+
+if __name__ == '__main__':
+    main()
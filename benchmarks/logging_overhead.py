@@ -0,0 +1,162 @@
+"""
+Per-request logging cost of GetUserProfileLambda and GetStatementLambda:
+handler time and bytes logged, with AWS calls answered by in-memory fakes.
+
+The root logger gets a handler shaped like the one the Lambda Python runtime
+installs, writing to a stream that only counts bytes; handlers that set up
+their own formatting replace its formatter as they would in Lambda. Each
+root is measured in its own interpreter. To compare with an earlier
+revision, check it out next to this one and pass it as --baseline-root:
+
+    git worktree add /tmp/before <ref>
+    python benchmarks/logging_overhead.py --baseline-root /tmp/before
+
+Set LOG_LEVEL / LOG_DEBUG_SAMPLE_RATE in the environment to measure other
+settings.
+"""
+import os
+import sys
+import json
+import time
+import argparse
+import subprocess
+import importlib.util
+from datetime import datetime, timezone
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+HANDLERS = ['GetUserProfileLambda', 'GetStatementLambda']
+
+LAMBDA_FORMAT = "[%(levelname)s]\t%(asctime)s\t%(message)s"
+
+
+class CountingStream:
+    def __init__(self):
+        self.bytes = 0
+        self.lines = 0
+
+    def write(self, text):
+        self.bytes += len(text.encode('utf-8'))
+        self.lines += text.count('\n')
+
+    def flush(self):
+        pass
+
+
+class FakeTable:
+    def get_item(self, Key, **_):
+        return {'Item': {
+            'UserID': Key['UserID'], 'recordType': 'UserProfile', 'profileVersion': 3,
+            'Email': f"{Key['UserID']}@example.com", 'Preferred Language': 'en', 'Paperless': True
+        }}
+
+
+class FakeS3:
+    def list_objects_v2(self, Prefix, **_):
+        return {'Contents': [{'Key': Prefix}]}
+
+    def generate_presigned_url(self, operation, Params, ExpiresIn):
+        return f"https://example.com/{Params['Key']}?X-Amz-Expires={ExpiresIn}"
+
+
+class FakeCredentials:
+    def get_frozen_credentials(self):
+        return self
+
+    access_key = 'AKIABENCHMARK'
+
+
+class FakeSession:
+    def get_credentials(self):
+        return FakeCredentials()
+
+
+def make_event(i):
+    email = f"user-{i:06d}@example.com"
+    return {
+        "version": "2.0",
+        "rawPath": "/profile",
+        "headers": {"authorization": "Bearer " + "x" * 900, "user-agent": "benchmark"},
+        "requestContext": {
+            "requestId": f"req-{i}",
+            "authorizer": {"claims": {
+                "sub": f"sub-{i % 200:06d}", "email": email, "email_verified": "true",
+                "cognito:groups": "Customers", "iss": "https://cognito-idp.us-east-1.amazonaws.com/pool",
+                "auth_time": "1740830400", "exp": "1740834000"
+            }},
+            "time": datetime.now(timezone.utc).isoformat()
+        }
+    }
+
+
+class Context:
+    def __init__(self, i):
+        self.aws_request_id = f"00000000-0000-0000-0000-{i:012d}"
+
+
+def run_child(root, folder, iterations):
+    stream = CountingStream()
+    import logging
+    handler = logging.StreamHandler(stream)
+    handler.setFormatter(logging.Formatter(LAMBDA_FORMAT))
+    logging.getLogger().addHandler(handler)
+
+    os.environ.setdefault('AWS_DEFAULT_REGION', 'us-east-1')
+    sys.path[:0] = [os.path.join(root, 'layers', 'common', 'python')]
+    spec = importlib.util.spec_from_file_location('app', os.path.join(root, folder, 'app.py'))
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    module.table = FakeTable()
+    module.s3 = FakeS3()
+    module.session = FakeSession()
+    module.shared_session = FakeSession
+    # Metrics go to stdout; keep them out of the count
+    sys.stdout = open(os.devnull, 'w')
+
+    events = [make_event(i) for i in range(iterations)]
+    stream.bytes = stream.lines = 0
+    start = time.perf_counter()
+    for i, event in enumerate(events):
+        response = module.lambda_handler(event, Context(i))
+        if response['statusCode'] != 200:
+            raise SystemExit(f"handler failed: {response}")
+    elapsed = time.perf_counter() - start
+    sys.stdout = sys.__stdout__
+
+    print(json.dumps({
+        "us_per_request": round(elapsed / iterations * 1e6, 1),
+        "log_bytes_per_request": round(stream.bytes / iterations, 1),
+        "log_lines_per_request": round(stream.lines / iterations, 2),
+    }))
+
+
+def measure(root, folder, iterations):
+    command = [sys.executable, os.path.abspath(__file__), '--child', folder,
+               '--root', root, '--iterations', str(iterations)]
+    output = subprocess.run(command, check=True, capture_output=True, text=True).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--root', default=ROOT)
+    parser.add_argument('--baseline-root', help="earlier checkout to compare against")
+    parser.add_argument('--iterations', type=int, default=2000)
+    parser.add_argument('--child', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        run_child(os.path.abspath(args.root), args.child, args.iterations)
+        return
+
+    results = []
+    for folder in HANDLERS:
+        row = {"handler": folder, "current": measure(os.path.abspath(args.root), folder, args.iterations)}
+        if args.baseline_root:
+            row["baseline"] = measure(os.path.abspath(args.baseline_root), folder, args.iterations)
+        results.append(row)
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == '__main__':
+    main()
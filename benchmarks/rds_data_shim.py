@@ -0,0 +1,191 @@
+"""
+Local stand-in for the `rds-data` client, backed by a real PostgreSQL.
+
+Implements the subset of the Data API the Lambdas use (execute_statement,
+batch_execute_statement and the begin/commit/rollback transaction calls) on
+top of psycopg2, translating `:name` parameters and returning records in the
+Data API cell format. An optional per-call delay simulates the HTTPS round
+trip to the Data API endpoint so that call counts show up in latency numbers.
+
+Point it at a scratch database with LEDGER_DSN, e.g.
+    LEDGER_DSN="dbname=ledger user=postgres host=localhost"
+"""
+import os
+import re
+import time
+import uuid
+import threading
+from datetime import date, datetime
+from decimal import Decimal
+
+import psycopg2
+
+PARAM_RE = re.compile(r"(?<!:):([A-Za-z_][A-Za-z0-9_]*)")
+
+# Postgres type OIDs -> Data API columnMetadata typeName
+TYPE_NAMES = {
+    16: 'bool',
+    20: 'int8',
+    21: 'int2',
+    23: 'int4',
+    25: 'text',
+    114: 'json',
+    700: 'float4',
+    701: 'float8',
+    1043: 'varchar',
+    1082: 'date',
+    1114: 'timestamp',
+    1184: 'timestamptz',
+    1700: 'numeric',
+    3802: 'jsonb',
+}
+
+SCHEMA_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'sql')
+
+
+class DataAPIShimError(Exception):
+    pass
+
+
+def _translate(sql):
+    return PARAM_RE.sub(lambda m: f"%({m.group(1)})s", sql.replace('%', '%%'))
+
+
+def _param_value(value):
+    if value.get('isNull'):
+        return None
+    if 'stringValue' in value:
+        return value['stringValue']
+    if 'doubleValue' in value:
+        return value['doubleValue']
+    if 'longValue' in value:
+        return value['longValue']
+    if 'booleanValue' in value:
+        return value['booleanValue']
+    if 'arrayValue' in value:
+        array = value['arrayValue']
+        return [_param_value({k: v}) for k, values in array.items() for v in values]
+    raise DataAPIShimError(f"Unsupported parameter value: {value}")
+
+
+def _params(parameters):
+    params = {}
+    for p in parameters or []:
+        value = _param_value(p['value'])
+        # The Data API sends DECIMAL-hinted strings as numeric, not text
+        if p.get('typeHint') == 'DECIMAL' and value is not None:
+            value = Decimal(value)
+        params[p['name']] = value
+    return params
+
+
+def _cell(value):
+    if value is None:
+        return {'isNull': True}
+    if isinstance(value, bool):
+        return {'booleanValue': value}
+    if isinstance(value, int):
+        return {'longValue': value}
+    if isinstance(value, float):
+        return {'doubleValue': value}
+    if isinstance(value, Decimal):
+        return {'stringValue': str(value)}
+    if isinstance(value, datetime):
+        return {'stringValue': value.strftime('%Y-%m-%d %H:%M:%S.%f').rstrip('0').rstrip('.')}
+    if isinstance(value, date):
+        return {'stringValue': value.isoformat()}
+    return {'stringValue': str(value)}
+
+
+class RDSDataShim:
+    """Drop-in replacement for boto3.client('rds-data')."""
+
+    def __init__(self, dsn=None, latency_ms=0.0):
+        self.dsn = dsn or os.environ.get('LEDGER_DSN', 'dbname=ledger')
+        self.latency = latency_ms / 1000.0
+        self.calls = 0
+        self._local = threading.local()
+        self._transactions = {}
+
+    def _autocommit_connection(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is None or conn.closed:
+            conn = psycopg2.connect(self.dsn)
+            conn.autocommit = True
+            self._local.conn = conn
+        return conn
+
+    def _round_trip(self):
+        self.calls += 1
+        if self.latency:
+            time.sleep(self.latency)
+
+    def _connection(self, transaction_id):
+        if transaction_id:
+            try:
+                return self._transactions[transaction_id]
+            except KeyError:
+                raise DataAPIShimError(f"Unknown transactionId {transaction_id}")
+        return self._autocommit_connection()
+
+    def execute_statement(self, sql, parameters=None, transactionId=None,
+                          includeResultMetadata=False, **_):
+        self._round_trip()
+        conn = self._connection(transactionId)
+        with conn.cursor() as cur:
+            cur.execute(_translate(sql), _params(parameters))
+            response = {'numberOfRecordsUpdated': max(cur.rowcount, 0)}
+            if cur.description is not None:
+                rows = cur.fetchall()
+                response['records'] = [[_cell(v) for v in row] for row in rows]
+                if includeResultMetadata:
+                    response['columnMetadata'] = [
+                        {'name': col.name, 'label': col.name,
+                         'typeName': TYPE_NAMES.get(col.type_code, 'unknown')}
+                        for col in cur.description
+                    ]
+        return response
+
+    def batch_execute_statement(self, sql, parameterSets=None, transactionId=None, **_):
+        self._round_trip()
+        conn = self._connection(transactionId)
+        translated = _translate(sql)
+        with conn.cursor() as cur:
+            for parameters in parameterSets or []:
+                cur.execute(translated, _params(parameters))
+        return {'updateResults': [{'generatedFields': []} for _ in parameterSets or []]}
+
+    def begin_transaction(self, **_):
+        self._round_trip()
+        conn = psycopg2.connect(self.dsn)
+        transaction_id = uuid.uuid4().hex
+        self._transactions[transaction_id] = conn
+        return {'transactionId': transaction_id}
+
+    def commit_transaction(self, transactionId, **_):
+        self._round_trip()
+        conn = self._transactions.pop(transactionId)
+        conn.commit()
+        conn.close()
+        return {'transactionStatus': 'Transaction Committed'}
+
+    def rollback_transaction(self, transactionId, **_):
+        self._round_trip()
+        conn = self._transactions.pop(transactionId)
+        conn.rollback()
+        conn.close()
+        return {'transactionStatus': 'Rollback Complete'}
+
+    def apply_schema(self):
+        """Run every migration in sql/ against the target database."""
+        conn = self._autocommit_connection()
+        with conn.cursor() as cur:
+            for name in sorted(os.listdir(SCHEMA_DIR)):
+                if name.endswith('.sql'):
+                    with open(os.path.join(SCHEMA_DIR, name)) as f:
+                        cur.execute(f.read())
+
+    def reset(self):
+        conn = self._autocommit_connection()
+        with conn.cursor() as cur:
+            cur.execute("TRUNCATE transactions, accounts, idempotency_keys, transaction_monthly_rollup RESTART IDENTITY")
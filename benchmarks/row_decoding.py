@@ -0,0 +1,106 @@
+"""
+Micro-benchmark: decoding a transaction history result set.
+
+Compares the original per-row `get_value(cell)` decoding with the ledger
+layer's column-oriented decoder on a synthetic Data API response. Both end
+in the list of dicts GetTransactionHistoryLambda serializes; the row-object
+path (used where rows are not serialized) is shown for reference.
+
+    python benchmarks/row_decoding.py --rows 10000 --repeat 20
+"""
+import os
+import sys
+import json
+import time
+import argparse
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT, 'layers', 'ledger', 'python'))
+sys.path.insert(0, os.path.join(ROOT, 'layers', 'common', 'python'))
+os.environ.setdefault('DB_CLUSTER_ARN', 'arn:aws:rds:local:000000000000:cluster:bench')
+os.environ.setdefault('DB_SECRET_ARN', 'arn:aws:secretsmanager:local:000000000000:secret:bench')
+os.environ.setdefault('AWS_DEFAULT_REGION', 'us-east-1')
+
+from ledger import TransactionRow, decode_columns, decode_rows, transaction_dicts  # noqa: E402
+
+COLUMN_METADATA = [
+    {'name': 'transaction_id', 'label': 'transaction_id', 'typeName': 'serial'},
+    {'name': 'amount', 'label': 'amount', 'typeName': 'numeric'},
+    {'name': 'type', 'label': 'type', 'typeName': 'varchar'},
+    {'name': 'timestamp', 'label': 'timestamp', 'typeName': 'timestamp'},
+    {'name': 'description', 'label': 'description', 'typeName': 'text'},
+]
+
+
+def synthetic_response(rows):
+    records = [
+        [
+            {'longValue': i},
+            {'stringValue': f"{(i % 500) - 250}.25"},
+            {'stringValue': ('deposit', 'withdrawal', 'transfer')[i % 3]},
+            {'stringValue': f"2025-{1 + i % 12:02d}-{1 + i % 28:02d} {i % 24:02d}:{i % 60:02d}:00.123"},
+            {'stringValue': f"Synthetic transaction {i}"} if i % 7 else {'isNull': True},
+        ]
+        for i in range(rows)
+    ]
+    return {'records': records, 'columnMetadata': COLUMN_METADATA}
+
+
+def legacy_decode(response):
+    def get_value(cell):
+        return next(iter(cell.values()), None)
+
+    results = []
+    for row in response.get('records', []):
+        results.append({
+            'transaction_id': get_value(row[0]),
+            'amount': float(get_value(row[1])),
+            'type': get_value(row[2]),
+            'timestamp': get_value(row[3]),
+            'description': get_value(row[4])
+        })
+    return results
+
+
+def columnar_decode(response):
+    """What GetTransactionHistoryLambda runs."""
+    return transaction_dicts(decode_columns(response))
+
+
+def columnar_rows_as_dict(response):
+    return [row.as_dict() for row in decode_rows(response, TransactionRow)]
+
+
+def best_of(fn, response, repeat):
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn(response)
+        best = min(best, time.perf_counter() - start)
+    return best * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rows', type=int, default=10000)
+    parser.add_argument('--repeat', type=int, default=20)
+    args = parser.parse_args()
+
+    response = synthetic_response(args.rows)
+    legacy = legacy_decode(response)
+    columnar = columnar_decode(response)
+    # isNull cells decode to True in the legacy path and None in the new one
+    assert [r['transaction_id'] for r in legacy] == [r['transaction_id'] for r in columnar]
+    assert columnar == columnar_rows_as_dict(response)
+
+    print(json.dumps({
+        "rows": args.rows,
+        "legacy_get_value_ms": round(best_of(legacy_decode, response, args.repeat), 3),
+        "columnar_dicts_ms": round(best_of(columnar_decode, response, args.repeat), 3),
+        "columnar_rows_ms": round(best_of(lambda r: decode_rows(r, TransactionRow), response, args.repeat), 3),
+        "columnar_rows_as_dict_ms": round(best_of(columnar_rows_as_dict, response, args.repeat), 3),
+    }, indent=2))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,152 @@
+"""
+Compare the single-statement transfer path in ProcessTransferLambda with the
+original five-call sequence, both running against a local PostgreSQL through
+the rds-data shim.
+
+    LEDGER_DSN="dbname=ledger" python benchmarks/transfer_latency.py \
+        --iterations 500 --latency-ms 15
+
+--latency-ms adds a fixed delay to every Data API call to approximate the
+HTTPS round trip a deployed Lambda pays; with it set to 0 the numbers are pure
+database time.
+"""
+import os
+import sys
+import json
+import time
+import argparse
+import importlib.util
+import statistics
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from rds_data_shim import RDSDataShim  # noqa: E402
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT, 'layers', 'ledger', 'python'))
+sys.path.insert(0, os.path.join(ROOT, 'layers', 'common', 'python'))
+
+
+def load_handler(folder):
+    os.environ.setdefault('DB_CLUSTER_ARN', 'arn:aws:rds:local:000000000000:cluster:bench')
+    os.environ.setdefault('DB_SECRET_ARN', 'arn:aws:secretsmanager:local:000000000000:secret:bench')
+    os.environ.setdefault('AWS_DEFAULT_REGION', 'us-east-1')
+    spec = importlib.util.spec_from_file_location(f"{folder}_app", os.path.join(ROOT, folder, 'app.py'))
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def legacy_transfer(client, user_id, signed_amount, tx_type, description):
+    """The pre-rewrite sequence: read, insert, upsert, re-read tx, re-read balance."""
+    def get_value(cell):
+        return next(iter(cell.values()), None)
+
+    uid = [{'name': 'uid', 'value': {'stringValue': user_id}}]
+    balance_query = "SELECT balance FROM accounts WHERE user_id = :uid"
+    records = client.execute_statement(sql=balance_query, parameters=uid).get('records', [])
+    current_balance = float(get_value(records[0][0])) if records else 0.0
+    if signed_amount < 0 and current_balance + signed_amount < 0:
+        return None
+    client.execute_statement(
+        sql="INSERT INTO transactions (user_id, amount, type, description) VALUES (:uid, :amt, :type, :desc)",
+        parameters=uid + [
+            {'name': 'amt', 'value': {'doubleValue': signed_amount}},
+            {'name': 'type', 'value': {'stringValue': tx_type}},
+            {'name': 'desc', 'value': {'stringValue': description}},
+        ])
+    client.execute_statement(
+        sql="""INSERT INTO accounts (user_id, balance) VALUES (:uid, :amt)
+               ON CONFLICT (user_id) DO UPDATE SET balance = accounts.balance + EXCLUDED.balance""",
+        parameters=uid + [{'name': 'amt', 'value': {'doubleValue': signed_amount}}])
+    client.execute_statement(
+        sql="""SELECT transaction_id, amount, type, timestamp, description FROM transactions
+               WHERE user_id = :uid ORDER BY timestamp DESC LIMIT 1""",
+        parameters=uid)
+    client.execute_statement(sql=balance_query, parameters=uid)
+    return True
+
+
+def make_event(amount, tx_type):
+    return {
+        "requestContext": {"authorizer": {"claims": {"email": "bench-user@example.com"}}},
+        "body": json.dumps({"amount": amount, "type": tx_type, "description": "benchmark"}),
+    }
+
+
+def summarize(label, samples, calls):
+    samples = sorted(samples)
+    pct = lambda p: samples[min(len(samples) - 1, int(p * len(samples)))]  # noqa: E731
+    return {
+        "path": label,
+        "iterations": len(samples),
+        "data_api_calls_per_transfer": calls / len(samples),
+        "mean_ms": round(statistics.mean(samples), 3),
+        "p50_ms": round(pct(0.50), 3),
+        "p95_ms": round(pct(0.95), 3),
+        "p99_ms": round(pct(0.99), 3),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--iterations', type=int, default=200)
+    parser.add_argument('--latency-ms', type=float, default=0.0)
+    parser.add_argument('--batch-size', type=int, default=0,
+                        help="also time batch mode, posting --iterations transfers in batches of this size")
+    args = parser.parse_args()
+
+    shim = RDSDataShim(latency_ms=args.latency_ms)
+    shim.apply_schema()
+    app = load_handler('ProcessTransferLambda')
+    import ledger.data_api
+    ledger.data_api.rds_client = shim
+
+    results = []
+
+    shim.reset()
+    shim.calls = 0
+    samples = []
+    for i in range(args.iterations):
+        tx_type = 'withdrawal' if i % 3 == 2 else 'deposit'
+        start = time.perf_counter()
+        legacy_transfer(shim, 'bench-user', -10.0 if tx_type == 'withdrawal' else 25.0, tx_type, 'benchmark')
+        samples.append((time.perf_counter() - start) * 1000)
+    results.append(summarize('legacy_five_calls', samples, shim.calls))
+
+    shim.reset()
+    shim.calls = 0
+    samples = []
+    for i in range(args.iterations):
+        tx_type = 'withdrawal' if i % 3 == 2 else 'deposit'
+        event = make_event(10.0 if tx_type == 'withdrawal' else 25.0, tx_type)
+        start = time.perf_counter()
+        response = app.lambda_handler(event, None)
+        samples.append((time.perf_counter() - start) * 1000)
+        if response['statusCode'] != 200:
+            raise SystemExit(f"handler failed: {response}")
+    results.append(summarize('single_statement', samples, shim.calls))
+
+    if args.batch_size:
+        shim.reset()
+        shim.calls = 0
+        transfers = [{"amount": 25.0, "type": "deposit", "description": "benchmark"}] * args.iterations
+        start = time.perf_counter()
+        for offset in range(0, len(transfers), args.batch_size):
+            event = make_event(0, 'deposit')
+            event['body'] = json.dumps({"transfers": transfers[offset:offset + args.batch_size]})
+            response = app.lambda_handler(event, None)
+            if response['statusCode'] != 200:
+                raise SystemExit(f"batch failed: {response['body']}")
+        elapsed = time.perf_counter() - start
+        results.append({
+            "path": f"batch_{args.batch_size}",
+            "iterations": len(transfers),
+            "data_api_calls_per_transfer": shim.calls / len(transfers),
+            "transfers_per_second": round(len(transfers) / elapsed, 1),
+        })
+
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == '__main__':
+    main()
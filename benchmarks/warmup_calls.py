@@ -0,0 +1,126 @@
+"""
+Check that warm-up pings never reach business data.
+
+Every handler is loaded with its AWS clients replaced by recorders and
+invoked with both warm-up event shapes: the {"warmup": true} input the
+schedule sends and a bare EventBridge "Scheduled Event". Each recorded call
+must be one of the pings (SELECT 1, DescribeTable, an S3 listing capped at
+zero keys) and every check must report ok.
+
+    python benchmarks/warmup_calls.py
+
+Prints the calls per handler and exits non-zero on any other call.
+"""
+import os
+import sys
+import json
+import importlib.util
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT, 'layers', 'ledger', 'python'))
+sys.path.insert(0, os.path.join(ROOT, 'layers', 'common', 'python'))
+
+HANDLERS = [
+    'GetUserProfileLambda',
+    'UpdateUserProfileLambda',
+    'GetStatementLambda',
+    'GenerateStatementLambda',
+    'GetTransactionHistoryLambda',
+    'GetTransactionSummaryLambda',
+    'ProcessTransferLambda',
+    'ForwardBankingLogs',
+]
+
+WARMUP_EVENTS = [
+    {"warmup": True},
+    {
+        "version": "0",
+        "id": "53dc4d37-cffa-4f76-80c9-8b7d4a4d2eaa",
+        "detail-type": "Scheduled Event",
+        "source": "aws.events",
+        "account": "123456789012",
+        "time": "2025-03-01T12:00:00Z",
+        "region": "us-east-1",
+        "resources": ["arn:aws:events:us-east-1:123456789012:rule/warm-up"],
+        "detail": {}
+    },
+]
+
+
+class Recorder:
+    """Accepts any attribute chain and call, appending (path, kwargs) to `calls`."""
+
+    def __init__(self, path, calls):
+        self._path = path
+        self._calls = calls
+
+    def __getattr__(self, name):
+        if name.startswith('__'):
+            raise AttributeError(name)
+        return Recorder(f"{self._path}.{name}", self._calls)
+
+    def __call__(self, *args, **kwargs):
+        self._calls.append((self._path, kwargs))
+        return {}
+
+
+def allowed(path, kwargs):
+    operation = path.rsplit('.', 1)[-1]
+    if operation == 'execute_statement':
+        return kwargs.get('sql', '').strip().upper() == 'SELECT 1'
+    if operation == 'describe_table':
+        return True
+    if operation == 'list_objects_v2':
+        return kwargs.get('MaxKeys') == 0
+    return False
+
+
+def load_handler(folder, calls):
+    os.environ.setdefault('DB_CLUSTER_ARN', 'arn:aws:rds:local:000000000000:cluster:warmup')
+    os.environ.setdefault('DB_SECRET_ARN', 'arn:aws:secretsmanager:local:000000000000:secret:warmup')
+    os.environ.setdefault('AWS_DEFAULT_REGION', 'us-east-1')
+    sys.path.insert(0, os.path.join(ROOT, folder))
+    try:
+        spec = importlib.util.spec_from_file_location(f"{folder}_app", os.path.join(ROOT, folder, 'app.py'))
+        module = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(module)
+    finally:
+        sys.path.remove(os.path.join(ROOT, folder))
+
+    import banking_common
+    for name, value in vars(module).items():
+        if isinstance(value, banking_common.LazyClient):
+            setattr(module, name, Recorder(name, calls))
+    if 'ledger' in sys.modules:
+        import ledger.data_api
+        ledger.data_api.rds_client = Recorder('rds_client', calls)
+    return module
+
+
+def main():
+    results = []
+    failed = False
+    for folder in HANDLERS:
+        calls = []
+        module = load_handler(folder, calls)
+        problems = []
+        for event in WARMUP_EVENTS:
+            response = module.lambda_handler(event, None)
+            checks = json.loads(response['body']).get('checks', {})
+            if response.get('statusCode') != 200 or any(c['status'] != 'ok' for c in checks.values()):
+                problems.append(f"warm-up response {response}")
+        problems += [f"unexpected call {path}({kwargs})" for path, kwargs in calls if not allowed(path, kwargs)]
+        failed |= bool(problems)
+        results.append({
+            "handler": folder,
+            "calls": sorted({path for path, _ in calls}),
+            "problems": problems,
+        })
+
+    print(json.dumps(results, indent=2))
+    if failed:
+        raise SystemExit("a warm-up event reached more than its ping")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,42 @@
+"""
+Helpers shared by every SecureBanking Lambda.
+
+Deployed as the CommonLayer Lambda layer; handlers import it as
+`banking_common`.
+"""
+from .cache import TTLCache
+from .claims import BACK_OFFICE_GROUP, claim_groups, is_back_office
+from .clients import LazyClient, lazy_client, lazy_table, prime, register_snapshot_priming, shared_session
+from .logs import get_logger, redact, start_invocation
+from .metrics import emit_counts
+from .responses import NDJSON_CONTENT_TYPE, decimal_default, header, json_response, ndjson_response
+from .s3_upload import MultipartUploader
+from .timing import instrumented, span
+from .warmup import is_warmup, warm_up
+
+__all__ = [
+    'BACK_OFFICE_GROUP',
+    'LazyClient',
+    'MultipartUploader',
+    'NDJSON_CONTENT_TYPE',
+    'TTLCache',
+    'claim_groups',
+    'decimal_default',
+    'emit_counts',
+    'get_logger',
+    'header',
+    'instrumented',
+    'is_back_office',
+    'is_warmup',
+    'json_response',
+    'lazy_client',
+    'lazy_table',
+    'ndjson_response',
+    'prime',
+    'redact',
+    'register_snapshot_priming',
+    'shared_session',
+    'span',
+    'start_invocation',
+    'warm_up',
+]
@@ -0,0 +1,17 @@
+import os
+
+# Cognito group for support and operations staff
+BACK_OFFICE_GROUP = os.environ.get('BACK_OFFICE_GROUP', 'BankOperations')
+
+
+def claim_groups(claims):
+    """Cognito groups from authorizer claims, as a set."""
+    groups = claims.get('cognito:groups', [])
+    if isinstance(groups, str):
+        # REST API authorizers flatten the list to "[a, b]" or "a b"
+        groups = groups.strip('[]').replace(',', ' ').split()
+    return set(groups)
+
+
+def is_back_office(claims):
+    return BACK_OFFICE_GROUP in claim_groups(claims)
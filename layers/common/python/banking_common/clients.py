@@ -0,0 +1,106 @@
+"""
+AWS clients built on first use instead of at import.
+
+Creating a client loads its service model, endpoint rules and credential
+chain. Done at module level, that cost lands in the INIT phase of every cold
+start, including invocations that are rejected before any AWS call. The
+proxies returned here build the real client the first time one of its
+attributes is used and keep it for the life of the container:
+
+    s3 = lazy_client('s3', signature_version='s3v4')
+    table = lazy_table(TABLE_NAME)
+
+All proxies share one session, so a service model read for the DynamoDB
+resource is reused by the DynamoDB client and the endpoint data is loaded
+once. Tests and benchmarks replace the module attribute with a fake as before.
+"""
+import threading
+
+from .timing import instrument_session, span
+
+_lock = threading.RLock()
+_session = None
+
+
+def shared_session():
+    """The boto3 session every lazy client is built from."""
+    global _session
+    if _session is None:
+        with _lock:
+            if _session is None:
+                # Imported here so importing banking_common does not pull in boto3
+                import boto3
+                session = boto3.session.Session()
+                instrument_session(session)
+                _session = session
+    return _session
+
+
+class LazyClient:
+    """Stands in for a client or resource until an attribute is first used."""
+
+    def __init__(self, factory, description):
+        self._factory = factory
+        self._description = description
+        self._instance = None
+
+    def get(self):
+        """The real client, building it on the first call."""
+        if self._instance is None:
+            with _lock:
+                if self._instance is None:
+                    with span('client', self._description):
+                        self._instance = self._factory()
+        return self._instance
+
+    @property
+    def created(self):
+        return self._instance is not None
+
+    def __getattr__(self, name):
+        # Only reached for names the proxy itself does not define
+        if name.startswith('__') or name in ('_factory', '_description', '_instance'):
+            raise AttributeError(name)
+        return getattr(self.get(), name)
+
+    def __repr__(self):
+        state = 'created' if self.created else 'not created'
+        return f"<LazyClient {self._description} ({state})>"
+
+
+def lazy_client(service_name, **config):
+    """A LazyClient for `service_name`; keyword arguments become a botocore Config."""
+    def build():
+        kwargs = {}
+        if config:
+            from botocore.config import Config
+            kwargs['config'] = Config(**config)
+        return shared_session().client(service_name, **kwargs)
+    return LazyClient(build, service_name)
+
+
+def lazy_table(table_name):
+    """A LazyClient for the DynamoDB Table resource `table_name`."""
+    return LazyClient(lambda: shared_session().resource('dynamodb').Table(table_name),
+                      f"dynamodb:{table_name}")
+
+
+def prime(*clients):
+    """Build `clients` now, e.g. before a SnapStart snapshot is taken."""
+    for client in clients:
+        if isinstance(client, LazyClient):
+            client.get()
+
+
+def register_snapshot_priming(*clients):
+    """
+    With SnapStart enabled, build `clients` before the snapshot is taken so
+    restored environments start with them ready; without it nothing is built
+    until first use. Returns whether the runtime offered the hook.
+    """
+    try:
+        from snapshot_restore_py import register_before_snapshot
+    except ImportError:
+        return False
+    register_before_snapshot(prime, *clients)
+    return True
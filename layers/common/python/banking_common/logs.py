@@ -0,0 +1,116 @@
+"""
+Structured JSON logging.
+
+    logger = get_logger()
+
+    def lambda_handler(event, context):
+        start_invocation(context)
+        logger.debug("Request received", extra={"event": event})
+        logger.info("Returning %d transactions", len(rows), extra={"user_id": user_id})
+
+Every record is printed as one JSON line carrying the level, message,
+request ID and any `extra` fields. Messages use logging's %-arguments and
+`extra` values are only serialized when the record is emitted, so a
+suppressed call costs a level check. LOG_LEVEL sets the level (default
+INFO); LOG_DEBUG_SAMPLE_RATE is the fraction of invocations that log at
+DEBUG, for occasional full payloads without paying for them on every request.
+
+Email addresses are masked wherever they appear, and values under keys such
+as `claims` or `authorization` are replaced before anything is written.
+"""
+import os
+import re
+import json
+import time
+import random
+import logging
+import traceback
+
+
+def _configured_level(name):
+    """LOG_LEVEL as a level number; an unknown name falls back to INFO instead of failing init."""
+    level = logging.getLevelNamesMapping().get(name.strip().upper())
+    if level is None:
+        logging.getLogger(__name__).warning("Unknown LOG_LEVEL %r, using INFO", name)
+        return logging.INFO
+    return level
+
+
+LOG_LEVEL = _configured_level(os.environ.get('LOG_LEVEL', 'INFO'))
+DEBUG_SAMPLE_RATE = float(os.environ.get('LOG_DEBUG_SAMPLE_RATE', '0'))
+
+REDACTED_KEYS = frozenset({'claims', 'authorization', 'cookie', 'cookies', 'idtoken', 'accesstoken', 'token'})
+EMAIL_RE = re.compile(r'([A-Za-z0-9._%+-])[A-Za-z0-9._%+-]*@([A-Za-z0-9.-]+\.[A-Za-z]{2,})')
+
+# Attributes every LogRecord has; anything else on a record came from `extra`
+_RECORD_ATTRIBUTES = frozenset(vars(logging.LogRecord('', 0, '', 0, '', None, None))) | {'message', 'asctime'}
+
+_request_id = None
+_configured = False
+
+
+def mask_email(text):
+    """alice@example.com -> a***@example.com, for every address in `text`."""
+    return EMAIL_RE.sub(r'\1***@\2', text)
+
+
+def redact(value):
+    """Copy of `value` with emails masked and sensitive keys blanked."""
+    if isinstance(value, str):
+        return mask_email(value)
+    if isinstance(value, dict):
+        return {
+            key: '[redacted]' if str(key).lower() in REDACTED_KEYS else redact(item)
+            for key, item in value.items()
+        }
+    if isinstance(value, (list, tuple)):
+        return [redact(item) for item in value]
+    return value
+
+
+class JsonFormatter(logging.Formatter):
+    def format(self, record):
+        entry = {
+            "timestamp": time.strftime('%Y-%m-%dT%H:%M:%S', time.gmtime(record.created)) + f".{int(record.msecs):03d}Z",
+            "level": record.levelname,
+            "message": mask_email(record.getMessage()),
+        }
+        if _request_id:
+            entry["requestId"] = _request_id
+        for name, value in vars(record).items():
+            if name not in _RECORD_ATTRIBUTES:
+                entry[name] = '[redacted]' if name.lower() in REDACTED_KEYS else redact(value)
+        if record.exc_info:
+            entry["exception"] = mask_email(''.join(traceback.format_exception(*record.exc_info)))
+        return json.dumps(entry, default=str, separators=(',', ':'))
+
+
+def get_logger():
+    """The root logger, set up once per container for JSON output at LOG_LEVEL."""
+    global _configured
+    logger = logging.getLogger()
+    if not _configured:
+        # Lambda installs its own handler on the root logger; locally there is none
+        if not logger.handlers:
+            logger.addHandler(logging.StreamHandler())
+        for handler in logger.handlers:
+            handler.setFormatter(JsonFormatter())
+        logger.setLevel(LOG_LEVEL)
+        _configured = True
+    return logger
+
+
+def start_invocation(context):
+    """
+    Tag this invocation's records with its request ID and decide whether it
+    is sampled for DEBUG output. Returns True when it is.
+    """
+    global _request_id
+    _request_id = getattr(context, 'aws_request_id', None)
+    sampled = DEBUG_SAMPLE_RATE > 0 and random.random() < DEBUG_SAMPLE_RATE
+    level = logging.DEBUG if sampled else LOG_LEVEL
+    root = logging.getLogger()
+    # setLevel clears every logger's level cache, so only call it on a change
+    if root.level != level:
+        root.setLevel(level)
+    return sampled
@@ -0,0 +1,28 @@
+"""
+CloudWatch Embedded Metric Format (EMF) output.
+
+Lambda ships stdout to CloudWatch Logs, which turns any line carrying an
+`_aws` block into metrics; no PutMetricData call or extra IAM is needed.
+"""
+import os
+import json
+import time
+
+NAMESPACE = os.environ.get('METRICS_NAMESPACE', 'SecureBanking')
+
+
+def emit_counts(counts, namespace=NAMESPACE):
+    """Print one EMF record with a Count metric per entry in `counts`."""
+    function_name = os.environ.get('AWS_LAMBDA_FUNCTION_NAME', 'local')
+    print(json.dumps({
+        "_aws": {
+            "Timestamp": int(time.time() * 1000),
+            "CloudWatchMetrics": [{
+                "Namespace": namespace,
+                "Dimensions": [["FunctionName"]],
+                "Metrics": [{"Name": name, "Unit": "Count"} for name in counts]
+            }]
+        },
+        "FunctionName": function_name,
+        **counts
+    }))
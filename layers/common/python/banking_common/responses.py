@@ -0,0 +1,130 @@
+"""
+API Gateway response encoding with Accept-Encoding negotiation.
+
+Bodies at or above COMPRESSION_MIN_BYTES are gzip- or brotli-compressed
+(brotli only when the optional `brotli` package is present in the bundle)
+and returned base64-encoded with isBase64Encoded set, which API Gateway
+decodes before sending the bytes to the client. Smaller bodies are sent as
+plain text because the compression framing would outweigh the saving.
+"""
+import os
+import json
+import zlib
+import base64
+from decimal import Decimal
+
+from .timing import span
+
+try:
+    import brotli
+except ImportError:  # optional dependency
+    brotli = None
+
+COMPRESSION_MIN_BYTES = int(os.environ.get('COMPRESSION_MIN_BYTES', '1024'))
+COMPRESSION_LEVEL = int(os.environ.get('COMPRESSION_LEVEL', '6'))
+
+NDJSON_CONTENT_TYPE = 'application/x-ndjson'
+
+
+def header(event, name):
+    """Case-insensitive request header lookup (REST and HTTP API events)."""
+    headers = event.get('headers') or {}
+    name = name.lower()
+    for key, value in headers.items():
+        if key.lower() == name:
+            return value
+    return None
+
+
+def _accepted_encodings(event):
+    accepted = {}
+    for part in (header(event, 'Accept-Encoding') or '').split(','):
+        token, _, params = part.strip().partition(';')
+        if not token:
+            continue
+        quality = 1.0
+        params = params.strip()
+        if params.startswith('q='):
+            try:
+                quality = float(params[2:])
+            except ValueError:
+                quality = 0.0
+        accepted[token.lower()] = quality
+    return accepted
+
+
+def choose_encoding(event):
+    """Return 'br', 'gzip' or None for this request."""
+    accepted = _accepted_encodings(event)
+    if brotli is not None and accepted.get('br', 0) > 0:
+        return 'br'
+    if accepted.get('gzip', 0) > 0:
+        return 'gzip'
+    return None
+
+
+def _gzip_compressor():
+    # wbits=31 produces a gzip container rather than a raw zlib stream
+    return zlib.compressobj(COMPRESSION_LEVEL, zlib.DEFLATED, 31)
+
+
+def _encoded(status_code, payload, encoding, headers):
+    headers = dict(headers)
+    headers['Vary'] = 'Accept-Encoding'
+    if encoding is None:
+        return {"statusCode": status_code, "body": payload.decode('utf-8'), "headers": headers}
+    headers['Content-Encoding'] = encoding
+    return {
+        "statusCode": status_code,
+        "body": base64.b64encode(payload).decode('ascii'),
+        "headers": headers,
+        "isBase64Encoded": True
+    }
+
+
+def decimal_default(value):
+    """json `default` for DynamoDB items, whose numbers come back as Decimal."""
+    if isinstance(value, Decimal):
+        return int(value) if value == value.to_integral_value() else float(value)
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def json_response(event, status_code, body, headers, default=None):
+    """JSON-serialize `body` and compress it if the client allows and it is large enough."""
+    with span('serialize', 'json_response'):
+        payload = json.dumps(body, default=default).encode('utf-8')
+        encoding = choose_encoding(event) if len(payload) >= COMPRESSION_MIN_BYTES else None
+        if encoding == 'br':
+            payload = brotli.compress(payload, quality=5)
+        elif encoding == 'gzip':
+            compressor = _gzip_compressor()
+            payload = compressor.compress(payload) + compressor.flush()
+        return _encoded(status_code, payload, encoding, headers)
+
+
+def ndjson_response(event, status_code, items, headers, default=None):
+    """
+    Serialize an iterable of dicts as newline-delimited JSON.
+
+    Items are encoded (and, with gzip, compressed) one at a time as the
+    iterable yields them, so no single JSON string of the whole result is
+    built. The Python runtime returns the response in one piece, so the
+    encoded lines are still joined into one body in memory; with gzip that
+    body is the compressed size.
+    """
+    headers = {**headers, "Content-Type": NDJSON_CONTENT_TYPE}
+    encoding = choose_encoding(event)
+    # Incremental output needs a streaming compressor; use gzip even if br is offered.
+    if encoding == 'br':
+        encoding = 'gzip' if _accepted_encodings(event).get('gzip', 0) > 0 else None
+
+    dumps = json.JSONEncoder(default=default, separators=(',', ':')).encode
+    # Includes producing the items when `items` is a generator
+    with span('serialize', 'ndjson_response'):
+        if encoding == 'gzip':
+            compressor = _gzip_compressor()
+            chunks = [compressor.compress(dumps(item).encode('utf-8') + b'\n') for item in items]
+            chunks.append(compressor.flush())
+        else:
+            chunks = [dumps(item).encode('utf-8') + b'\n' for item in items]
+        return _encoded(status_code, b''.join(chunks), encoding, headers)
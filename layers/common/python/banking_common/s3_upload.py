@@ -0,0 +1,137 @@
+"""
+Streaming writes to S3 with a fixed memory ceiling.
+
+MultipartUploader buffers at most one part in memory: every `part_size`
+bytes written are sent as an UploadPart call and dropped. Output that never
+fills a part is sent with a single PutObject instead, so small files do not
+pay the three-call multipart sequence.
+
+The buffer is an anonymous mmap of one part, sent as the request body
+itself. It never grows, so the allocator never copies it, and pages are
+only committed as they are written, so a small object costs only its size.
+"""
+import mmap
+import logging
+
+logger = logging.getLogger()
+
+MIN_PART_SIZE = 5 * 1024 * 1024  # S3 minimum for every part but the last
+DEFAULT_PART_SIZE = 8 * 1024 * 1024
+
+
+class MultipartUploader:
+    """
+    File-like writer for one S3 object.
+
+        with MultipartUploader(s3, bucket, key, 'text/csv') as out:
+            out.write(b'...')
+
+    Leaving the block normally completes the upload; an exception aborts it
+    so no orphaned parts are left behind.
+    """
+
+    def __init__(self, s3, bucket, key, content_type='application/octet-stream',
+                 part_size=DEFAULT_PART_SIZE, extra_args=None):
+        if part_size < MIN_PART_SIZE:
+            raise ValueError(f"part_size must be at least {MIN_PART_SIZE} bytes")
+        self.s3 = s3
+        self.bucket = bucket
+        self.key = key
+        self.content_type = content_type
+        self.part_size = part_size
+        self.extra_args = extra_args or {}
+        self.bytes_written = 0
+        self._buffer = None
+        self._upload_id = None
+        self._parts = []
+        self._closed = False
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.close()
+        else:
+            self.abort()
+        return False
+
+    def write(self, data):
+        if self._closed:
+            raise ValueError("write to a closed upload")
+        if isinstance(data, str):
+            data = data.encode('utf-8')
+        view = memoryview(data)
+        while view:
+            if self._buffer is None:
+                self._buffer = mmap.mmap(-1, self.part_size)
+            written = self._buffer.write(view[:self.part_size - self._buffer.tell()])
+            view = view[written:]
+            if self._buffer.tell() == self.part_size:
+                # The full mapping is the part; it is reused for the next one
+                self._buffer.seek(0)
+                self._upload_part(self._buffer)
+                self._buffer.seek(0)
+        self.bytes_written += len(data)
+        return len(data)
+
+    def _take_tail(self):
+        """The buffered bytes past the last part, as a body for the final request."""
+        if self._buffer is None or self._buffer.tell() == 0:
+            return b''
+        size = self._buffer.tell()
+        try:
+            # Shrinks the mapping in place (mremap) rather than copying out of it
+            self._buffer.resize(size)
+        except (OSError, SystemError):
+            # No mremap (e.g. macOS): copy the tail out instead
+            return self._buffer[:size]
+        self._buffer.seek(0)
+        return self._buffer
+
+    def _release(self):
+        if self._buffer is not None:
+            self._buffer.close()
+            self._buffer = None
+
+    def _upload_part(self, body):
+        if self._upload_id is None:
+            response = self.s3.create_multipart_upload(
+                Bucket=self.bucket, Key=self.key, ContentType=self.content_type, **self.extra_args)
+            self._upload_id = response['UploadId']
+        number = len(self._parts) + 1
+        response = self.s3.upload_part(
+            Bucket=self.bucket, Key=self.key, UploadId=self._upload_id,
+            PartNumber=number, Body=body)
+        self._parts.append({'ETag': response['ETag'], 'PartNumber': number})
+
+    def close(self):
+        """Send whatever is buffered and finish the object."""
+        if self._closed:
+            return
+        self._closed = True
+        try:
+            tail = self._take_tail()
+            if self._upload_id is None:
+                self.s3.put_object(
+                    Bucket=self.bucket, Key=self.key, Body=tail,
+                    ContentType=self.content_type, **self.extra_args)
+                return
+            if len(tail):
+                self._upload_part(tail)
+        finally:
+            self._release()
+        self.s3.complete_multipart_upload(
+            Bucket=self.bucket, Key=self.key, UploadId=self._upload_id,
+            MultipartUpload={'Parts': self._parts})
+        logger.info("Completed multipart upload of s3://%s/%s in %d parts (%d bytes)",
+                    self.bucket, self.key, len(self._parts), self.bytes_written)
+
+    def abort(self):
+        if self._closed:
+            return
+        self._closed = True
+        self._release()
+        if self._upload_id is not None:
+            self.s3.abort_multipart_upload(Bucket=self.bucket, Key=self.key, UploadId=self._upload_id)
+            logger.warning("Aborted multipart upload of s3://%s/%s", self.bucket, self.key)
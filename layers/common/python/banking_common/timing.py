@@ -0,0 +1,188 @@
+"""
+Per-invocation timing of AWS SDK calls and response serialization.
+
+    @instrumented
+    def lambda_handler(event, context):
+        ...
+
+Every client built by banking_common.clients comes from a session with
+before-call/after-call hooks, so each SDK call (signing, HTTP round trip and
+retries included) is timed as e.g. `rds-data.ExecuteStatement`. JSON
+serialization in json_response/ndjson_response is timed with span(). When
+the handler returns, the calls are written out according to CALL_TIMING:
+
+    emf    (default) one EMF record per operation, FunctionName x Operation
+           dimensions, with CallLatency (every call's ms) and CallCount
+    local  a flame-style tree of the invocation on stderr
+    off    no hooks are registered and nothing is recorded
+"""
+import os
+import sys
+import json
+import time
+import threading
+from functools import wraps
+
+from .metrics import NAMESPACE
+
+CALL_TIMING = os.environ.get('CALL_TIMING', 'emf').lower()
+
+_current = None
+_stack = threading.local()
+
+
+class _Invocation:
+    def __init__(self, name):
+        self.name = name
+        self.spans = []   # (path, ms) with path like ('serialize.json_response',)
+        self.start = time.perf_counter()
+
+    def add(self, operation, ms):
+        parents = getattr(_stack, 'names', ())
+        self.spans.append((parents + (operation,), ms))
+
+
+def enabled():
+    return CALL_TIMING in ('emf', 'local')
+
+
+class span:
+    """Time a block of our own code as `category.name` in the current invocation."""
+
+    def __init__(self, category, name):
+        self.operation = f"{category}.{name}"
+
+    def __enter__(self):
+        if _current is not None:
+            self.start = time.perf_counter()
+            _stack.names = getattr(_stack, 'names', ()) + (self.operation,)
+        return self
+
+    def __exit__(self, *exc):
+        invocation = _current
+        if invocation is not None and hasattr(self, 'start'):
+            _stack.names = _stack.names[:-1]
+            invocation.add(self.operation, (time.perf_counter() - self.start) * 1000)
+        return False
+
+
+def _before_call(context, **_):
+    if _current is not None:
+        context['timing_start'] = time.perf_counter()
+
+
+def _after_call(event_name, context, **_):
+    start = context.pop('timing_start', None)
+    invocation = _current
+    if start is not None and invocation is not None:
+        # e.g. after-call.rds-data.ExecuteStatement -> rds-data.ExecuteStatement
+        operation = event_name.split('.', 1)[1]
+        invocation.add(operation, (time.perf_counter() - start) * 1000)
+
+
+def instrument_session(session):
+    """Register the SDK call hooks on a boto3 session; clients created from it inherit them."""
+    if not enabled():
+        return
+    session.events.register('before-call', _before_call, unique_id='banking-timing-before')
+    session.events.register('after-call', _after_call, unique_id='banking-timing-after')
+    # Calls that fail in transport (timeouts, connection errors) still count
+    session.events.register('after-call-error', _after_call, unique_id='banking-timing-error')
+
+
+def instrumented(handler):
+    """Decorator for lambda_handler: record the invocation's calls and report them on return."""
+    if not enabled():
+        return handler
+
+    @wraps(handler)
+    def wrapper(event, context):
+        global _current
+        _current = invocation = _Invocation(handler.__name__)
+        _stack.names = ()
+        try:
+            return handler(event, context)
+        finally:
+            _current = None
+            total_ms = (time.perf_counter() - invocation.start) * 1000
+            if CALL_TIMING == 'local':
+                print(flame_summary(invocation, total_ms), file=sys.stderr)
+            else:
+                emit_call_metrics(invocation)
+    return wrapper
+
+
+# EMF accepts at most 100 values per metric in one record
+EMF_MAX_VALUES = 100
+
+
+def emit_call_metrics(invocation, namespace=NAMESPACE):
+    """One EMF record per operation in the invocation, split every EMF_MAX_VALUES calls."""
+    by_operation = {}
+    for path, ms in invocation.spans:
+        by_operation.setdefault(path[-1], []).append(round(ms, 2))
+    function_name = os.environ.get('AWS_LAMBDA_FUNCTION_NAME', 'local')
+    timestamp = int(time.time() * 1000)
+    for operation, latencies in by_operation.items():
+        # One record per EMF_MAX_VALUES calls; CloudWatch sums CallCount across them
+        for offset in range(0, len(latencies), EMF_MAX_VALUES):
+            chunk = latencies[offset:offset + EMF_MAX_VALUES]
+            print(json.dumps({
+                "_aws": {
+                    "Timestamp": timestamp,
+                    "CloudWatchMetrics": [{
+                        "Namespace": namespace,
+                        "Dimensions": [["FunctionName", "Operation"]],
+                        "Metrics": [
+                            {"Name": "CallLatency", "Unit": "Milliseconds"},
+                            {"Name": "CallCount", "Unit": "Count"}
+                        ]
+                    }]
+                },
+                "FunctionName": function_name,
+                "Operation": operation,
+                "CallLatency": chunk,
+                "CallCount": len(chunk)
+            }))
+
+
+def flame_summary(invocation, total_ms):
+    """
+    The invocation as an indented tree, heaviest first:
+
+        lambda_handler                       41.2 ms  100%
+          rds-data.ExecuteStatement x5        33.0 ms   80%
+          serialize.json_response              0.6 ms    1%
+          (own code)                           7.6 ms   18%
+    """
+    tree = {}
+    for path, ms in invocation.spans:
+        node = tree
+        for depth, name in enumerate(path, 1):
+            node = node.setdefault(name, {'ms': 0.0, 'calls': 0, 'children': {}})
+            if depth == len(path):
+                node['ms'] += ms
+                node['calls'] += 1
+            node = node['children']
+
+    lines = []
+
+    def walk(children, parent_ms, depth):
+        ordered = sorted(children.items(), key=lambda item: -item[1]['ms'])
+        for name, node in ordered:
+            label = name + (f" x{node['calls']}" if node['calls'] > 1 else '')
+            lines.append(_flame_line(label, node['ms'], total_ms, depth))
+            walk(node['children'], node['ms'], depth + 1)
+        # Threads overlap, so children can add up to more than their parent
+        own = parent_ms - sum(node['ms'] for node in children.values())
+        if children and own > 0:
+            lines.append(_flame_line('(own code)', own, total_ms, depth))
+
+    lines.append(_flame_line(invocation.name, total_ms, total_ms, 0))
+    walk(tree, total_ms, 1)
+    return '\n'.join(lines)
+
+
+def _flame_line(label, ms, total_ms, depth):
+    share = ms / total_ms * 100 if total_ms else 0
+    return f"{'  ' * depth}{label:<{44 - 2 * depth}} {ms:9.1f} ms {share:4.0f}%"
@@ -0,0 +1,44 @@
+"""
+Warm-up pings.
+
+An EventBridge schedule invokes each function every few minutes with
+{"warmup": true}. lambda_handler checks for it before looking at claims or
+the body and hands warm_up() one trivial call per backing service (SELECT 1,
+DescribeTable, an empty listing), which opens the client's HTTPS connection
+and keeps an auto-pausing Aurora cluster resumed. No business data is read.
+"""
+import json
+import time
+import logging
+
+logger = logging.getLogger()
+
+
+def is_warmup(event):
+    """True for {"warmup": true} or a bare EventBridge "Scheduled Event"."""
+    if not isinstance(event, dict):
+        return False
+    if event.get('warmup') is True:
+        return True
+    return event.get('source') == 'aws.events' and event.get('detail-type') == 'Scheduled Event'
+
+
+def warm_up(**checks):
+    """
+    Run each named check, logging failures instead of raising them, and
+    return the handler's response.
+
+        return warm_up(database=ping, bucket=lambda: s3.head_bucket(Bucket=BUCKET_NAME))
+    """
+    results = {}
+    for name, check in checks.items():
+        start = time.perf_counter()
+        try:
+            check()
+            status = 'ok'
+        except Exception as e:
+            logger.warning("Warm-up check %s failed: %s", name, e)
+            status = type(e).__name__
+        results[name] = {"status": status, "ms": round((time.perf_counter() - start) * 1000, 1)}
+    logger.info("Warm-up", extra={"checks": results})
+    return {"statusCode": 200, "body": json.dumps({"warmup": True, "checks": results})}
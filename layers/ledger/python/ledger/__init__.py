@@ -0,0 +1,44 @@
+"""
+Shared ledger data access for the Lambdas backed by SecureBankingCoreLedgerFinal.
+
+Deployed as the LedgerLayer Lambda layer; handlers import it as `ledger`.
+"""
+from .data_api import (
+    batch_execute,
+    build_parameters,
+    database_target,
+    execute,
+    ping,
+    query,
+    rds_client,
+    transaction,
+)
+from .decode import (
+    BalanceRow,
+    MonthlySummaryRow,
+    TransactionRow,
+    TransferRow,
+    decode_columns,
+    decode_rows,
+    rows_from_columns,
+    transaction_dicts,
+)
+
+__all__ = [
+    'BalanceRow',
+    'MonthlySummaryRow',
+    'TransactionRow',
+    'TransferRow',
+    'batch_execute',
+    'build_parameters',
+    'database_target',
+    'decode_columns',
+    'decode_rows',
+    'execute',
+    'ping',
+    'query',
+    'rds_client',
+    'rows_from_columns',
+    'transaction',
+    'transaction_dicts',
+]
@@ -0,0 +1,120 @@
+import os
+from contextlib import contextmanager
+from datetime import date, datetime
+from decimal import Decimal
+from functools import lru_cache
+
+from banking_common import lazy_client, register_snapshot_priming
+
+from .decode import decode_rows
+
+DEFAULT_DB_NAME = 'SecureBankingCoreLedgerFinal'
+
+# Built on the first statement, not at import
+rds_client = lazy_client('rds-data')
+register_snapshot_priming(rds_client)
+
+# Parameter sets per batch_execute_statement call
+BATCH_CHUNK_SIZE = 250
+
+
+@lru_cache(maxsize=None)
+def database_target():
+    """
+    secretArn, resourceArn and database for Data API calls. Read on first use,
+    so a missing variable fails the invocation rather than the import.
+    """
+    return {
+        'secretArn': os.environ['DB_SECRET_ARN'],
+        'resourceArn': os.environ['DB_CLUSTER_ARN'],
+        'database': os.environ.get('DB_NAME', DEFAULT_DB_NAME),
+    }
+
+
+def _arns():
+    target = database_target()
+    return {'secretArn': target['secretArn'], 'resourceArn': target['resourceArn']}
+
+
+def _parameter(name, value):
+    if value is None:
+        return {'name': name, 'value': {'isNull': True}}
+    if isinstance(value, bool):
+        return {'name': name, 'value': {'booleanValue': value}}
+    if isinstance(value, int):
+        return {'name': name, 'value': {'longValue': value}}
+    if isinstance(value, float):
+        return {'name': name, 'value': {'doubleValue': value}}
+    if isinstance(value, Decimal):
+        return {'name': name, 'typeHint': 'DECIMAL', 'value': {'stringValue': str(value)}}
+    if isinstance(value, datetime):
+        return {'name': name, 'typeHint': 'TIMESTAMP',
+                'value': {'stringValue': value.strftime('%Y-%m-%d %H:%M:%S.%f')}}
+    if isinstance(value, date):
+        return {'name': name, 'typeHint': 'DATE', 'value': {'stringValue': value.isoformat()}}
+    return {'name': name, 'value': {'stringValue': str(value)}}
+
+
+def build_parameters(params):
+    """Turn {'uid': 'alice', 'amt': 12.5} into Data API SqlParameter dicts."""
+    return [_parameter(name, value) for name, value in (params or {}).items()]
+
+
+def execute(sql, params=None, transaction_id=None):
+    """Run one statement; the response always carries columnMetadata."""
+    kwargs = {}
+    if transaction_id:
+        kwargs['transactionId'] = transaction_id
+    return rds_client.execute_statement(
+        **database_target(),
+        sql=sql,
+        parameters=build_parameters(params),
+        includeResultMetadata=True,
+        **kwargs
+    )
+
+
+def query(sql, row_type, params=None, transaction_id=None, exact_numeric=False):
+    """Run a SELECT (or RETURNING) statement and decode it into `row_type` objects."""
+    return decode_rows(execute(sql, params, transaction_id), row_type, exact_numeric)
+
+
+def ping():
+    """SELECT 1: resumes an auto-paused cluster and opens the Data API connection."""
+    rds_client.execute_statement(**database_target(), sql='SELECT 1')
+
+
+def batch_execute(sql, parameter_sets, transaction_id=None):
+    """Run `sql` once per dict in `parameter_sets`, BATCH_CHUNK_SIZE sets per call."""
+    kwargs = {}
+    if transaction_id:
+        kwargs['transactionId'] = transaction_id
+    for start in range(0, len(parameter_sets), BATCH_CHUNK_SIZE):
+        rds_client.batch_execute_statement(
+            **database_target(),
+            sql=sql,
+            parameterSets=[
+                build_parameters(params)
+                for params in parameter_sets[start:start + BATCH_CHUNK_SIZE]
+            ],
+            **kwargs
+        )
+
+
+@contextmanager
+def transaction():
+    """Yield a Data API transaction id; commit on success, roll back on error."""
+    begin = rds_client.begin_transaction(**database_target())
+    transaction_id = begin['transactionId']
+    try:
+        yield transaction_id
+    except BaseException:
+        rds_client.rollback_transaction(
+            **_arns(),
+            transactionId=transaction_id
+        )
+        raise
+    rds_client.commit_transaction(
+        **_arns(),
+        transactionId=transaction_id
+    )
@@ -0,0 +1,128 @@
+"""
+Column-oriented decoding of RDS Data API result sets.
+
+Each column's decoder is chosen once from `columnMetadata` (which cell field
+to read, and how to convert it) and then applied down the whole column, so
+rows never pay a per-cell `next(iter(cell.values()))` or type dispatch.
+"""
+from decimal import Decimal
+
+# Data API typeName -> cell field holding the value
+_CELL_FIELDS = {
+    'bool': 'booleanValue',
+    'int2': 'longValue',
+    'int4': 'longValue',
+    'int8': 'longValue',
+    'serial': 'longValue',
+    'bigserial': 'longValue',
+    'float4': 'doubleValue',
+    'float8': 'doubleValue',
+}
+
+_NUMERIC_TYPES = ('numeric', 'decimal', 'money')
+
+
+def _column_decoder(meta, exact_numeric):
+    type_name = (meta.get('typeName') or '').lower()
+    field = _CELL_FIELDS.get(type_name, 'stringValue')
+    convert = None
+    if type_name in _NUMERIC_TYPES:
+        convert = Decimal if exact_numeric else float
+    return field, convert
+
+
+def decode_columns(response, exact_numeric=False):
+    """
+    Decode a response into {column_label: [values...]}.
+
+    NUMERIC columns become floats, or Decimals with `exact_numeric=True`.
+    NULL cells decode to None. Requires includeResultMetadata=True.
+    """
+    records = response.get('records') or []
+    columns = {}
+    for index, meta in enumerate(response.get('columnMetadata') or []):
+        field, convert = _column_decoder(meta, exact_numeric)
+        values = [row[index].get(field) for row in records]
+        if convert is not None:
+            values = [None if v is None else convert(v) for v in values]
+        columns[meta.get('label') or meta['name']] = values
+    return columns
+
+
+def rows_from_columns(columns, row_type):
+    """Build `row_type` objects from decoded columns, matching its FIELDS; extra columns are ignored."""
+    if not columns:
+        return []
+    return [row_type(*values) for values in zip(*(columns[name] for name in row_type.FIELDS))]
+
+
+def decode_rows(response, row_type, exact_numeric=False):
+    """Decode a response into `row_type` objects."""
+    return rows_from_columns(decode_columns(response, exact_numeric), row_type)
+
+
+def transaction_dicts(columns):
+    """
+    Transaction dicts straight from decoded columns, for handlers that return
+    rows as JSON; skips building TransactionRow objects only to convert them.
+    """
+    if not columns:
+        return []
+    return [
+        {'transaction_id': transaction_id, 'amount': amount, 'type': type_,
+         'timestamp': timestamp, 'description': description}
+        for transaction_id, amount, type_, timestamp, description in zip(
+            columns['transaction_id'], columns['amount'], columns['type'],
+            columns['timestamp'], columns['description'])
+    ]
+
+
+class TransactionRow:
+    __slots__ = ('transaction_id', 'amount', 'type', 'timestamp', 'description')
+    FIELDS = __slots__
+
+    def __init__(self, transaction_id, amount, type, timestamp, description):
+        self.transaction_id = transaction_id
+        self.amount = amount
+        self.type = type
+        self.timestamp = timestamp
+        self.description = description
+
+    def as_dict(self):
+        return {
+            'transaction_id': self.transaction_id,
+            'amount': self.amount,
+            'type': self.type,
+            'timestamp': self.timestamp,
+            'description': self.description
+        }
+
+
+class TransferRow(TransactionRow):
+    """A transaction together with the account balance after it was applied."""
+    __slots__ = ('balance',)
+    FIELDS = TransactionRow.FIELDS + __slots__
+
+    def __init__(self, transaction_id, amount, type, timestamp, description, balance):
+        super().__init__(transaction_id, amount, type, timestamp, description)
+        self.balance = balance
+
+
+class BalanceRow:
+    __slots__ = ('user_id', 'balance')
+    FIELDS = __slots__
+
+    def __init__(self, user_id, balance):
+        self.user_id = user_id
+        self.balance = balance
+
+
+class MonthlySummaryRow:
+    __slots__ = ('month', 'type', 'total', 'transaction_count')
+    FIELDS = __slots__
+
+    def __init__(self, month, type, total, transaction_count):
+        self.month = month
+        self.type = type
+        self.total = total
+        self.transaction_count = transaction_count
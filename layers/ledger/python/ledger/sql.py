@@ -0,0 +1,227 @@
+"""
+SQL text for the ledger tables, shared by every Lambda that uses the layer.
+
+Parameters use the Data API's `:name` syntax; see ledger.build_parameters.
+"""
+
+# Atomic transfer: lock (or default) the balance, insert the transaction only
+# if the funds check passes, apply it to the account and hand back both rows.
+# Returns no rows when the funds check fails.
+TRANSFER_CTES = """
+    WITH current_balance AS (
+        SELECT COALESCE(
+            (SELECT balance FROM accounts WHERE user_id = :uid FOR UPDATE), 0
+        ) AS balance
+    ),
+    new_tx AS (
+        INSERT INTO transactions (user_id, amount, type, description)
+        SELECT :uid, :amt, :type, :desc
+        FROM current_balance
+        WHERE :amt >= 0 OR current_balance.balance + :amt >= 0
+        RETURNING transaction_id, amount, type, timestamp, description
+    ),
+    new_balance AS (
+        INSERT INTO accounts (user_id, balance, version)
+        SELECT :uid, amount, 1 FROM new_tx
+        ON CONFLICT (user_id)
+        DO UPDATE SET balance = accounts.balance + EXCLUDED.balance,
+                      version = accounts.version + 1
+        RETURNING balance
+    )
+"""
+
+TRANSFER_SELECT = """
+    SELECT new_tx.transaction_id, new_tx.amount, new_tx.type,
+           new_tx.timestamp, new_tx.description, new_balance.balance
+    FROM new_tx CROSS JOIN new_balance
+"""
+
+# Same transfer, also recording the outcome under the caller's idempotency
+# key. A concurrent request with the same key fails on the primary key and
+# the whole statement (transaction and balance change included) rolls back.
+IDEMPOTENCY_RECORD_CTE = """
+    idempotency_record AS (
+        INSERT INTO idempotency_keys
+            (user_id, idempotency_key, request_hash, transaction_id, amount, type,
+             timestamp, description, balance)
+        SELECT :uid, :idem_key, :req_hash, new_tx.transaction_id, new_tx.amount, new_tx.type,
+               new_tx.timestamp, new_tx.description, new_balance.balance
+        FROM new_tx CROSS JOIN new_balance
+    )
+"""
+
+# Folds the new transaction into its (user, month, type) rollup row.
+MONTHLY_ROLLUP_CTE = """
+    monthly_rollup AS (
+        INSERT INTO transaction_monthly_rollup
+            (user_id, month, type, total, transaction_count)
+        SELECT :uid, date_trunc('month', timestamp)::date, type, amount, 1
+        FROM new_tx
+        ON CONFLICT (user_id, month, type)
+        DO UPDATE SET total = transaction_monthly_rollup.total + EXCLUDED.total,
+                      transaction_count = transaction_monthly_rollup.transaction_count + 1
+    )
+"""
+
+
+def transfer_sql(idempotent=False, rollup=False):
+    """The atomic transfer statement, optionally recording an idempotency key and/or maintaining the monthly rollup."""
+    ctes = [TRANSFER_CTES.rstrip()]
+    if rollup:
+        ctes.append(MONTHLY_ROLLUP_CTE.rstrip())
+    if idempotent:
+        ctes.append(IDEMPOTENCY_RECORD_CTE.rstrip())
+    return ",".join(ctes) + "\n" + TRANSFER_SELECT
+
+
+# Replays are answered from the stored snapshot only; the transactions and
+# accounts tables are never read. request_hash identifies the original request.
+IDEMPOTENCY_LOOKUP_SQL = """
+    SELECT transaction_id, amount, type, timestamp, description, balance, request_hash
+    FROM idempotency_keys
+    WHERE user_id = :uid AND idempotency_key = :idem_key
+"""
+
+LOCK_BALANCES_SQL = """
+    SELECT user_id, balance FROM accounts
+    WHERE user_id IN ({placeholders})
+    ORDER BY user_id
+    FOR UPDATE
+"""
+
+BATCH_INSERT_SQL = """
+    INSERT INTO transactions (user_id, amount, type, description)
+    VALUES (:uid, :amt, :type, :desc)
+"""
+
+BATCH_BALANCE_SQL = """
+    INSERT INTO accounts (user_id, balance, version)
+    VALUES (:uid, :amt, 1)
+    ON CONFLICT (user_id)
+    DO UPDATE SET balance = accounts.balance + EXCLUDED.balance,
+                  version = accounts.version + 1
+"""
+
+
+# One row per (account, type) for a batch; every row in a batch shares the
+# database transaction's timestamp and therefore its month.
+BATCH_ROLLUP_SQL = """
+    INSERT INTO transaction_monthly_rollup
+        (user_id, month, type, total, transaction_count)
+    VALUES (:uid, date_trunc('month', now() AT TIME ZONE 'UTC')::date, :type, :amt, :cnt)
+    ON CONFLICT (user_id, month, type)
+    DO UPDATE SET total = transaction_monthly_rollup.total + EXCLUDED.total,
+                  transaction_count = transaction_monthly_rollup.transaction_count + EXCLUDED.transaction_count
+"""
+
+# Month totals per type, aggregated from the raw transactions.
+MONTHLY_SUMMARY_SQL = """
+    SELECT to_char(date_trunc('month', timestamp), 'YYYY-MM') AS month, type,
+           SUM(amount) AS total, COUNT(*) AS transaction_count
+    FROM transactions
+    WHERE user_id = :uid AND timestamp >= :since AND timestamp < :until
+    GROUP BY 1, 2
+    ORDER BY 1 DESC, 2
+"""
+
+# Same result read from the incrementally maintained rollup: O(months) rows.
+MONTHLY_ROLLUP_SUMMARY_SQL = """
+    SELECT to_char(month, 'YYYY-MM') AS month, type,
+           total, transaction_count
+    FROM transaction_monthly_rollup
+    WHERE user_id = :uid AND month >= :since AND month < :until
+    ORDER BY 1 DESC, 2
+"""
+
+# accounts.version is bumped by every write that changes the account's
+# transactions, so it doubles as a cheap change token for the history.
+ACCOUNT_VERSION_SQL = """
+    SELECT version FROM accounts WHERE user_id = :uid
+"""
+
+
+def transaction_history_sql(after_cursor=False, since=False, until=False,
+                            running_balance=False):
+    """
+    Keyset-paginated history, newest first.
+
+    Pages are ordered by (timestamp, transaction_id) so the cursor is a total
+    order even when timestamps collide; with the composite index from
+    sql/003_transactions_history_index.sql every page is a bounded index range
+    scan, however long the account's history. Fetch :limit as page size + 1 to
+    learn whether another page exists. Each row also carries the account's
+    current `account_version`, read in the same snapshot as the page.
+
+    With `running_balance`, each row also gets the balance right after it was
+    applied: the page's anchor (the balance after its newest row) minus a
+    window SUM over the newer rows of the same page. The anchor is always
+    read on the server, as accounts.balance less any transactions newer than
+    the page; that SUM is bounded by the same index as the page, and older
+    pages are never read.
+    """
+    conditions = ["user_id = :uid"]
+    if since:
+        conditions.append("timestamp >= :since")
+    if until:
+        conditions.append("timestamp < :until")
+    if after_cursor:
+        conditions.append("(timestamp, transaction_id) < (:cursor_ts, :cursor_id)")
+    page_sql = f"""
+    SELECT transaction_id, amount, type, timestamp, description,
+           (SELECT version FROM accounts WHERE user_id = :uid) AS account_version
+    FROM transactions
+    WHERE {' AND '.join(conditions)}
+    ORDER BY timestamp DESC, transaction_id DESC
+    LIMIT :limit
+"""
+    if not running_balance:
+        return page_sql
+
+    anchor_sql = "COALESCE((SELECT balance FROM accounts WHERE user_id = :uid), 0)"
+    newer = []
+    if after_cursor:
+        newer.append("(timestamp, transaction_id) >= (:cursor_ts, :cursor_id)")
+    if until:
+        newer.append("timestamp >= :until")
+    if newer:
+        anchor_sql += f"""
+         - COALESCE((SELECT SUM(amount) FROM transactions
+                     WHERE user_id = :uid AND ({' OR '.join(newer)})), 0)"""
+    return f"""
+    SELECT page.transaction_id, page.amount, page.type, page.timestamp,
+           page.description, page.account_version,
+           anchor.balance - COALESCE(SUM(page.amount) OVER (
+               ORDER BY page.timestamp DESC, page.transaction_id DESC
+               ROWS BETWEEN UNBOUNDED PRECEDING AND 1 PRECEDING
+           ), 0) AS running_balance
+    FROM ({page_sql}) page
+    CROSS JOIN (SELECT {anchor_sql} AS balance) anchor
+    ORDER BY page.timestamp DESC, page.transaction_id DESC
+"""
+
+
+# Balance at :since: the current balance less everything posted from :since on.
+STATEMENT_OPENING_BALANCE_SQL = """
+    SELECT COALESCE((SELECT balance FROM accounts WHERE user_id = :uid), 0)
+           - COALESCE((SELECT SUM(amount) FROM transactions
+                       WHERE user_id = :uid AND timestamp >= :since), 0) AS opening_balance
+"""
+
+
+def statement_page_sql(after_cursor=False):
+    """
+    One page of a statement period, oldest first.
+
+    The same keyset scheme as transaction_history_sql() walked in the other
+    direction, so the history index serves it with a backward range scan.
+    """
+    conditions = ["user_id = :uid", "timestamp >= :since", "timestamp < :until"]
+    if after_cursor:
+        conditions.append("(timestamp, transaction_id) > (:cursor_ts, :cursor_id)")
+    return f"""
+    SELECT transaction_id, amount, type, timestamp, description
+    FROM transactions
+    WHERE {' AND '.join(conditions)}
+    ORDER BY timestamp, transaction_id
+    LIMIT :limit
+"""
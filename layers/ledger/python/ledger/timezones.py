@@ -0,0 +1,128 @@
+"""
+Batched UTC -> display-zone conversion for ledger timestamps.
+
+The ledger stores naive UTC timestamps. Instead of resolving the zone and
+calling astimezone() per row, localize_timestamps() works out the zone's UTC
+offset transitions once for the time span covered by a result set, then
+formats every row with plain datetime arithmetic against that table. Building
+the table costs one probe per day of the span, about twice the per-row
+saving, so when the span has more than half as many days as there are rows
+(a sparse or long history) each row is converted on its own instead.
+"""
+from bisect import bisect_right
+from datetime import datetime, timedelta, timezone
+from functools import lru_cache
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
+
+_DAY = timedelta(days=1)
+_MINUTE = timedelta(minutes=1)
+
+
+@lru_cache(maxsize=64)
+def get_zone(name):
+    """Cached ZoneInfo lookup; raises ValueError for unknown zone names."""
+    try:
+        return ZoneInfo(name)
+    except (ZoneInfoNotFoundError, ValueError):
+        raise ValueError(f"Unknown time zone: {name}")
+
+
+def _offset_at(zone, utc_naive):
+    return utc_naive.replace(tzinfo=timezone.utc).astimezone(zone).utcoffset()
+
+
+def _format_offset(offset):
+    seconds = int(offset.total_seconds())
+    sign = '+' if seconds >= 0 else '-'
+    hours, remainder = divmod(abs(seconds), 3600)
+    minutes, seconds = divmod(remainder, 60)
+    suffix = f"{sign}{hours:02d}:{minutes:02d}"
+    return suffix + f":{seconds:02d}" if seconds else suffix
+
+
+def offset_transitions(zone, start, end):
+    """
+    Return ([segment_start...], [(offset, suffix)...]) covering [start, end].
+
+    Offsets are probed once per day across the span; where two probes differ
+    the exact transition minute is found by bisection.
+    """
+    starts = [datetime.min]
+    offsets = [_offset_at(zone, start)]
+    probe = start
+    while probe < end:
+        following = min(probe + _DAY, end)
+        offset = _offset_at(zone, following)
+        if offset != offsets[-1]:
+            low, high = probe, following
+            while high - low > _MINUTE:
+                middle = low + (high - low) / 2
+                if _offset_at(zone, middle) == offsets[-1]:
+                    low = middle
+                else:
+                    high = middle
+            starts.append(high.replace(second=0, microsecond=0))
+            offsets.append(offset)
+        probe = following
+    return starts, [(offset, _format_offset(offset)) for offset in offsets]
+
+
+def _parse_utc(value):
+    if isinstance(value, datetime):
+        parsed = value
+    else:
+        parsed = datetime.fromisoformat(value)
+    if parsed.tzinfo is not None:
+        parsed = parsed.astimezone(timezone.utc).replace(tzinfo=None)
+    return parsed
+
+
+def localize_timestamps(values, zone):
+    """
+    Convert naive-UTC timestamps (Data API strings or datetimes) to ISO 8601
+    strings in `zone`, e.g. '2025-03-01T04:34:56.123000-08:00'.
+
+    None stays None; a value that cannot be parsed is returned as str(value).
+    """
+    parsed = []
+    for value in values:
+        if value is None:
+            parsed.append(None)
+            continue
+        try:
+            parsed.append(_parse_utc(value))
+        except (TypeError, ValueError):
+            parsed.append(str(value))
+
+    instants = [p for p in parsed if isinstance(p, datetime)]
+    if not instants:
+        return parsed
+
+    start, end = min(instants), max(instants)
+    if (end - start) / _DAY * 2 > len(instants):
+        return _localize_per_row(parsed, zone)
+
+    starts, offsets = offset_transitions(zone, start, end)
+    if len(starts) == 1:
+        offset, suffix = offsets[0]
+        return [
+            (p + offset).isoformat() + suffix if isinstance(p, datetime) else p
+            for p in parsed
+        ]
+
+    results = []
+    for p in parsed:
+        if isinstance(p, datetime):
+            offset, suffix = offsets[bisect_right(starts, p) - 1]
+            results.append((p + offset).isoformat() + suffix)
+        else:
+            results.append(p)
+    return results
+
+
+def _localize_per_row(parsed, zone):
+    # fromutc() is the conversion astimezone() ends in, without the detour through UTC
+    return [
+        zone.fromutc(p.replace(tzinfo=zone)).isoformat() if isinstance(p, datetime) else p
+        for p in parsed
+    ]
@@ -0,0 +1,17 @@
+-- Core ledger schema for SecureBankingCoreLedgerFinal (Aurora PostgreSQL).
+-- ProcessTransferLambda and GetTransactionHistoryLambda query these tables
+-- through the RDS Data API. Run migrations in filename order.
+
+CREATE TABLE IF NOT EXISTS accounts (
+    user_id     VARCHAR(255) PRIMARY KEY,
+    balance     NUMERIC(14, 2) NOT NULL DEFAULT 0
+);
+
+CREATE TABLE IF NOT EXISTS transactions (
+    transaction_id  SERIAL PRIMARY KEY,
+    user_id         VARCHAR(255) NOT NULL,
+    amount          NUMERIC(14, 2) NOT NULL,
+    type            VARCHAR(20) NOT NULL,
+    timestamp       TIMESTAMP NOT NULL DEFAULT (now() AT TIME ZONE 'UTC'),
+    description     TEXT
+);
@@ -0,0 +1,18 @@
+-- Durable dedupe records for ProcessTransferLambda's Idempotency-Key header.
+-- Each row is written in the same statement as the transfer it describes and
+-- holds a snapshot of the response, so replays never read transactions or
+-- accounts. Rows can be pruned once clients stop retrying, e.g.
+--   DELETE FROM idempotency_keys WHERE created_at < now() - interval '7 days';
+
+CREATE TABLE IF NOT EXISTS idempotency_keys (
+    user_id          VARCHAR(255) NOT NULL,
+    idempotency_key  VARCHAR(255) NOT NULL,
+    transaction_id   INTEGER NOT NULL,
+    amount           NUMERIC(14, 2) NOT NULL,
+    type             VARCHAR(20) NOT NULL,
+    timestamp        TIMESTAMP NOT NULL,
+    description      TEXT,
+    balance          NUMERIC(14, 2) NOT NULL,
+    created_at       TIMESTAMP NOT NULL DEFAULT (now() AT TIME ZONE 'UTC'),
+    CONSTRAINT idempotency_keys_pkey PRIMARY KEY (user_id, idempotency_key)
+);
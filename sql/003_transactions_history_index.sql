@@ -0,0 +1,8 @@
+-- Composite index backing GetTransactionHistoryLambda's keyset pagination.
+-- Matches WHERE user_id = :uid ... ORDER BY timestamp DESC, transaction_id DESC
+-- and the (timestamp, transaction_id) < (:cursor_ts, :cursor_id) seek, so each
+-- page reads only its own rows. On a live cluster build it with
+-- CREATE INDEX CONCURRENTLY outside a transaction block instead.
+
+CREATE INDEX IF NOT EXISTS transactions_user_history_idx
+    ON transactions (user_id, timestamp DESC, transaction_id DESC);
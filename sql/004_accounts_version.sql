@@ -0,0 +1,5 @@
+-- Change counter for each account. ProcessTransferLambda increments it with
+-- every transaction it applies; GetTransactionHistoryLambda uses it as the
+-- ETag version so unchanged histories can be answered with 304 Not Modified.
+
+ALTER TABLE accounts ADD COLUMN IF NOT EXISTS version BIGINT NOT NULL DEFAULT 0;
@@ -0,0 +1,22 @@
+-- Optional pre-aggregated monthly totals per (user, month, type), read by
+-- GetTransactionSummaryLambda when SUMMARY_SOURCE=rollup. ProcessTransferLambda
+-- keeps it current when MAINTAIN_MONTHLY_ROLLUP=true. Run the backfill below
+-- and switch that flag on while transfers are paused, otherwise transfers
+-- made in between are missing from their month. Months are calendar months
+-- in UTC.
+
+CREATE TABLE IF NOT EXISTS transaction_monthly_rollup (
+    user_id            VARCHAR(255) NOT NULL,
+    month              DATE NOT NULL,
+    type               VARCHAR(20) NOT NULL,
+    total              NUMERIC(16, 2) NOT NULL,
+    transaction_count  BIGINT NOT NULL,
+    PRIMARY KEY (user_id, month, type)
+);
+
+-- Backfill from the existing ledger (no-op for rows that already exist).
+INSERT INTO transaction_monthly_rollup (user_id, month, type, total, transaction_count)
+SELECT user_id, date_trunc('month', timestamp)::date, type, SUM(amount), COUNT(*)
+FROM transactions
+GROUP BY 1, 2, 3
+ON CONFLICT (user_id, month, type) DO NOTHING;
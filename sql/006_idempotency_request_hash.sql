@@ -0,0 +1,7 @@
+-- SHA-256 of the transfer (signed amount, type, description) an
+-- Idempotency-Key was first used for. ProcessTransferLambda answers a reuse of
+-- the key with a different transfer with 422 instead of replaying the stored
+-- response. Rows written before this migration have no hash and are replayed
+-- as before.
+
+ALTER TABLE idempotency_keys ADD COLUMN IF NOT EXISTS request_hash VARCHAR(64);
@@ -0,0 +1,190 @@
+"""
+Search the ForwardBankingLogs archive without scanning it.
+
+Reads the `_index/` sidecars of the hour partitions that overlap the time
+window, keeps the objects whose time range and recorded IDs can match, and
+only downloads those. Matching log events are printed as NDJSON on stdout;
+a summary of what was read goes to stderr.
+
+    python tools/query_logs.py --log-group /aws/lambda/ProcessTransferLambda \\
+        --start 2025-03-01T14:00 --end 2025-03-01T16:00 --user-id alice
+
+    python tools/query_logs.py --request-id 0f8fad5b-d9cb-469f-a165-70867728950e \\
+        --start 2025-03-01 --end 2025-03-02 --explain
+
+Times are UTC. Without --log-group every log group in the archive is
+searched. Objects stored in raw or json format are placed by their first
+event, so partitions up to --lookback-hours before --start are read as well.
+"""
+import os
+import sys
+import gzip
+import json
+import argparse
+from datetime import datetime, timedelta, timezone
+from concurrent.futures import ThreadPoolExecutor
+
+import boto3
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT, 'layers', 'common', 'python'))
+sys.path.insert(0, os.path.join(ROOT, 'ForwardBankingLogs'))
+from partitions import USER_ID_RE, partition_value  # noqa: E402
+
+DEFAULT_BUCKET = os.environ.get('ARCHIVE_BUCKET', 'forwardedbankinglogsfinal')
+
+
+def parse_time(value):
+    moment = datetime.fromisoformat(value)
+    if moment.tzinfo is None:
+        moment = moment.replace(tzinfo=timezone.utc)
+    return moment.astimezone(timezone.utc)
+
+
+def to_millis(moment):
+    return int(moment.timestamp() * 1000)
+
+
+def list_keys(s3, bucket, prefix, delimiter=None):
+    paginator = s3.get_paginator('list_objects_v2')
+    args = {'Bucket': bucket, 'Prefix': prefix}
+    if delimiter:
+        args['Delimiter'] = delimiter
+    for page in paginator.paginate(**args):
+        if delimiter:
+            for common in page.get('CommonPrefixes', []):
+                yield common['Prefix']
+        for obj in page.get('Contents', []):
+            yield obj['Key']
+
+
+def log_group_partitions(s3, bucket, log_groups):
+    if log_groups:
+        return [f"log_group={partition_value(group)}/" for group in log_groups]
+    return list(list_keys(s3, bucket, 'log_group=', delimiter='/'))
+
+
+def hour_prefixes(group_prefix, start, end):
+    hour = start.replace(minute=0, second=0, microsecond=0)
+    while hour <= end:
+        yield f"{group_prefix}dt={hour:%Y-%m-%d}/hour={hour:%H}/_index/"
+        hour += timedelta(hours=1)
+
+
+def read_json(s3, bucket, key):
+    return json.loads(s3.get_object(Bucket=bucket, Key=key)['Body'].read())
+
+
+def index_matches(entry, start_ms, end_ms, request_id, user_id):
+    low, high = entry.get('minTimestamp'), entry.get('maxTimestamp')
+    if high is not None and high < start_ms:
+        return False
+    if low is not None and low > end_ms:
+        return False
+    if entry.get('idsTruncated'):
+        return True
+    if request_id and request_id not in entry.get('requestIds', []):
+        return False
+    if user_id and user_id not in entry.get('userIds', []):
+        return False
+    return True
+
+
+def object_events(s3, bucket, entry):
+    """Yield (log group, log stream, event) from one archive object."""
+    body = s3.get_object(Bucket=bucket, Key=entry['key'])['Body']
+    if entry['format'] == 'ndjson-gzip':
+        with gzip.GzipFile(fileobj=body) as lines:
+            for line in lines:
+                record = json.loads(line)
+                yield record.get('logGroup'), record.get('logStream'), record
+        return
+
+    raw = body.read()
+    if entry['format'] == 'raw':
+        raw = gzip.decompress(raw)
+    payload = json.loads(raw)
+    for log_event in payload.get('logEvents', []):
+        yield payload.get('logGroup'), payload.get('logStream'), log_event
+
+
+def event_matches(message, timestamp, start_ms, end_ms, user_id, needles):
+    if timestamp is not None and not start_ms <= timestamp <= end_ms:
+        return False
+    if user_id and user_id not in USER_ID_RE.findall(message):
+        return False
+    return all(needle in message for needle in needles)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--bucket', default=DEFAULT_BUCKET)
+    parser.add_argument('--log-group', action='append', dest='log_groups',
+                        help="log group name, e.g. /aws/lambda/ProcessTransferLambda; repeatable")
+    parser.add_argument('--start', type=parse_time, help="UTC start (ISO 8601); default one hour before --end")
+    parser.add_argument('--end', type=parse_time, help="UTC end (ISO 8601); default now")
+    parser.add_argument('--request-id')
+    parser.add_argument('--user-id')
+    parser.add_argument('--contains', action='append', default=[], help="substring the message must contain; repeatable")
+    parser.add_argument('--lookback-hours', type=int, default=1)
+    parser.add_argument('--workers', type=int, default=16)
+    parser.add_argument('--explain', action='store_true', help="list the objects that would be read and stop")
+    args = parser.parse_args()
+
+    end = args.end or datetime.now(timezone.utc)
+    start = args.start or end - timedelta(hours=1)
+    if start > end:
+        parser.error("--start must not be after --end")
+    start_ms, end_ms = to_millis(start), to_millis(end)
+    needles = [value for value in (args.request_id, *args.contains) if value]
+
+    s3 = boto3.client('s3')
+    scan_start = start - timedelta(hours=args.lookback_hours)
+    index_keys = [
+        key
+        for group_prefix in log_group_partitions(s3, args.bucket, args.log_groups)
+        for prefix in hour_prefixes(group_prefix, scan_start, end)
+        for key in list_keys(s3, args.bucket, prefix)
+    ]
+
+    with ThreadPoolExecutor(max_workers=args.workers) as pool:
+        entries = list(pool.map(lambda key: read_json(s3, args.bucket, key), index_keys))
+    selected = sorted(
+        (entry for entry in entries
+         if index_matches(entry, start_ms, end_ms, args.request_id, args.user_id)),
+        key=lambda entry: entry.get('minTimestamp') or 0
+    )
+    selected_bytes = sum(entry.get('bytes') or 0 for entry in selected)
+    total_bytes = sum(entry.get('bytes') or 0 for entry in entries)
+
+    print(json.dumps({
+        "indexes_read": len(index_keys),
+        "objects_selected": len(selected),
+        "bytes_selected": selected_bytes,
+        "bytes_in_window": total_bytes
+    }), file=sys.stderr)
+
+    if args.explain:
+        for entry in selected:
+            print(json.dumps(entry))
+        return
+
+    matched = 0
+    for entry in selected:
+        for log_group, log_stream, log_event in object_events(s3, args.bucket, entry):
+            message = log_event.get('message') or ''
+            if event_matches(message, log_event.get('timestamp'), start_ms, end_ms, args.user_id, needles):
+                matched += 1
+                print(json.dumps({
+                    "logGroup": log_group,
+                    "logStream": log_stream,
+                    "timestamp": log_event.get('timestamp'),
+                    "time": datetime.fromtimestamp(log_event['timestamp'] / 1000, timezone.utc).isoformat()
+                    if log_event.get('timestamp') is not None else None,
+                    "message": message
+                }))
+    print(json.dumps({"events_matched": matched}), file=sys.stderr)
+
+
+if __name__ == '__main__':
+    main()